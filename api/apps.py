@@ -2,3 +2,7 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # Connects the EvaluationForm signals that invalidate compiled form schemas
+        from . import form_schema  # noqa: F401
@@ -0,0 +1,71 @@
+import re
+from typing import NamedTuple
+
+SEXUAL_WORDS = (
+    'daddy', 'mommy', 'porn', 'sex', 'sexy', 'nude', 'nsfw', 'fuck', 'cum', 'orgasm', 'xxx',
+)
+
+PROFANE_WORDS = (
+    'fuck', 'shit', 'bitch', 'asshole', 'idiot', 'stupid', 'moron', 'bastard', 'dumb', 'crap',
+)
+
+# Regional indicators (flags), pictographs/emoticons/transport/supplemental symbols, misc symbols + dingbats
+EMOJI_RANGES = "\U0001F1E0-\U0001F1FF\U0001F300-\U0001FAFF\u2600-\u27BF"
+
+
+class ContentFlags(NamedTuple):
+    sexual: bool = False
+    profane: bool = False
+    emoji: bool = False
+    angle: bool = False
+
+
+class ContentFilter:
+    """
+    Word-list and character screening compiled once into a single regex.
+
+    `scan()` walks the text once and reports every category it saw. Word lists match
+    whole words only, case-insensitively; a word on both lists counts as sexual, the
+    stricter category.
+    """
+
+    def __init__(self, sexual_words=SEXUAL_WORDS, profane_words=PROFANE_WORDS):
+        sexual = set(w.lower() for w in sexual_words)
+        profane = set(w.lower() for w in profane_words) - sexual
+        # "[^\W\w]" never matches, for the case of empty word lists
+        initials = re.escape("".join(sorted(set(w[0] for w in sexual | profane)))) or "^\\W\\w"
+        # Texts are lower-cased before scanning, which is much cheaper than re.IGNORECASE;
+        # the lookahead skips word starts that cannot begin a listed word.
+        self._pattern = re.compile(
+            rf"\b(?=[{initials}])(?:(?P<sexual>{self._alternation(sexual)})|(?P<profane>{self._alternation(profane)}))\b"
+            rf"|(?P<emoji>[{EMOJI_RANGES}])"
+            r"|(?P<angle>[<>])"
+        )
+
+    @staticmethod
+    def _alternation(words) -> str:
+        # Longest first so e.g. "sexy" is tried before "sex"
+        return "|".join(re.escape(w) for w in sorted(words, key=lambda w: (-len(w), w))) or "(?!)"
+
+    def scan(self, text: str) -> ContentFlags:
+        seen = set()
+        for match in self._pattern.finditer(text.lower()):
+            seen.add(match.lastgroup)
+            if len(seen) == 4:
+                break
+        return ContentFlags(
+            sexual="sexual" in seen,
+            profane="profane" in seen,
+            emoji="emoji" in seen,
+            angle="angle" in seen,
+        )
+
+    def scan_many(self, texts: list[str]) -> list[ContentFlags]:
+        return [self.scan(text) for text in texts]
+
+
+# Shared instance used by sentiment pre-screening and plain-text validation
+CONTENT_FILTER = ContentFilter()
+
+# Any letter/digit left means there is something for the model to read
+WORD_RE = re.compile(r"\w")
@@ -0,0 +1,73 @@
+from typing import NamedTuple, Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+from .models.InstructorEvaluationForm import InstructorEvaluationForm
+from .models.ModuleEvaluationForm import ModuleEvaluationForm
+
+FORM_MODELS = {'module': ModuleEvaluationForm, 'instructor': InstructorEvaluationForm}
+
+
+class ResolvedForm(NamedTuple):
+    """The evaluation form a submission targets, resolved once per request."""
+    form_type: str                  # 'module' or 'instructor'
+    obj: models.Model               # ModuleEvaluationForm / InstructorEvaluationForm
+    content_type: ContentType
+
+    @property
+    def title(self) -> str:
+        """Title of the EvaluationForm holding this form's question set."""
+        if self.form_type == 'module':
+            title = getattr(self.obj, 'subject_code', None) or str(self.obj)
+        else:
+            title = getattr(self.obj, 'instructor_name', None) or str(self.obj)
+        return str(title).strip()
+
+    @property
+    def status(self):
+        return getattr(self.obj, 'status', None)
+
+    def matches(self, form_type, form_id) -> bool:
+        """True when `form_type`/`form_id` (pk or code/name) name this form."""
+        ident = str(form_id).strip()
+        if form_type != self.form_type:
+            return False
+        if ident == str(self.obj.pk):
+            return True
+        return ident.lower() == self.title.lower()
+
+
+def _lookup(model, form_id):
+    # numeric PK first, then the subject code / instructor name
+    try:
+        obj = model.objects.filter(pk=int(str(form_id))).first()
+    except (ValueError, TypeError):
+        obj = None
+    if obj:
+        return obj
+    ident = str(form_id).strip()
+    if model is ModuleEvaluationForm:
+        return ModuleEvaluationForm.objects.filter(subject_code__iexact=ident).first()
+    return InstructorEvaluationForm.objects.filter(instructor_name__iexact=ident).first()
+
+
+def resolve_form(form_type, form_id) -> Optional[ResolvedForm]:
+    """Form named by form_type ('module'/'instructor') and form_id (pk, subject code or instructor name)."""
+    model = FORM_MODELS.get(form_type)
+    if model is None or form_id in (None, ''):
+        return None
+    obj = _lookup(model, form_id)
+    if not obj:
+        return None
+    # get_for_model() is served from ContentType's process-wide cache after the first call
+    return ResolvedForm(form_type, obj, ContentType.objects.get_for_model(model))
+
+
+def resolve_legacy_form(form_id) -> Optional[ResolvedForm]:
+    """Legacy single `form` id: a module form with that pk/code wins over an instructor form."""
+    for form_type in ('module', 'instructor'):
+        resolved = resolve_form(form_type, form_id)
+        if resolved:
+            return resolved
+    return None
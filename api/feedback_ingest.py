@@ -0,0 +1,253 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models.BufferedFeedback import BufferedFeedback
+from .models.FeedbackResponse import FeedbackResponse
+from .sentiment_jobs import enqueue
+
+# Counters reported by buffer_stats(), kept in the default cache
+_COUNTERS = ('accepted', 'rejected', 'merged', 'duplicates', 'failed')
+_COUNTER_KEY = 'feedback-buffer:{}'
+
+# Pending depth as seen by this process: (value, monotonic time it was counted)
+_depth = (0, float('-inf'))
+_depth_lock = threading.Lock()
+
+
+def unique_key(obj):
+    """
+    The unique_form_student / unique_form_pseudonym key of a FeedbackResponse (or
+    BufferedFeedback), or None for anonymous submissions, which have none.
+    """
+    if obj.student_id is not None:
+        return obj.form_content_type_id, obj.form_object_id, 'student', obj.student_id
+    if obj.pseudonym is not None:
+        return obj.form_content_type_id, obj.form_object_id, 'pseudonym', obj.pseudonym
+    return None
+
+
+def find_duplicates(objs) -> set:
+    """
+    Indexes of `objs` that would violate feedback_responses' unique constraints: already
+    stored, or repeating an earlier item of `objs`. One query for the whole list.
+    """
+    per_form = {}       # (content type id, form id) -> (student ids, pseudonyms)
+    for obj in objs:
+        students, pseudonyms = per_form.setdefault((obj.form_content_type_id, obj.form_object_id), (set(), set()))
+        if obj.student_id is not None:
+            students.add(obj.student_id)
+        elif obj.pseudonym is not None:
+            pseudonyms.add(obj.pseudonym)
+    conditions = Q()
+    for (ct_id, object_id), (students, pseudonyms) in per_form.items():
+        if students:
+            conditions |= Q(form_content_type_id=ct_id, form_object_id=object_id, student_id__in=students)
+        if pseudonyms:
+            conditions |= Q(form_content_type_id=ct_id, form_object_id=object_id, pseudonym__in=pseudonyms)
+
+    seen = set()
+    if conditions:
+        for ct_id, object_id, student_id, pseudonym in FeedbackResponse.objects.filter(conditions).values_list(
+            'form_content_type_id', 'form_object_id', 'student_id', 'pseudonym'
+        ):
+            seen.add((ct_id, object_id, 'student', student_id))
+            seen.add((ct_id, object_id, 'pseudonym', pseudonym))
+
+    duplicates = set()
+    for index, obj in enumerate(objs):
+        key = unique_key(obj)
+        if key is None:
+            continue
+        if key in seen:
+            duplicates.add(index)
+        else:
+            seen.add(key)
+    return duplicates
+
+
+def insert_responses(objs, batch_size=None) -> list:
+    """bulk_create `objs` and queue them for sentiment scoring. Call inside a transaction."""
+    created = FeedbackResponse.objects.bulk_create(
+        objs, batch_size=batch_size or getattr(settings, 'FEEDBACK_BULK_BATCH_SIZE', 500)
+    )
+    # Scored later by `manage.py run_sentiment_worker`, never on the request path
+    if getattr(settings, 'SENTIMENT_JOBS_ENABLED', True):
+        enqueue([obj.id for obj in created])
+    return created
+
+
+def _count(name, amount=1):
+    if not amount:
+        return
+    key = _COUNTER_KEY.format(name)
+    if not cache.add(key, amount, None):
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            cache.set(key, amount, None)
+
+
+def pending_depth(max_age=None) -> int:
+    """Pending buffer rows, recounted at most every FEEDBACK_BUFFER_DEPTH_REFRESH_SECONDS per process."""
+    global _depth
+    if max_age is None:
+        max_age = getattr(settings, 'FEEDBACK_BUFFER_DEPTH_REFRESH_SECONDS', 1.0)
+    value, counted_at = _depth
+    if time.monotonic() - counted_at < max_age:
+        return value
+    with _depth_lock:
+        value, counted_at = _depth
+        if time.monotonic() - counted_at >= max_age:
+            value = BufferedFeedback.objects.filter(status=BufferedFeedback.Status.PENDING).count()
+            _depth = (value, time.monotonic())
+    return value
+
+
+def buffer_full() -> bool:
+    """Backpressure: True while the pending backlog is at FEEDBACK_BUFFER_MAX_DEPTH or more."""
+    full = pending_depth() >= getattr(settings, 'FEEDBACK_BUFFER_MAX_DEPTH', 50000)
+    if full:
+        _count('rejected')
+    return full
+
+
+class DuplicateSubmission(Exception):
+    """The submission is already waiting in the buffer."""
+
+
+def buffer_submission(serializer, **extra) -> BufferedFeedback:
+    """
+    Append a validated FeedbackResponseSerializer's submission to the buffer: one INSERT.
+
+    Raises DuplicateSubmission when the same student or pseudonym is already buffered (the
+    buffer's own unique constraints). feedback_responses is not queried here; a submission
+    that is already stored is caught by the flush and its buffer row marked duplicate
+    (see buffer_entry_status()).
+    """
+    obj = serializer.build_instance(**extra)
+    try:
+        with transaction.atomic():
+            entry = BufferedFeedback.objects.create(
+                form_content_type_id=obj.form_content_type_id,
+                form_object_id=obj.form_object_id,
+                student_id=obj.student_id,
+                pseudonym=obj.pseudonym,
+                responses=obj.responses,
+                ip_address=obj.ip_address,
+                is_anonymous=obj.is_anonymous,
+            )
+    except IntegrityError:
+        raise DuplicateSubmission
+    _count('accepted')
+    return entry
+
+
+def _merge(entries):
+    """Insert the non-duplicate entries; returns (created FeedbackResponses, duplicate entries)."""
+    objs = [entry.to_response() for entry in entries]
+    duplicates = find_duplicates(objs)
+    fresh = [obj for index, obj in enumerate(objs) if index not in duplicates]
+    created = insert_responses(fresh) if fresh else []
+    # submitted_at is auto_now_add, so bulk_create stamped the merge time: restore the acceptance time
+    for obj, entry in zip(created, [e for index, e in enumerate(entries) if index not in duplicates]):
+        obj.submitted_at = entry.submitted_at
+    if created:
+        FeedbackResponse.objects.bulk_update(created, ['submitted_at'], batch_size=500)
+    return created, [entry for index, entry in enumerate(entries) if index in duplicates]
+
+
+def flush_batch(limit: int) -> dict:
+    """
+    Merges up to `limit` pending buffer rows into feedback_responses in one transaction.
+
+    Rows are claimed with SKIP LOCKED, so several flushers can run. Merged rows are deleted.
+    Submissions already stored (or repeated in the batch) are not merged and their rows are
+    kept with status duplicate, so buffer_entry_status() can report them. The unique
+    constraints are the backstop: if a concurrent direct submission makes the batch insert
+    fail, the duplicate check is redone, and failing that the batch is merged row by row and
+    rows that still fail are marked failed.
+    """
+    result = {'claimed': 0, 'merged': 0, 'duplicates': 0, 'failed': 0}
+    with transaction.atomic():
+        entries = list(
+            BufferedFeedback.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=BufferedFeedback.Status.PENDING)
+            .order_by('id')[:limit]
+        )
+        if not entries:
+            return result
+        result['claimed'] = len(entries)
+
+        merged = None
+        duplicates = []
+        for _ in range(2):
+            try:
+                with transaction.atomic():
+                    created, duplicates = _merge(entries)
+                merged = len(created)
+                break
+            except IntegrityError:
+                continue
+
+        failed = []
+        if merged is None:
+            merged, duplicates = 0, []
+            for entry in entries:
+                try:
+                    with transaction.atomic():
+                        created, entry_duplicates = _merge([entry])
+                    merged += len(created)
+                    duplicates += entry_duplicates
+                except IntegrityError as exc:
+                    entry.status = BufferedFeedback.Status.FAILED
+                    entry.last_error = f"{type(exc).__name__}: {exc}"
+                    failed.append(entry)
+
+        for entry in duplicates:
+            entry.status = BufferedFeedback.Status.DUPLICATE
+            entry.last_error = "Already submitted for this form"
+        result.update(merged=merged, duplicates=len(duplicates), failed=len(failed))
+        if failed or duplicates:
+            BufferedFeedback.objects.bulk_update(failed + duplicates, ['status', 'last_error'])
+        kept = {e.id for e in failed + duplicates}
+        BufferedFeedback.objects.filter(id__in=[e.id for e in entries if e.id not in kept]).delete()
+
+    for name in ('merged', 'duplicates', 'failed'):
+        _count(name, result[name])
+    return result
+
+
+def buffer_entry_status(queue_id) -> str:
+    """
+    Outcome of a write-behind submission by the queue_id it was accepted with: pending,
+    failed, duplicate (already submitted, not merged) or merged. Merged rows are deleted
+    from the buffer, so an unknown id reads as merged.
+    """
+    status = BufferedFeedback.objects.filter(id=queue_id).values_list('status', flat=True).first()
+    return status or 'merged'
+
+
+def buffer_stats() -> dict:
+    """Backlog and throughput numbers for feedback/ingest/status/ and the flusher's log."""
+    pending = BufferedFeedback.objects.filter(status=BufferedFeedback.Status.PENDING)
+    oldest = pending.aggregate(oldest=Min('submitted_at'))['oldest']
+    depth = pending.count()
+    max_depth = getattr(settings, 'FEEDBACK_BUFFER_MAX_DEPTH', 50000)
+    return {
+        'write_behind_enabled': getattr(settings, 'FEEDBACK_WRITE_BEHIND_ENABLED', False),
+        'pending': depth,
+        'failed': BufferedFeedback.objects.filter(status=BufferedFeedback.Status.FAILED).count(),
+        'duplicate': BufferedFeedback.objects.filter(status=BufferedFeedback.Status.DUPLICATE).count(),
+        'max_depth': max_depth,
+        'utilization': round(depth / max_depth, 4) if max_depth else None,
+        'accepting': depth < max_depth,
+        'oldest_pending_seconds': round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0.0,
+        'totals': {name: cache.get(_COUNTER_KEY.format(name), 0) for name in _COUNTERS},
+    }
@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max, Q, Subquery, Value
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models.EvaluationForm import EvaluationForm
+from .models.EvaluationQuestion import EvaluationQuestion
+
+# Question types that must be answered with a rating
+RATING_TYPES = ('scale', 'rating', 'number')
+
+def _cache():
+    return caches[getattr(settings, 'FORM_SCHEMA_CACHE_ALIAS', 'default')]
+
+
+def _key(form_id):
+    return f'form-schema:{form_id}'
+
+
+def _question_bank_version():
+    """
+    Subqueries for (latest updated_at, row count) of evaluation_questions. Compiled schemas
+    embed question ids and types, so any question edit, insert or delete must invalidate
+    them in every process; reading this version from the database (a small table) does
+    not depend on the cache being shared.
+    """
+    bank = EvaluationQuestion.objects.order_by().annotate(_all=Value(1)).values('_all')
+    return {
+        'bank_updated_at': Subquery(bank.annotate(latest=Max('updated_at')).values('latest')),
+        'bank_size': Subquery(bank.annotate(total=Count('id')).values('total')),
+    }
+
+
+def form_question_codes(questions):
+    """Question ids of an EvaluationForm.questions JSON (a list of sections with a 'questions' list), in order."""
+    codes = []
+    if not isinstance(questions, list):
+        return codes
+    for section in questions:
+        if not isinstance(section, dict):
+            continue
+        qs = section.get('questions', [])
+        if not isinstance(qs, list):
+            continue
+        for q in qs:
+            if isinstance(q, dict) and q.get('id'):
+                codes.append(str(q['id']).strip())
+    return codes
+
+
+def lookup_questions(identifiers):
+    """
+    {identifier: {'id', 'code', 'type', 'required'}} for the identifiers that match an
+    EvaluationQuestion, in one query. Numeric identifiers are tried as a primary key first,
+    then as a code.
+    """
+    identifiers = {str(i).strip() for i in identifiers if i is not None and str(i).strip()}
+    if not identifiers:
+        return {}
+    pks = [int(i) for i in identifiers if i.isdigit()]
+    rows = EvaluationQuestion.objects.filter(Q(code__in=identifiers) | Q(pk__in=pks)).values('id', 'code', 'question_type')
+
+    by_pk, by_code = {}, {}
+    for row in rows:
+        entry = {
+            'id': row['id'],
+            'code': row['code'],
+            'type': row['question_type'],
+            'required': str(row['question_type'] or '').lower() in RATING_TYPES,
+        }
+        by_pk[row['id']] = entry
+        if row['code']:
+            by_code[row['code']] = entry
+
+    found = {}
+    for ident in identifiers:
+        entry = (by_pk.get(int(ident)) if ident.isdigit() else None) or by_code.get(ident)
+        if entry:
+            found[ident] = entry
+    return found
+
+
+def compile_form_schema(questions):
+    """
+    Question code -> {'id', 'code', 'type', 'required'} for every question of a form.
+
+    Codes without a matching EvaluationQuestion are still accepted, with id/type None
+    and stored under their own code.
+    """
+    codes = form_question_codes(questions)
+    known = lookup_questions(codes)
+    return {
+        code: known.get(code) or {'id': None, 'code': code, 'type': None, 'required': False}
+        for code in codes
+    }
+
+
+def get_form_schema(form_type, title):
+    """
+    Compiled schema of the EvaluationForm titled `title` (form_type 'module' or 'instructor'),
+    or None when there is no such form.
+
+    The schema is cached per form id together with the form's updated_at and the question
+    bank's version, so a form or question changed by another process is recompiled on the
+    next lookup. Costs one small query on a cache hit.
+    """
+    ef_type = 'Module' if form_type == 'module' else 'Instructor'
+    row = (
+        EvaluationForm.objects.filter(form_type=ef_type, title__iexact=str(title).strip())
+        .annotate(**_question_bank_version())
+        .values_list('id', 'updated_at', 'bank_updated_at', 'bank_size')
+        .first()
+    )
+    if not row:
+        return None
+    form_id, updated_at, *bank_version = row
+
+    cache = _cache()
+    entry = cache.get(_key(form_id))
+    if entry and entry['updated_at'] == updated_at and entry['bank_version'] == bank_version:
+        return entry['questions']
+
+    questions = EvaluationForm.objects.filter(pk=form_id).values_list('questions', flat=True).first()
+    schema = compile_form_schema(questions)
+    cache.set(
+        _key(form_id),
+        {'updated_at': updated_at, 'bank_version': bank_version, 'questions': schema},
+        getattr(settings, 'FORM_SCHEMA_CACHE_TTL', 300),
+    )
+    return schema
+
+
+@receiver([post_save, post_delete], sender=EvaluationForm)
+def invalidate_form_schema(sender, instance, **kwargs):
+    _cache().delete(_key(instance.pk))
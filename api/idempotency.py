@@ -0,0 +1,123 @@
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+_IN_PROGRESS = 'in_progress'
+
+# 4xx answers that may succeed when the same request is sent again (conflict, rate limit, ...)
+RETRYABLE_STATUSES = frozenset({
+    status.HTTP_408_REQUEST_TIMEOUT,
+    status.HTTP_409_CONFLICT,
+    status.HTTP_423_LOCKED,
+    status.HTTP_425_TOO_EARLY,
+    status.HTTP_429_TOO_MANY_REQUESTS,
+})
+
+
+def _cache():
+    return caches[getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', 'default')]
+
+
+def _cache_key(request, key):
+    # Keys are chosen by clients: scope them to the endpoint and the caller's credentials
+    caller = hashlib.sha256(request.headers.get('Authorization', '').encode()).hexdigest()[:16]
+    path = hashlib.sha256(request.path.encode()).hexdigest()[:16]
+    return f'idempotency:{path}:{caller}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def _fingerprint(request):
+    return hashlib.sha256(request.method.encode() + b'\0' + request.body).hexdigest()
+
+
+def _replay(entry, fingerprint):
+    if entry['fingerprint'] != fingerprint:
+        return Response(
+            {"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if entry['status'] == _IN_PROGRESS:
+        return Response(
+            {"detail": f"A request with this {IDEMPOTENCY_HEADER} is still being processed"},
+            status=status.HTTP_409_CONFLICT,
+            headers={'Retry-After': '1'},
+        )
+    return Response(entry['data'], status=entry['status'], headers={REPLAYED_HEADER: 'true'})
+
+
+def _is_final(response):
+    """True for responses a retry would get again: 2xx and deterministic 4xx (400, 404, 422, ...)."""
+    code = response.status_code
+    if getattr(response, 'data', None) is None:
+        return False
+    return 200 <= code < 300 or (400 <= code < 500 and code not in RETRYABLE_STATUSES)
+
+
+def idempotent(handler):
+    """
+    Makes a DRF view handler (create/post) honour an Idempotency-Key header.
+
+    The first request with a key runs normally. If its response is a final outcome (2xx, or
+    a 4xx not in RETRYABLE_STATUSES) it is stored for IDEMPOTENCY_TTL_SECONDS; otherwise the
+    key is released so the client can retry with it. Repeats with the same key and body get
+    the stored response back without running the handler, so no validation, writes or
+    sentiment jobs happen twice. A repeat while the first is still running gets 409, and
+    the same key with a different body gets 422. Requests without the header are not affected.
+    """
+    @functools.wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return handler(self, request, *args, **kwargs)
+        key = key.strip()
+        if not key or len(key) > 255:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} must be 1-255 characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache = _cache()
+        cache_key = _cache_key(request, key)
+        fingerprint = _fingerprint(request)
+
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return _replay(entry, fingerprint)
+        # Claim the key; a concurrent retry that got here first wins
+        lock_seconds = getattr(settings, 'IDEMPOTENCY_LOCK_SECONDS', 60)
+        if not cache.add(cache_key, {'fingerprint': fingerprint, 'status': _IN_PROGRESS}, lock_seconds):
+            entry = cache.get(cache_key)
+            if entry is not None:
+                return _replay(entry, fingerprint)
+
+        try:
+            response = handler(self, request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        if not _is_final(response):
+            # 5xx, 409, 429, ...: let the client retry with the same key
+            cache.delete(cache_key)
+            return response
+        cache.set(
+            cache_key,
+            {
+                'fingerprint': fingerprint,
+                'status': response.status_code,
+                # plain JSON types, so any cache backend can store it
+                'data': json.loads(JSONRenderer().render(response.data)),
+            },
+            getattr(settings, 'IDEMPOTENCY_TTL_SECONDS', 600),
+        )
+        return response
+
+    return wrapper
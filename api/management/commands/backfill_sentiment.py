@@ -0,0 +1,97 @@
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dt_time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from api import sentiment_service
+from api.models.FeedbackResponse import FeedbackResponse
+from api.sentiment_jobs import score_responses
+
+
+class Command(BaseCommand):
+    help = 'Score feedback_responses rows that have no sentiment yet, in resumable batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows read, scored and written per batch')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Batches scored concurrently (rows are still written in id order)')
+        parser.add_argument('--since', help='Only rows submitted on/after this date or datetime (ISO 8601)')
+        parser.add_argument('--checkpoint', default=str(Path(settings.BASE_DIR) / '.backfill_sentiment.json'),
+                            help='File recording the last written id while a run is in progress. An interrupted '
+                                 'run resumes after it; it is deleted once a run completes')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint and start from the first row')
+        parser.add_argument('--dry-run', action='store_true', help='Score but do not write sentiment or the checkpoint')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        workers = max(1, options['workers'])
+        checkpoint = Path(options['checkpoint'])
+
+        queryset = FeedbackResponse.objects.filter(sentiment__isnull=True)
+        if options['since']:
+            queryset = queryset.filter(submitted_at__gte=self._parse_since(options['since']))
+
+        last_id = 0
+        if checkpoint.exists() and not options['restart']:
+            last_id = int(json.loads(checkpoint.read_text()).get('last_id', 0))
+            self.stdout.write(f'Resuming after id {last_id} (checkpoint {checkpoint})')
+
+        if getattr(settings, 'SENTIMENT_POOL_ADDRESS', ''):
+            self.stdout.write(f'Using sentiment pool at {settings.SENTIMENT_POOL_ADDRESS}')
+        else:
+            self.stdout.write(f'Loading sentiment model from {sentiment_service.MODEL_DIR} ...')
+            sentiment_service._load_model_once()
+
+        written = 0
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for page in self._pages(queryset, last_id, batch_size):
+                in_flight.append((page, pool.submit(score_responses, page)))
+                if len(in_flight) >= workers:
+                    written += self._write(*in_flight.popleft(), checkpoint, options['dry_run'])
+            while in_flight:
+                written += self._write(*in_flight.popleft(), checkpoint, options['dry_run'])
+
+        if not options['dry_run']:
+            # Completed: the next run starts from the first row again (rows scored since are skipped anyway)
+            checkpoint.unlink(missing_ok=True)
+
+        verb = 'Scored' if options['dry_run'] else 'Backfilled'
+        self.stdout.write(self.style.SUCCESS(f'{verb} sentiment for {written} responses'))
+
+    def _pages(self, queryset, last_id, batch_size):
+        # Keyset pagination: each query starts after the last id seen, so it stays an index range
+        # scan however far into the table we are, and only one page is held in memory.
+        while True:
+            page = list(queryset.filter(id__gt=last_id).order_by('id').only('id', 'responses')[:batch_size])
+            if not page:
+                return
+            last_id = page[-1].id
+            yield page
+
+    def _write(self, page, future, checkpoint, dry_run):
+        scored = future.result()
+        for response in page:
+            response.sentiment = scored[response.id]
+        if not dry_run:
+            FeedbackResponse.objects.bulk_update(page, ['sentiment'])
+            checkpoint.write_text(json.dumps({'last_id': page[-1].id}))
+        self.stdout.write(f'  ids {page[0].id}..{page[-1].id}: {len(page)} rows')
+        return len(page)
+
+    def _parse_since(self, value):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f'--since must be an ISO date or datetime, got {value!r}')
+            parsed = datetime.combine(day, dt_time.min)
+        if settings.USE_TZ and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import sentiment_service
+from api.sentiment_batcher import MicroBatcher
+from api.sentiment_bench import load_dataset, timed
+
+
+class Command(BaseCommand):
+    help = 'Compare sentiment throughput of per-call inference against the micro-batching queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', help='CSV with text,label columns (default: data/feedback_dataset.csv)')
+        parser.add_argument('--repeat', type=int, default=3, help='Repeat the dataset N times to simulate a submission burst')
+        parser.add_argument('--concurrency', type=int, default=32, help='Number of simultaneous callers for the batched run')
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'SENTIMENT_BATCH_SIZE', 16))
+        parser.add_argument('--max-wait-ms', type=float, default=getattr(settings, 'SENTIMENT_BATCH_MAX_WAIT_MS', 10))
+
+    def handle(self, *args, **options):
+        texts = [text for text, _ in load_dataset(options['dataset'])] * max(1, options['repeat'])
+        n = len(texts)
+
+        self.stdout.write(f'Loading model from {sentiment_service.MODEL_DIR} ...')
+        _, load_s = timed(sentiment_service._load_model_once)
+        sentiment_service._predict_labels(texts[:1])  # first graph run is not representative
+        self.stdout.write(f'Model loaded in {load_s:.2f}s; scoring {n} texts\n')
+
+        # Current path: one forward pass per call
+        per_call, per_call_s = timed(lambda: [sentiment_service._predict_labels([t])[0] for t in texts])
+        self.stdout.write(f'Per-call:  {n / per_call_s:8.1f} texts/s  ({per_call_s:.2f}s total)')
+
+        # Batched path: many concurrent callers sharing the queue
+        batcher = MicroBatcher(
+            sentiment_service._predict_labels,
+            max_batch_size=options['batch_size'],
+            max_wait_ms=options['max_wait_ms'],
+        )
+        with ThreadPoolExecutor(max_workers=max(1, options['concurrency'])) as pool:
+            batched, batched_s = timed(lambda: list(pool.map(batcher.predict, texts)))
+        self.stdout.write(
+            f'Batched:   {n / batched_s:8.1f} texts/s  ({batched_s:.2f}s total, '
+            f'{batcher.batches_run} batches, avg size {batcher.average_batch_size:.1f})'
+        )
+
+        mismatches = sum(1 for a, b in zip(per_call, batched) if a != b)
+        self.stdout.write(f'\nSpeedup: {per_call_s / batched_s:.2f}x')
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f'{mismatches} labels differ between per-call and batched runs'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Labels identical across both runs'))
@@ -0,0 +1,57 @@
+import re
+
+from django.core.management.base import BaseCommand
+
+from api.content_filter import CONTENT_FILTER, PROFANE_WORDS, SEXUAL_WORDS
+from api.sentiment_bench import load_dataset, timed
+from api.sentiment_service import _prefilter
+
+
+def _legacy_prefilter(text):
+    # Previous predict_sentiment() screening: every pattern rebuilt per call, up to four scans
+    # (word boundaries written as real \b so both sides do the same work)
+    EMOJI_RE = re.compile("[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u26FF\u2700-\u27BF]+", flags=re.UNICODE)
+    txt = text.strip()
+    if not txt:
+        return "Sorry, I cannot understand this"
+    SEXUAL_RE = re.compile(r"\b(" + r"|".join(re.escape(w) for w in SEXUAL_WORDS) + r")\b", flags=re.IGNORECASE)
+    if SEXUAL_RE.search(txt):
+        return "Sorry, sexual words are not permitted"
+    PROFANE_RE = re.compile(r"\b(" + r"|".join(re.escape(w) for w in PROFANE_WORDS) + r")\b", flags=re.IGNORECASE)
+    if PROFANE_RE.search(txt):
+        return "Sorry, harsh words are not permitted"
+    without_emojis = EMOJI_RE.sub('', txt)
+    cleaned = re.sub(r"[^\w\s]", '', without_emojis).strip()
+    if not cleaned:
+        return "Sorry, I cannot understand this"
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark the compiled content filter against the per-call regex screening it replaced'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', help='CSV with text,label columns (default: data/feedback_dataset.csv)')
+        parser.add_argument('--repeat', type=int, default=200, help='Passes over the dataset per measurement')
+
+    def handle(self, *args, **options):
+        texts = [text for text, _ in load_dataset(options['dataset'])]
+        # A few rejected inputs so every branch is exercised
+        texts += ['You are an idiot', 'ahhhh daddy', '!!!???', '\U0001F600\U0001F600', '<b>bold</b> comment']
+        texts = texts * max(1, options['repeat'])
+        n = len(texts)
+
+        legacy, legacy_s = timed(lambda: [_legacy_prefilter(t) for t in texts])
+        compiled, compiled_s = timed(lambda: [_prefilter(t) for t in texts])
+        many, many_s = timed(lambda: [_prefilter(t, f) for t, f in zip(texts, CONTENT_FILTER.scan_many(texts))])
+
+        self.stdout.write(f'{n} texts')
+        self.stdout.write(f'Per-call regexes:  {legacy_s / n * 1e6:7.2f} us/text')
+        self.stdout.write(f'Compiled filter:   {compiled_s / n * 1e6:7.2f} us/text  ({legacy_s / compiled_s:.1f}x)')
+        self.stdout.write(f'Compiled, list:    {many_s / n * 1e6:7.2f} us/text  ({legacy_s / many_s:.1f}x)')
+
+        if legacy != compiled or compiled != many:
+            diff = sum(1 for a, b in zip(legacy, compiled) if a != b)
+            self.stdout.write(self.style.WARNING(f'{diff} results differ from the previous screening'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Results identical to the previous screening'))
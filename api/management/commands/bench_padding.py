@@ -0,0 +1,68 @@
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import sentiment_service
+from api.sentiment_bench import load_dataset, timed
+
+
+class Command(BaseCommand):
+    help = 'Compare pad-to-longest batching with length-bucketed padding on a mix of short and long comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', help='CSV with text,label columns (default: data/feedback_dataset.csv)')
+        parser.add_argument('--long-ratio', type=float, default=0.1, help='Share of long, essay-style comments in the mix')
+        parser.add_argument('--long-sentences', type=int, default=25, help='Sentences joined into each long comment')
+        parser.add_argument('--seed', type=int, default=13)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        short = [text for text, _ in load_dataset(options['dataset'])]
+        n_long = max(1, int(len(short) * options['long_ratio']))
+        long = [' '.join(rng.choice(short) for _ in range(options['long_sentences'])) for _ in range(n_long)]
+        texts = short + long
+        rng.shuffle(texts)
+
+        sentiment_service._load_model_once()
+        backend = sentiment_service._backend
+        sentiment_service._predict_labels(texts[:1])  # first graph run is not representative
+
+        input_ids = backend.encode(texts)
+        lengths = [len(ids) for ids in input_ids]
+        max_items = getattr(settings, 'SENTIMENT_BUCKET_MAX_ITEMS', 32)
+        buckets = sentiment_service._length_buckets(
+            lengths,
+            max_items=max_items,
+            max_tokens=getattr(settings, 'SENTIMENT_BUCKET_MAX_TOKENS', 4096),
+        )
+
+        # Pad-to-longest: same chunk size, arrival order, each chunk padded to its longest item
+        chunks = [list(range(i, min(i + max_items, len(texts)))) for i in range(0, len(texts), max_items)]
+        naive_tokens = sum(len(c) * max(lengths[i] for i in c) for c in chunks)
+        bucket_tokens = sum(len(b) * max(lengths[i] for i in b) for b in buckets)
+        real_tokens = sum(lengths)
+
+        self.stdout.write(f'{len(short)} short + {n_long} long comments, {real_tokens} real tokens\n')
+        self.stdout.write(f'Pad-to-longest: {naive_tokens:8d} tokens computed in {len(chunks)} batches')
+        self.stdout.write(f'Bucketed:       {bucket_tokens:8d} tokens computed in {len(buckets)} batches')
+
+        naive_labels, naive_s = timed(self._pad_to_longest, backend, input_ids, chunks)
+        bucket_labels, bucket_s = timed(sentiment_service._predict_labels, texts)
+        self.stdout.write(f'\nPad-to-longest: {naive_s:.2f}s')
+        self.stdout.write(f'Bucketed:       {bucket_s:.2f}s')
+        self.stdout.write(f'\nPadding overhead: {naive_tokens / real_tokens:.2f}x -> {bucket_tokens / real_tokens:.2f}x; '
+                          f'speedup {naive_s / bucket_s:.2f}x')
+
+        mismatches = sum(1 for a, b in zip(naive_labels, bucket_labels) if a != b)
+        if mismatches:
+            self.stdout.write(self.style.WARNING(f'{mismatches} labels differ between the two runs'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Labels identical across both runs'))
+
+    def _pad_to_longest(self, backend, input_ids, chunks):
+        labels = []
+        for chunk in chunks:
+            pred_idxs = backend.forward([input_ids[i] for i in chunk])
+            labels.extend(sentiment_service._label_for_index(int(idx), backend.id2label) for idx in pred_idxs)
+        return labels
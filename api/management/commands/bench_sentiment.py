@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import platform
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import sentiment_service
+from api.sentiment_backends import BACKENDS
+from api.sentiment_bench import DEFAULT_DATASET, classification_report, load_dataset, profile_backend, run_isolated
+from api.sentiment_cache import model_fingerprint
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+class Command(BaseCommand):
+    help = 'Evaluate and benchmark every available sentiment backend on a labelled CSV; prints a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', help='CSV with text,label columns (default: data/feedback_dataset.csv)')
+        parser.add_argument('--backends', nargs='*', choices=sorted(BACKENDS), default=sorted(BACKENDS),
+                            help='Backends to run (default: all; unavailable ones are reported, not fatal)')
+        parser.add_argument('--batch-sizes', type=_int_list, default=[1, 4, 16, 64],
+                            help='Comma-separated batch sizes for the throughput curve')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--in-process', action='store_true',
+                            help='Run every backend in this process (faster, but memory numbers get mixed)')
+
+    def handle(self, *args, **options):
+        dataset = Path(options['dataset'] or DEFAULT_DATASET)
+        rows = load_dataset(dataset)
+        if not rows:
+            raise CommandError(f'No labelled rows in {dataset}')
+        texts = [text for text, _ in rows]
+        expected = [label for _, label in rows]
+
+        report = {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'dataset': {'path': str(dataset), 'rows': len(rows), 'sha256': self._sha256(dataset)},
+            'model_dir': str(sentiment_service.MODEL_DIR),
+            'note': 'Model output only: the input filters (profanity, emoji, ...) are not applied',
+            'host': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+            },
+            'backends': [],
+        }
+
+        for name in options['backends']:
+            self.stderr.write(f'Benchmarking {name} on {len(texts)} texts ...')
+            try:
+                if options['in_process']:
+                    result = profile_backend(name, texts, sentiment_service.MODEL_DIR, options['batch_sizes'])
+                else:
+                    result = run_isolated(profile_backend, name, texts, sentiment_service.MODEL_DIR, options['batch_sizes'])
+            except Exception as exc:
+                self.stderr.write(self.style.WARNING(f'  {name} unavailable: {type(exc).__name__}: {exc}'))
+                report['backends'].append({'backend': name, 'available': False, 'error': f'{type(exc).__name__}: {exc}'})
+                continue
+
+            predicted = result.pop('labels')
+            result.update(
+                available=True,
+                model_version=model_fingerprint(sentiment_service.MODEL_DIR, name),
+                metrics=classification_report(expected, predicted),
+            )
+            report['backends'].append(result)
+            self.stderr.write(
+                f"  accuracy {result['metrics']['accuracy']:.3f}, macro F1 {result['metrics']['macro_f1']:.3f}, "
+                f"p99 {result['latency_p99_ms']:.1f} ms, load {result['load_seconds']:.2f} s"
+            )
+
+        if not any(b['available'] for b in report['backends']):
+            raise CommandError('No sentiment backend could be loaded')
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n', encoding='utf-8')
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def _sha256(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
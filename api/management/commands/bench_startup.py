@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Heavy AI packages that must only be imported on first inference (see api.sentiment_backends.BACKENDS)
+FORBIDDEN_AT_STARTUP = ('torch', 'transformers', 'onnxruntime', 'onnx', 'tokenizers', 'numpy', 'google.generativeai')
+
+# What a WSGI worker imports before serving its first request
+STARTUP_SCRIPT = (
+    "import sfme.wsgi\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure WSGI startup imports with `python -X importtime` and fail if AI packages are imported eagerly'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest top-level imports to list')
+        parser.add_argument('--forbid', nargs='*', default=list(FORBIDDEN_AT_STARTUP),
+                            help='Packages that must not be imported at startup')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'sfme.settings')
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+            cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True,
+        )
+        wall_s = time.perf_counter() - started
+        if proc.returncode != 0:
+            raise CommandError(f'Startup script failed:\n{proc.stderr[-2000:]}')
+
+        rows = self._parse(proc.stderr)
+        total_us = sum(self_us for self_us, _, _, _ in rows)
+        self.stdout.write(
+            f'{len(rows)} modules imported, {total_us / 1000:.0f} ms import time, '
+            f'{wall_s * 1000:.0f} ms wall (fresh interpreter)\n'
+        )
+
+        self.stdout.write('Slowest top-level imports (cumulative):')
+        top_level = sorted((r for r in rows if r[3] == 0), key=lambda r: r[1], reverse=True)
+        for _, cumulative_us, name, _ in top_level[:options['top']]:
+            self.stdout.write(f'  {cumulative_us / 1000:8.1f} ms  {name}')
+
+        forbidden = options['forbid']
+        offenders = sorted({
+            name for _, _, name, _ in rows
+            if any(name == pkg or name.startswith(pkg + '.') for pkg in forbidden)
+        })
+        if offenders:
+            roots = sorted({pkg for pkg in forbidden for name in offenders if name == pkg or name.startswith(pkg + '.')})
+            raise CommandError(
+                f"{', '.join(roots)} imported at startup ({len(offenders)} modules). "
+                f"Run `python -X importtime -c \"import sfme.wsgi\"` to find the importing module."
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nNone of {', '.join(forbidden)} imported at startup"))
+
+    @staticmethod
+    def _parse(stderr: str) -> list[tuple[int, int, str, int]]:
+        """(self_us, cumulative_us, module, depth) per `import time:` line."""
+        rows = []
+        for line in stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            try:
+                self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+                self_us, cumulative_us = int(self_us), int(cumulative_us)
+            except ValueError:
+                continue  # header line
+            stripped = name.lstrip()
+            depth = (len(name) - len(stripped) - 1) // 2
+            rows.append((self_us, cumulative_us, stripped.rstrip(), depth))
+        return rows
@@ -0,0 +1,66 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import sentiment_service
+from api.sentiment_backends import BACKENDS
+from api.sentiment_bench import load_dataset, measure_thread_config
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+class Command(BaseCommand):
+    help = 'Sweep inference processes x intra-op threads and report p50/p99 latency and throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default=getattr(settings, 'SENTIMENT_BACKEND', 'torch'), choices=sorted(BACKENDS))
+        parser.add_argument('--workers', type=_int_list, default=[1, 2, 4], help='Comma-separated process counts, e.g. 1,2,4')
+        parser.add_argument('--threads', type=_int_list, default=[1, 2, 4], help='Comma-separated intra-op thread counts')
+        parser.add_argument('--requests', type=int, default=100, help='Single-text requests per process')
+        parser.add_argument('--pin', action='store_true', help='Pin each process to its own block of cores (SENTIMENT_CPU_AFFINITY=auto)')
+        parser.add_argument('--dataset', help='CSV with text,label columns (default: data/feedback_dataset.csv)')
+
+    def handle(self, *args, **options):
+        texts = [text for text, _ in load_dataset(options['dataset'])]
+        if not texts:
+            raise CommandError('Dataset is empty')
+        texts = (texts * (options['requests'] // len(texts) + 1))[:max(1, options['requests'])]
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+
+        self.stdout.write(
+            f"Backend {options['backend']}, {len(texts)} requests per process, {cores} cores available"
+            f"{', pinned' if options['pin'] else ''}\n"
+        )
+        self.stdout.write(f'{"workers":>7} {"threads":>7} {"p50 ms":>8} {"p99 ms":>8} {"req/s":>8}')
+
+        results = []
+        for workers in options['workers']:
+            for threads in options['threads']:
+                r = measure_thread_config(
+                    options['backend'], sentiment_service.MODEL_DIR, texts, workers, threads, pin=options['pin'],
+                )
+                results.append(r)
+                note = '  oversubscribed' if workers * threads > cores else ''
+                self.stdout.write(
+                    f"{workers:>7} {threads:>7} {r['latency_p50_ms']:>8.1f} {r['latency_p99_ms']:>8.1f} "
+                    f"{r['requests_per_second']:>8.1f}{note}"
+                )
+
+        fastest = max(results, key=lambda r: r['requests_per_second'])
+        steadiest = min(results, key=lambda r: r['latency_p99_ms'])
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Highest throughput: {fastest['workers']} workers x {fastest['threads']} threads "
+            f"({fastest['requests_per_second']:.1f} req/s, p99 {fastest['latency_p99_ms']:.1f} ms)"
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Lowest p99: {steadiest['workers']} workers x {steadiest['threads']} threads "
+            f"({steadiest['latency_p99_ms']:.1f} ms, {steadiest['requests_per_second']:.1f} req/s)"
+        ))
+        self.stdout.write(
+            'Apply with SENTIMENT_POOL_WORKERS (or WSGI workers), SENTIMENT_INTRA_OP_THREADS'
+            + (' and SENTIMENT_CPU_AFFINITY=auto' if options['pin'] else '')
+        )
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import sentiment_service
+from api.sentiment_backends import BACKENDS
+from api.sentiment_bench import load_dataset, profile_backend, run_isolated
+
+
+class Command(BaseCommand):
+    help = 'Check that a sentiment backend agrees with the baseline on the dataset and compare latency / memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default='torch', choices=sorted(BACKENDS))
+        parser.add_argument('--candidate', default='torch_int8', choices=sorted(BACKENDS))
+        parser.add_argument('--dataset', help='CSV with text,label columns (default: data/feedback_dataset.csv)')
+        parser.add_argument('--tolerance', type=float, default=0.02, help='Max share of labels allowed to differ from the baseline')
+        parser.add_argument('--in-process', action='store_true', help='Measure both backends in this process (memory numbers get mixed)')
+
+    def handle(self, *args, **options):
+        rows = load_dataset(options['dataset'])
+        texts = [text for text, _ in rows]
+        expected = [label for _, label in rows]
+
+        results = []
+        for name in (options['baseline'], options['candidate']):
+            self.stdout.write(f'Profiling {name} on {len(texts)} texts ...')
+            if options['in_process']:
+                results.append(profile_backend(name, texts, sentiment_service.MODEL_DIR))
+            else:
+                results.append(run_isolated(profile_backend, name, texts, sentiment_service.MODEL_DIR))
+
+        self.stdout.write('')
+        self.stdout.write(f'{"backend":<12} {"load s":>8} {"RSS MB":>9} {"p50 ms":>8} {"p95 ms":>8} {"texts/s":>9} {"accuracy":>9}')
+        for r in results:
+            accuracy = sum(1 for a, b in zip(r['labels'], expected) if a == b) / len(expected)
+            backend_mb = f"{r['rss_backend_bytes'] / 2**20:.1f}" if r['rss_backend_bytes'] is not None else 'n/a'
+            self.stdout.write(
+                f"{r['backend']:<12} {r['load_seconds']:>8.2f} {backend_mb:>9} {r['latency_p50_ms']:>8.1f} "
+                f"{r['latency_p95_ms']:>8.1f} {r['batch_texts_per_second']:>9.1f} {accuracy:>9.3f}"
+            )
+
+        baseline, candidate = results
+        disagreements = sum(1 for a, b in zip(baseline['labels'], candidate['labels']) if a != b)
+        share = disagreements / len(texts)
+        self.stdout.write(f'\n{disagreements}/{len(texts)} labels differ ({share:.1%}, tolerance {options["tolerance"]:.1%})')
+        if share > options['tolerance']:
+            raise CommandError(f'{candidate["backend"]} disagrees with {baseline["backend"]} on {share:.1%} of the dataset')
+        self.stdout.write(self.style.SUCCESS(f'{candidate["backend"]} matches {baseline["backend"]} within tolerance'))
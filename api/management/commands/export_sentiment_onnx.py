@@ -0,0 +1,66 @@
+import inspect
+from pathlib import Path
+
+import numpy as np
+import torch
+from django.core.management.base import BaseCommand, CommandError
+
+from api import sentiment_service
+from api.sentiment_onnx import ONNX_FILENAME
+from api.sentiment_torch import TorchBackend
+
+
+class Command(BaseCommand):
+    help = 'Export the sentiment model to ONNX (dynamic batch and sequence axes) for SENTIMENT_BACKEND=onnx'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-dir', help='Hugging Face model directory (default: sentiment_model_final/)')
+        parser.add_argument('--output', help=f'Output file (default: <model-dir>/{ONNX_FILENAME})')
+        parser.add_argument('--opset', type=int, default=17)
+
+    def handle(self, *args, **options):
+        model_dir = Path(options['model_dir'] or sentiment_service.MODEL_DIR)
+        output = Path(options['output'] or model_dir / ONNX_FILENAME)
+
+        backend = TorchBackend(model_dir)
+        backend.device = torch.device('cpu')
+        backend.load()
+
+        samples = ['The instructor explains concepts clearly', 'Too much homework']
+        inputs = backend.tokenizer(samples, return_tensors='pt', truncation=True, padding=True)
+
+        export_kwargs = {}
+        if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+            # dynamic_axes belongs to the TorchScript exporter; newer torch defaults to dynamo
+            export_kwargs['dynamo'] = False
+
+        self.stdout.write(f'Exporting {model_dir} -> {output} (opset {options["opset"]}) ...')
+        torch.onnx.export(
+            backend.model,
+            (inputs['input_ids'], inputs['attention_mask']),
+            str(output),
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'},
+            },
+            opset_version=options['opset'],
+            **export_kwargs,
+        )
+
+        # Sanity check the exported graph against torch on the same inputs
+        import onnxruntime as ort
+        session = ort.InferenceSession(str(output), providers=['CPUExecutionProvider'])
+        (onnx_logits,) = session.run(['logits'], {
+            'input_ids': inputs['input_ids'].numpy(),
+            'attention_mask': inputs['attention_mask'].numpy(),
+        })
+        with torch.no_grad():
+            torch_logits = backend.model(**inputs).logits.numpy()
+
+        max_diff = float(np.abs(onnx_logits - torch_logits).max())
+        if max_diff > 1e-3:
+            raise CommandError(f'Exported model differs from torch (max logit diff {max_diff:.2e})')
+        self.stdout.write(self.style.SUCCESS(f'Exported {output} (max logit diff vs torch {max_diff:.2e})'))
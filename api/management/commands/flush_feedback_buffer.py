@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import feedback_ingest
+
+
+class Command(BaseCommand):
+    help = 'Merge write-behind feedback submissions into feedback_responses in batches (runs until interrupted)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'FEEDBACK_FLUSH_BATCH_SIZE', 1000),
+                            help='Buffered submissions merged per transaction')
+        parser.add_argument('--poll-interval', type=float, default=getattr(settings, 'FEEDBACK_FLUSH_POLL_SECONDS', 1.0),
+                            help='Seconds to sleep when the buffer is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the buffer once and exit')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        totals = {'merged': 0, 'duplicates': 0, 'failed': 0}
+
+        try:
+            while True:
+                close_old_connections()
+                started = time.perf_counter()
+                try:
+                    result = feedback_ingest.flush_batch(batch_size)
+                except Exception as exc:
+                    self.stderr.write(self.style.ERROR(f'Flush failed: {type(exc).__name__}: {exc}'))
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                for name in totals:
+                    totals[name] += result[name]
+                if result['claimed']:
+                    self.stdout.write(
+                        f"Merged {result['merged']}, dropped {result['duplicates']} duplicates, {result['failed']} failed "
+                        f"in {time.perf_counter() - started:.2f} s ({feedback_ingest.pending_depth(max_age=0)} pending)"
+                    )
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            f"Feedback flusher stopped: {totals['merged']} merged, {totals['duplicates']} duplicates, {totals['failed']} failed"
+        )
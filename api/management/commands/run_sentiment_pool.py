@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import sentiment_service
+from api.sentiment_pool import InferencePool, pool_authkey
+
+
+class Command(BaseCommand):
+    help = 'Serve sentiment predictions from a pool of processes sharing one copy of the model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--address', default=getattr(settings, 'SENTIMENT_POOL_ADDRESS', ''),
+                            help='Unix socket path or host:port to listen on (default: SENTIMENT_POOL_ADDRESS)')
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'SENTIMENT_POOL_WORKERS', 2),
+                            help='Number of inference processes')
+
+    def handle(self, *args, **options):
+        if not options['address']:
+            raise CommandError('Set SENTIMENT_POOL_ADDRESS or pass --address')
+
+        pool = InferencePool(options['address'], pool_authkey(), workers=options['workers'])
+        self.stdout.write(
+            f"Starting {pool.workers} sentiment workers on {options['address']} "
+            f"(backend {sentiment_service._setting('SENTIMENT_BACKEND', 'torch')}, model {sentiment_service.MODEL_DIR})"
+        )
+        pool.serve_forever()
+        self.stdout.write('Sentiment pool stopped')
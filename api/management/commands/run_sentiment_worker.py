@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import sentiment_jobs, sentiment_service
+
+
+class Command(BaseCommand):
+    help = 'Score queued feedback submissions and store their sentiment (runs until interrupted)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=getattr(settings, 'SENTIMENT_WORKER_BATCH_SIZE', 64),
+                            help='Jobs claimed per batch')
+        parser.add_argument('--poll-interval', type=float, default=getattr(settings, 'SENTIMENT_WORKER_POLL_SECONDS', 2.0),
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+
+        if getattr(settings, 'SENTIMENT_POOL_ADDRESS', ''):
+            self.stdout.write(f'Using sentiment pool at {settings.SENTIMENT_POOL_ADDRESS}')
+        else:
+            self.stdout.write(f'Loading sentiment model from {sentiment_service.MODEL_DIR} ...')
+            sentiment_service._load_model_once()
+        self.stdout.write(self.style.SUCCESS('Sentiment worker ready'))
+
+        scored = 0
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    claimed = sentiment_jobs.process_batch(batch_size)
+                except Exception as exc:
+                    self.stderr.write(self.style.ERROR(f'Batch failed: {type(exc).__name__}: {exc}'))
+                    claimed = 0
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                scored += claimed
+                if claimed:
+                    self.stdout.write(f'Scored {claimed} submissions ({scored} total)')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f'Sentiment worker stopped after {scored} submissions')
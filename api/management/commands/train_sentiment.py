@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.sentiment_bench import DEFAULT_DATASET
+from api.sentiment_training import train_sentiment_model
+
+
+class Command(BaseCommand):
+    help = ('Fine-tune the sentiment model on a labelled CSV (the train_sentiment.ipynb recipe) and write '
+            'a versioned model directory with a manifest.json')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', help='CSV with text,label columns (default: data/feedback_dataset.csv)')
+        parser.add_argument('--output-root', help='Parent directory for model versions (default: sentiment_models/)')
+        parser.add_argument('--base-model', default='distilbert-base-uncased-finetuned-sst-2-english')
+        parser.add_argument('--tokenizer', default='distilbert-base-uncased')
+        parser.add_argument('--epochs', type=int, default=15, help='Maximum number of epochs')
+        parser.add_argument('--batch-size', type=int, default=8)
+        parser.add_argument('--grad-accum', type=int, default=1,
+                            help='Micro-batches per optimizer step (effective batch = batch-size * grad-accum)')
+        parser.add_argument('--lr', type=float, default=1e-5)
+        parser.add_argument('--weight-decay', type=float, default=0.1)
+        parser.add_argument('--patience', type=int, default=3,
+                            help='Stop after this many epochs without a better validation weighted F1')
+        parser.add_argument('--val-fraction', type=float, default=0.2)
+        parser.add_argument('--max-length', type=int, default=128)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--cache-dir', help='Tokenization cache (default: <output-root>/.cache)')
+        parser.add_argument('--device', default='cpu', help='torch device, e.g. cpu or cuda')
+
+    def handle(self, *args, **options):
+        dataset = Path(options['dataset'] or DEFAULT_DATASET)
+        if not dataset.exists():
+            raise CommandError(f'Dataset not found: {dataset}')
+        for name in ('epochs', 'batch_size', 'grad_accum', 'patience', 'max_length'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        if not 0 < options['val_fraction'] < 1:
+            raise CommandError('--val-fraction must be between 0 and 1')
+
+        try:
+            out_dir = train_sentiment_model(
+                dataset=dataset,
+                output_root=Path(options['output_root'] or Path(settings.BASE_DIR) / 'sentiment_models'),
+                base_model=options['base_model'],
+                tokenizer_name=options['tokenizer'],
+                epochs=options['epochs'],
+                batch_size=options['batch_size'],
+                grad_accum=options['grad_accum'],
+                learning_rate=options['lr'],
+                weight_decay=options['weight_decay'],
+                patience=options['patience'],
+                val_fraction=options['val_fraction'],
+                max_length=options['max_length'],
+                seed=options['seed'],
+                cache_dir=options['cache_dir'],
+                device=options['device'],
+                log=self.stdout.write,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(f'Model written to {out_dir}'))
+        self.stdout.write(f'Serve it with SENTIMENT_MODEL_DIR={out_dir}')
@@ -1,7 +1,9 @@
 import re
 import logging
-from django.http import HttpResponseForbidden
+from io import BytesIO
+from django.http import HttpResponseForbidden, JsonResponse
 from django.conf import settings
+from django.urls import reverse
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,8 @@ class SQLInjectionProtectionMiddleware:
             r'sysobjects',
             r'systables',
         ]
+        # One pass per string instead of one search per pattern (large JSON bodies have thousands of strings)
+        self._sql_re = re.compile('|'.join(f'(?:{p})' for p in self.sql_patterns), re.IGNORECASE)
 
     def __call__(self, request):
         # Check GET parameters
@@ -72,11 +76,7 @@ class SQLInjectionProtectionMiddleware:
         if not isinstance(value, str):
             return False
 
-        value_lower = value.lower()
-        for pattern in self.sql_patterns:
-            if re.search(pattern, value_lower, re.IGNORECASE):
-                return True
-        return False
+        return self._sql_re.search(value.lower()) is not None
 
     def _check_json_for_sql_injection(self, data):
         """Recursively check JSON data for SQL injection patterns"""
@@ -103,4 +103,35 @@ class SQLInjectionProtectionMiddleware:
             ip = x_forwarded_for.split(',')[0]
         else:
             ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        return ip
+
+class BulkFeedbackBodySizeMiddleware:
+    """
+    Lets feedback/submit/bulk/ accept bodies up to FEEDBACK_BULK_MAX_BODY_SIZE while every other
+    endpoint keeps Django's DATA_UPLOAD_MAX_MEMORY_SIZE. Must come before any middleware that
+    reads request.body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._path = None
+
+    def __call__(self, request):
+        if self._path is None:
+            self._path = reverse('student-submit-feedback-bulk')
+        if request.method == 'POST' and request.path == self._path:
+            limit = getattr(settings, 'FEEDBACK_BULK_MAX_BODY_SIZE', 10 * 1024 * 1024)
+            try:
+                length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            if length > limit:
+                return JsonResponse({"detail": f"Request body larger than {limit} bytes"}, status=413)
+            # Read the body now so HttpRequest.body does not apply the global limit later
+            body = request.read()
+            if len(body) > limit:
+                return JsonResponse({"detail": f"Request body larger than {limit} bytes"}, status=413)
+            request._body = body
+            request._stream = BytesIO(body)
+
+        return self.get_response(request)
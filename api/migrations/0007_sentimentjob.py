@@ -0,0 +1,29 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_recreate_eval_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentimentJob',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('response', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='sentiment_job', to='api.feedbackresponse')),
+            ],
+            options={
+                'db_table': 'sentiment_jobs',
+                'managed': True,
+                'indexes': [models.Index(fields=['status', 'id'], name='sentiment_jobs_status_id')],
+            },
+        ),
+    ]
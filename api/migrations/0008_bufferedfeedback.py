@@ -0,0 +1,36 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_sentimentjob'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BufferedFeedback',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('form_object_id', models.BigIntegerField()),
+                ('pseudonym', models.CharField(blank=True, max_length=36, null=True)),
+                ('responses', models.JSONField()),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('is_anonymous', models.BooleanField(default=False)),
+                ('submitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('failed', 'Failed'), ('duplicate', 'Duplicate')], default='pending', max_length=16)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('form_content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+                ('student', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.student')),
+            ],
+            options={
+                'db_table': 'feedback_ingest_buffer',
+                'managed': True,
+                'indexes': [models.Index(fields=['status', 'id'], name='feedback_buffer_status_id')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('student__isnull', False)), fields=('form_content_type', 'form_object_id', 'student'), name='feedback_buffer_unique_form_student'), models.UniqueConstraint(condition=models.Q(('pseudonym__isnull', False)), fields=('form_content_type', 'form_object_id', 'pseudonym'), name='feedback_buffer_unique_form_pseudonym')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from .FeedbackResponse import FeedbackResponse
+from .Student import Student
+
+class BufferedFeedback(models.Model):
+    """
+    Validated submission accepted in write-behind mode, waiting to be merged into
+    feedback_responses by `manage.py flush_feedback_buffer`.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        FAILED = "failed", "Failed"
+        DUPLICATE = "duplicate", "Duplicate"
+
+    id = models.BigAutoField(primary_key=True)
+    form_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    form_object_id = models.BigIntegerField()
+    # No database FK: students is unmanaged (see SentimentJob.response)
+    student = models.ForeignKey(Student, null=True, blank=True, on_delete=models.SET_NULL, related_name='+', db_constraint=False)
+    pseudonym = models.CharField(max_length=36, null=True, blank=True)
+    responses = models.JSONField()
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    is_anonymous = models.BooleanField(default=False)
+    # When the submission was accepted; copied to FeedbackResponse.submitted_at on merge
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'feedback_ingest_buffer'
+        managed = True
+        indexes = [
+            models.Index(fields=['status', 'id'], name='feedback_buffer_status_id'),
+        ]
+        # Same keys as feedback_responses, so a resubmission is refused while the first one waits
+        # (or after the flush marked it duplicate)
+        constraints = [
+            models.UniqueConstraint(fields=['form_content_type', 'form_object_id', 'student'], name='feedback_buffer_unique_form_student', condition=Q(student__isnull=False)),
+            models.UniqueConstraint(fields=['form_content_type', 'form_object_id', 'pseudonym'], name='feedback_buffer_unique_form_pseudonym', condition=Q(pseudonym__isnull=False)),
+        ]
+
+    def to_response(self) -> FeedbackResponse:
+        """Unsaved FeedbackResponse with this submission's data."""
+        return FeedbackResponse(
+            form_content_type_id=self.form_content_type_id,
+            form_object_id=self.form_object_id,
+            student_id=self.student_id,
+            pseudonym=self.pseudonym,
+            responses=self.responses,
+            sentiment=None,
+            ip_address=self.ip_address,
+            is_anonymous=self.is_anonymous,
+            submitted_at=self.submitted_at,
+        )
+
+    def __str__(self):
+        return f"BufferedFeedback {self.id} ({self.status}) for {self.form_content_type_id}({self.form_object_id})"
@@ -0,0 +1,33 @@
+from django.db import models
+from .FeedbackResponse import FeedbackResponse
+
+class SentimentJob(models.Model):
+    """Queue entry: a submitted FeedbackResponse waiting for the sentiment worker."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        FAILED = "failed", "Failed"
+
+    id = models.BigAutoField(primary_key=True)
+    # No database FK: feedback_responses is unmanaged, so it does not exist in freshly migrated
+    # (test) databases. Deleting a response through the ORM still deletes its job.
+    response = models.OneToOneField(
+        FeedbackResponse, on_delete=models.CASCADE, related_name='sentiment_job', db_constraint=False
+    )
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'sentiment_jobs'
+        managed = True
+        indexes = [
+            models.Index(fields=['status', 'id'], name='sentiment_jobs_status_id'),
+        ]
+
+    def __str__(self):
+        return f"SentimentJob {self.id} ({self.status}) for response {self.response_id}"
@@ -7,6 +7,8 @@ from .InstructorEvaluationForm import InstructorEvaluationForm
 from .ModuleEvaluationForm import ModuleEvaluationForm
 from .Student import Student
 from .OTP import EmailOTP
+from .SentimentJob import SentimentJob
+from .BufferedFeedback import BufferedFeedback
 
 __all__ = [
     "AuditLog",
@@ -18,5 +20,7 @@ __all__ = [
     "InstructorEvaluationForm",
     "ModuleEvaluationForm",
     "Student",
-    "EmailOTP"
+    "EmailOTP",
+    "SentimentJob",
+    "BufferedFeedback"
 ]
\ No newline at end of file
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+from django.utils.module_loading import import_string
+
+
+class SentimentBackend:
+    """
+    Interface shared by the sentiment inference backends.
+
+    - load(): read tokenizer/model files (called once)
+    - encode(texts): token ids per text, truncated but not padded
+    - forward(batch): predicted class index per row of `batch` (rows may differ in length)
+    - id2label: class index -> label name from the model config
+    - fork_safe: a loaded instance keeps working in fork()ed children, so the inference
+      pool can load it once and share the weights copy-on-write
+    - intra_op_threads / inter_op_threads: thread pool sizes applied by load() (0 keeps
+      the library default of one thread per core)
+    """
+
+    name = ""
+    fork_safe = False
+
+    def __init__(self, model_dir):
+        self.model_dir = Path(model_dir)
+        self.id2label: dict = {}
+        self.intra_op_threads = 0
+        self.inter_op_threads = 0
+
+    def load(self):
+        raise NotImplementedError
+
+    def encode(self, texts: list[str]) -> list[list[int]]:
+        raise NotImplementedError
+
+    def forward(self, batch: list[list[int]]) -> list[int]:
+        raise NotImplementedError
+
+
+# SENTIMENT_BACKEND name -> implementation. Imported on first use so that choosing the
+# ONNX backend never pulls torch/transformers into the process.
+BACKENDS = {
+    "torch": "api.sentiment_torch.TorchBackend",
+    "torch_int8": "api.sentiment_torch.QuantizedTorchBackend",
+    "onnx": "api.sentiment_onnx.OnnxBackend",
+}
+
+
+def create_backend(name: str, model_dir) -> SentimentBackend:
+    """Returns an unloaded backend instance for SENTIMENT_BACKEND `name`."""
+    try:
+        backend_path = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown sentiment backend {name!r}. Choose one of: {', '.join(sorted(BACKENDS))}")
+    return import_string(backend_path)(model_dir)
@@ -0,0 +1,104 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects single-text requests from many callers into one model batch.
+
+    Callers `submit()` a text and get a Future back. A daemon worker thread takes
+    the first queued request, keeps collecting until `max_batch_size` items are
+    queued or `max_wait_ms` has passed, runs `predict_batch` once for the whole
+    batch and resolves every caller's Future with its own label.
+    """
+
+    def __init__(self, predict_batch: Callable[[List[str]], List[str]], *, max_batch_size: int = 16, max_wait_ms: float = 10):
+        self._predict_batch = predict_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._pid = os.getpid()
+
+        # Simple counters so benchmarks / logs can report the effective batch size
+        self.batches_run = 0
+        self.items_processed = 0
+
+    def submit(self, text: str) -> Future:
+        self._ensure_worker()
+        fut: Future = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    def predict(self, text: str, timeout: float | None = None) -> str:
+        """Blocking helper: submit `text` and wait for its label."""
+        return self.submit(text).result(timeout=timeout)
+
+    @property
+    def average_batch_size(self) -> float:
+        return (self.items_processed / self.batches_run) if self.batches_run else 0.0
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked (e.g. gunicorn --preload): the parent's thread and queue are not ours
+                self._queue = queue.Queue()
+                self._worker = None
+                self._pid = os.getpid()
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="sentiment-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> list:
+        items = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    items.append(self._queue.get(timeout=remaining))
+                else:
+                    # Time is up: only take what is already waiting
+                    items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            live = [(text, fut) for text, fut in items if fut.set_running_or_notify_cancel()]
+            if not live:
+                continue
+
+            try:
+                labels = self._predict_batch([text for text, _ in live])
+            except Exception as exc:
+                logger.exception("Sentiment batch of %d failed", len(live))
+                for _, fut in live:
+                    fut.set_exception(exc)
+                continue
+
+            if len(labels) != len(live):
+                # zip() would leave the unmatched callers waiting forever
+                exc = RuntimeError(f"Sentiment batch returned {len(labels)} labels for {len(live)} texts")
+                logger.error("%s", exc)
+                for _, fut in live:
+                    fut.set_exception(exc)
+                continue
+
+            self.batches_run += 1
+            self.items_processed += len(live)
+            for (_, fut), label in zip(live, labels):
+                fut.set_result(label)
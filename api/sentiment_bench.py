@@ -0,0 +1,213 @@
+import csv
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Bundled labelled comments (text,label) used by the sentiment benchmark commands
+DEFAULT_DATASET = Path(__file__).resolve().parent.parent / "data" / "feedback_dataset.csv"
+
+
+def load_dataset(path=None) -> list[tuple[str, str]]:
+    """
+    Returns [(text, label), ...] from a CSV with `text,label` columns.
+    Rows with an empty text are skipped.
+    """
+    path = Path(path) if path else DEFAULT_DATASET
+    rows = []
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        for row in csv.DictReader(fh):
+            text = (row.get("text") or "").strip()
+            if text:
+                rows.append((text, (row.get("label") or "").strip().lower()))
+    return rows
+
+
+def timed(fn, *args, **kwargs):
+    """Returns (result, elapsed_seconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of `values` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[k]
+
+
+def current_rss_bytes() -> int | None:
+    """Resident set size of this process, or None when the platform does not expose it."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def peak_rss_bytes() -> int | None:
+    """Highest resident set size this process has reached, or None when unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def classification_report(expected: list[str], predicted: list[str]) -> dict:
+    """Accuracy, per-class precision/recall/F1/support and the confusion matrix (rows = expected)."""
+    labels = sorted(set(expected) | set(predicted))
+    index = {label: i for i, label in enumerate(labels)}
+    matrix = [[0] * len(labels) for _ in labels]
+    for e, p in zip(expected, predicted):
+        matrix[index[e]][index[p]] += 1
+
+    per_class = {}
+    for label, i in index.items():
+        tp = matrix[i][i]
+        predicted_n = sum(row[i] for row in matrix)
+        support = sum(matrix[i])
+        precision = tp / predicted_n if predicted_n else 0.0
+        recall = tp / support if support else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_class[label] = {"precision": precision, "recall": recall, "f1": f1, "support": support}
+
+    scored = [label for label in labels if per_class[label]["support"]]
+    return {
+        "accuracy": sum(matrix[i][i] for i in range(len(labels))) / len(expected) if expected else 0.0,
+        "macro_f1": sum(per_class[label]["f1"] for label in scored) / len(scored) if scored else 0.0,
+        "per_class": per_class,
+        "confusion_matrix": {"labels": labels, "matrix": matrix},
+    }
+
+
+def profile_backend(backend_name: str, texts: list[str], model_dir, batch_sizes=()) -> dict:
+    """
+    Loads `backend_name` in this process and measures it on `texts`: load time, RSS added
+    by importing and loading the backend, single-text latency, whole-list throughput and,
+    for each of `batch_sizes`, the throughput of scoring the list in batches of that size.
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+    from . import sentiment_service
+    from .sentiment_backends import create_backend
+
+    rss_before = current_rss_bytes()
+    backend = create_backend(backend_name, model_dir)
+    _, load_s = timed(backend.load)
+    rss_loaded = current_rss_bytes()
+
+    sentiment_service._predict_labels(texts[:1], backend)  # first graph run is not representative
+    latencies = [timed(sentiment_service._predict_labels, [t], backend)[1] for t in texts]
+    labels, batch_s = timed(sentiment_service._predict_labels, texts, backend)
+
+    batch_curve = []
+    for size in batch_sizes:
+        _, elapsed = timed(
+            lambda: [sentiment_service._predict_labels(texts[i:i + size], backend) for i in range(0, len(texts), size)]
+        )
+        batch_curve.append({"batch_size": size, "texts_per_second": len(texts) / elapsed if elapsed else 0.0})
+
+    return {
+        "backend": backend_name,
+        "load_seconds": load_s,
+        "rss_backend_bytes": (rss_loaded - rss_before) if rss_before is not None and rss_loaded is not None else None,
+        "rss_bytes": current_rss_bytes(),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p95_ms": percentile(latencies, 95) * 1000,
+        "latency_p99_ms": percentile(latencies, 99) * 1000,
+        "batch_texts_per_second": len(texts) / batch_s if batch_s else 0.0,
+        "batch_curve": batch_curve,
+        "labels": labels,
+    }
+
+
+def run_isolated(fn, *args):
+    """Runs fn(*args) in a fresh interpreter so memory and load-time numbers don't bleed between runs."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def _thread_bench_worker(backend_name, model_dir, texts, threads, cpu_spec, index, barrier, results):
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+    from . import sentiment_service
+    from .sentiment_backends import create_backend
+    from .sentiment_threads import apply_cpu_affinity
+
+    backend = create_backend(backend_name, model_dir)
+    backend.intra_op_threads = threads
+    backend.inter_op_threads = 1
+    apply_cpu_affinity(cpu_spec, worker_index=index, threads=threads)
+    backend.load()
+    sentiment_service._predict_labels(texts[:1], backend)  # first graph run is not representative
+
+    barrier.wait()
+    latencies = []
+    started = time.perf_counter()
+    for text in texts:
+        latencies.append(timed(sentiment_service._predict_labels, [text], backend)[1])
+    results.put((latencies, started, time.perf_counter()))
+
+
+def measure_thread_config(backend_name: str, model_dir, texts: list[str], workers: int, threads: int, pin: bool = False) -> dict:
+    """
+    Runs `workers` fresh processes, each with `threads` intra-op threads (optionally pinned to
+    its own cores), all scoring `texts` one request at a time simultaneously. Returns the
+    pooled p50/p99 request latency and the aggregate throughput.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=_thread_bench_worker,
+            args=(backend_name, str(model_dir), texts, threads, "auto" if pin else "", i, barrier, results),
+        )
+        for i in range(workers)
+    ]
+    for p in processes:
+        p.start()
+    runs = []
+    while len(runs) < workers:
+        try:
+            runs.append(results.get(timeout=1))
+        except queue.Empty:
+            crashed = [p for p in processes if p.exitcode not in (None, 0)]
+            if crashed:
+                for p in processes:
+                    p.terminate()
+                raise RuntimeError(f"benchmark worker exited with code {crashed[0].exitcode}")
+    for p in processes:
+        p.join()
+
+    latencies = [lat for run, _, _ in runs for lat in run]
+    elapsed = max(end for _, _, end in runs) - min(start for _, start, _ in runs)
+    return {
+        "workers": workers,
+        "threads": threads,
+        "pinned": pin,
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p99_ms": percentile(latencies, 99) * 1000,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+    }
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.core.cache import caches
+
+
+# Files up to this size (config, tokenizer, manifest) are hashed by content; larger ones
+# (the weights) by size and modification time, so no request ever reads a whole model
+CONTENT_HASH_MAX_BYTES = 1024 * 1024
+
+
+def model_fingerprint(model_dir, backend_name: str) -> str:
+    """
+    Cheap version of the model files in `model_dir` plus the backend name.
+
+    Used as the model version in cache keys: replacing any weight/tokenizer/config file
+    (or switching e.g. torch -> torch_int8) changes it, so stale labels are never served.
+    Directories written by `manage.py train_sentiment` carry a manifest.json with a unique
+    version; that is used directly. Otherwise small files are hashed by content and the
+    weights by name, size and mtime, which stat() gives without reading them.
+    """
+    digest = hashlib.sha256(backend_name.encode())
+    version = _manifest_version(model_dir)
+    if version:
+        digest.update(b"manifest:" + version.encode())
+        return digest.hexdigest()[:16]
+    for path in sorted(p for p in Path(model_dir).iterdir() if p.is_file()):
+        stat = path.stat()
+        digest.update(path.name.encode() + b"\0")
+        if stat.st_size <= CONTENT_HASH_MAX_BYTES:
+            digest.update(path.read_bytes())
+        else:
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def _manifest_version(model_dir):
+    try:
+        manifest = json.loads((Path(model_dir) / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return manifest.get("version") if isinstance(manifest, dict) else None
+
+
+def lowercases_input(model_dir) -> bool:
+    """True when the model's tokenizer lowercases text itself (uncased models)."""
+    try:
+        config = json.loads((Path(model_dir) / "tokenizer_config.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return bool(config.get("do_lower_case"))
+
+
+class SentimentCache:
+    """
+    Two-tier cache of model labels, keyed by sha256(model version + normalized text).
+
+    - in-process LRU bounded to `max_entries`
+    - optional shared tier on a Django cache backend (`shared_alias`), so repeated
+      comments scored by one worker are hits for every other worker
+    Normalization only removes differences the tokenizer ignores anyway (whitespace, and
+    case for uncased models), so a hit always returns the label the model would give.
+    """
+
+    def __init__(self, *, version: str, lowercase: bool, max_entries: int = 10000, shared_alias: str = "", shared_timeout: int = 7 * 24 * 3600):
+        self.version = version
+        self.lowercase = lowercase
+        self.max_entries = max(1, int(max_entries))
+        self.shared_alias = shared_alias
+        self.shared_timeout = shared_timeout
+
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        normalized = " ".join(text.split())
+        if self.lowercase:
+            normalized = normalized.lower()
+        return "sentiment:" + hashlib.sha256(f"{self.version}\0{normalized}".encode()).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict:
+        found = {}
+        with self._lock:
+            for key in keys:
+                label = self._lru.get(key)
+                if label is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = label
+            self.hits += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.shared_alias:
+            shared = caches[self.shared_alias].get_many(missing)
+            if shared:
+                self._remember(shared)
+                found.update(shared)
+                with self._lock:
+                    self.shared_hits += len(shared)
+
+        with self._lock:
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, labels: dict):
+        self._remember(labels)
+        if self.shared_alias:
+            caches[self.shared_alias].set_many(labels, timeout=self.shared_timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "model_version": self.version,
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.hits + self.shared_hits) / lookups) if lookups else 0.0,
+            }
+
+    def _remember(self, labels: dict):
+        with self._lock:
+            for key, label in labels.items():
+                self._lru[key] = label
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
@@ -0,0 +1,161 @@
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models.FeedbackResponse import FeedbackResponse
+from .models.SentimentJob import SentimentJob
+from .sentiment_service import REJECTION_MESSAGES, predict_sentiment_many
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(response_ids) -> None:
+    """Queue FeedbackResponses for sentiment scoring. Already-queued responses are left alone."""
+    jobs = [SentimentJob(response_id=rid) for rid in dict.fromkeys(response_ids)]
+    if jobs:
+        SentimentJob.objects.bulk_create(jobs, ignore_conflicts=True)
+
+
+def claim_batch(limit: int) -> list[SentimentJob]:
+    """
+    Marks up to `limit` pending jobs as running and returns them with their responses.
+
+    Jobs left running for longer than SENTIMENT_JOB_LEASE_SECONDS (a worker died
+    mid-batch) are claimed again. Rows locked by another worker are skipped, so several
+    workers can poll the same table.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=getattr(settings, 'SENTIMENT_JOB_LEASE_SECONDS', 300))
+
+    with transaction.atomic():
+        ids = list(
+            SentimentJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=SentimentJob.Status.PENDING)
+                | Q(status=SentimentJob.Status.RUNNING, locked_at__lt=stale_before)
+            )
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        SentimentJob.objects.filter(id__in=ids).update(
+            status=SentimentJob.Status.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+
+    jobs = list(SentimentJob.objects.filter(id__in=ids).select_related('response').order_by('id'))
+    if len(jobs) < len(ids):
+        # Jobs whose response was deleted outside the ORM (there is no database FK)
+        SentimentJob.objects.filter(id__in=set(ids) - {job.id for job in jobs}).delete()
+    return jobs
+
+
+def score_responses(responses) -> dict:
+    """
+    Builds the `sentiment` JSON for each FeedbackResponse, scoring every comment of
+    every response in one predict_sentiment_many() call.
+
+    {
+      "overall": {"label": <majority label>, "score": <share of scored comments with it>} | None,
+      "by_question": [{"question_id", "question_code", "label"}, ...]
+    }
+    Comments rejected by the input filters get label None and the filter message as "reason"
+    and do not count towards "overall".
+    """
+    texts, owners = [], []
+    for response in responses:
+        for item in response.responses or []:
+            comment = (item.get('comment') or '') if isinstance(item, dict) else ''
+            if comment.strip():
+                texts.append(comment)
+                owners.append((response.id, item))
+
+    labels = predict_sentiment_many(texts) if texts else []
+
+    by_question = {response.id: [] for response in responses}
+    for (response_id, item), label in zip(owners, labels):
+        entry = {'question_id': item.get('question_id'), 'question_code': item.get('question_code')}
+        if label in REJECTION_MESSAGES:
+            entry.update(label=None, reason=label)
+        else:
+            entry['label'] = label
+        by_question[response_id].append(entry)
+
+    result = {}
+    for response_id, entries in by_question.items():
+        counts = Counter(e['label'] for e in entries if e['label'] is not None)
+        overall = None
+        if counts:
+            label, count = counts.most_common(1)[0]
+            overall = {'label': label, 'score': round(count / sum(counts.values()), 4)}
+        result[response_id] = {'overall': overall, 'by_question': entries}
+    return result
+
+
+def _save_scored(jobs, scored) -> None:
+    """Writes the scored sentiment back with one bulk_update and deletes the jobs."""
+    responses = [job.response for job in jobs]
+    for response in responses:
+        response.sentiment = scored[response.id]
+    with transaction.atomic():
+        FeedbackResponse.objects.bulk_update(responses, ['sentiment'])
+        SentimentJob.objects.filter(id__in=[job.id for job in jobs]).delete()
+
+
+def _release(jobs, exc) -> None:
+    """Puts jobs that raised back to pending, or to failed after SENTIMENT_JOB_MAX_ATTEMPTS tries."""
+    max_attempts = getattr(settings, 'SENTIMENT_JOB_MAX_ATTEMPTS', 3)
+    error = f"{type(exc).__name__}: {exc}"
+    ids = [job.id for job in jobs]
+    SentimentJob.objects.filter(id__in=ids, attempts__gte=max_attempts).update(
+        status=SentimentJob.Status.FAILED, locked_at=None, last_error=error,
+    )
+    SentimentJob.objects.filter(id__in=ids, attempts__lt=max_attempts).update(
+        status=SentimentJob.Status.PENDING, locked_at=None, last_error=error,
+    )
+
+
+def process_batch(limit: int) -> int:
+    """
+    Claims and scores one batch of jobs. Returns the number of jobs claimed.
+
+    On success the sentiment is written back with one bulk_update and the jobs are
+    deleted. If the batch raises, its jobs are scored one by one so a single bad
+    response cannot hold back the rest: only the jobs that raise again go back to
+    pending, or to failed after SENTIMENT_JOB_MAX_ATTEMPTS tries. The error is
+    re-raised when no job of the batch could be scored.
+    """
+    jobs = claim_batch(limit)
+    if not jobs:
+        return 0
+
+    try:
+        _save_scored(jobs, score_responses([job.response for job in jobs]))
+        return len(jobs)
+    except Exception as exc:
+        if len(jobs) == 1:
+            _release(jobs, exc)
+            raise
+        logger.warning("Sentiment batch of %d jobs failed (%s: %s), scoring them one by one",
+                       len(jobs), type(exc).__name__, exc)
+
+    failed, last_exc = 0, None
+    for job in jobs:
+        try:
+            _save_scored([job], score_responses([job.response]))
+        except Exception as exc:
+            _release([job], exc)
+            failed, last_exc = failed + 1, exc
+    if failed == len(jobs):
+        raise last_exc
+    if failed:
+        logger.warning("%d of %d sentiment jobs failed: %s: %s", failed, len(jobs), type(last_exc).__name__, last_exc)
+    return len(jobs)
@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import onnxruntime as ort
+from tokenizers import Tokenizer
+
+from .sentiment_backends import SentimentBackend
+
+# File written by `manage.py export_sentiment_onnx` next to the Hugging Face files
+ONNX_FILENAME = "model.onnx"
+
+
+class OnnxBackend(SentimentBackend):
+    """
+    ONNX Runtime CPU session over the exported model, tokenized with the `tokenizers`
+    library directly, so neither torch nor transformers is imported.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_dir):
+        super().__init__(model_dir)
+        self.tokenizer = None
+        self.session = None
+        self.pad_id = 0
+
+    def load(self):
+        config = json.loads((self.model_dir / "config.json").read_text(encoding="utf-8"))
+        tokenizer_config = json.loads((self.model_dir / "tokenizer_config.json").read_text(encoding="utf-8"))
+        self.id2label = dict(config.get("id2label") or {})
+        self.pad_id = int(config.get("pad_token_id") or 0)
+
+        # tokenizer.json carries the training-time fixed padding; match AutoTokenizer(truncation=True) instead
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length=int(tokenizer_config.get("model_max_length") or 512))
+
+        onnx_path = self.model_dir / ONNX_FILENAME
+        if not onnx_path.exists():
+            raise FileNotFoundError(f"{onnx_path} not found; run `python manage.py export_sentiment_onnx` first")
+        options = ort.SessionOptions()
+        if self.intra_op_threads:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads:
+            options.inter_op_num_threads = self.inter_op_threads
+        self.session = ort.InferenceSession(str(onnx_path), sess_options=options, providers=["CPUExecutionProvider"])
+
+    def encode(self, texts):
+        return [enc.ids for enc in self.tokenizer.encode_batch(list(texts))]
+
+    def forward(self, batch):
+        width = max(len(ids) for ids in batch)
+        input_ids = np.full((len(batch), width), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(batch), width), dtype=np.int64)
+        for row, ids in enumerate(batch):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        (logits,) = self.session.run(["logits"], {"input_ids": input_ids, "attention_mask": attention_mask})
+        return np.argmax(logits, axis=-1).tolist()
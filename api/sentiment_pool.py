@@ -0,0 +1,156 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+from django.conf import settings
+
+from . import sentiment_service
+from .sentiment_backends import create_backend
+from .sentiment_threads import apply_cpu_affinity
+
+logger = logging.getLogger(__name__)
+
+
+def parse_address(address: str):
+    """'host:port' -> (host, port) for a TCP socket; anything else is a Unix socket path."""
+    host, sep, port = address.rpartition(":")
+    if sep and host and port.isdigit():
+        return (host, int(port))
+    return address
+
+
+def pool_authkey() -> bytes:
+    """Shared secret for the pool's HMAC handshake (SENTIMENT_POOL_AUTHKEY, else SECRET_KEY)."""
+    return (getattr(settings, "SENTIMENT_POOL_AUTHKEY", "") or settings.SECRET_KEY).encode()
+
+
+class PoolClient:
+    """
+    Sends texts to a running inference pool and returns its labels.
+
+    One short-lived connection per call: whichever pool process is idle accepts it, so a
+    web worker never stays pinned to one inference process.
+    """
+
+    def __init__(self, address: str, authkey: bytes, timeout: float = 30.0):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.timeout = timeout
+
+    def predict(self, texts: list[str]) -> list[str]:
+        with Client(self.address, authkey=self.authkey) as conn:
+            conn.send(list(texts))
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"sentiment pool did not answer within {self.timeout}s")
+            status, payload = conn.recv()
+        if status != "ok":
+            raise RuntimeError(f"sentiment pool error: {payload}")
+        return payload
+
+
+class InferencePool:
+    """
+    N processes serving sentiment predictions over one local socket.
+
+    Fork-safe backends (CPU torch) are loaded once in the parent before the workers are
+    forked, so every worker maps the same weight pages copy-on-write instead of holding
+    its own copy. Other backends (ONNX Runtime, CUDA) are loaded by each worker after the
+    fork. Workers that die are replaced.
+    """
+
+    def __init__(self, address: str, authkey: bytes, workers: int = 2):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.workers = max(1, int(workers))
+        self.preloaded = False
+        self._processes: list = []
+        self._stopping = False
+
+    def serve_forever(self):
+        backend_name = sentiment_service._setting("SENTIMENT_BACKEND", "torch")
+        if create_backend(backend_name, sentiment_service.MODEL_DIR).fork_safe:
+            sentiment_service._load_model_once()
+            self.preloaded = True
+
+        self._remove_stale_socket()
+        listener = Listener(self.address, authkey=self.authkey, backlog=64)
+        ctx = multiprocessing.get_context("fork")
+
+        signal.signal(signal.SIGTERM, self._stop)
+        try:
+            self._processes = [self._spawn(ctx, listener, i) for i in range(self.workers)]
+            while not self._stopping:
+                for i, process in enumerate(self._processes):
+                    if not process.is_alive() and not self._stopping:
+                        logger.warning("Sentiment pool worker %s exited with %s; restarting", process.pid, process.exitcode)
+                        self._processes[i] = self._spawn(ctx, listener, i)
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for process in self._processes:
+                process.terminate()
+            for process in self._processes:
+                process.join(5)
+            listener.close()
+
+    def _stop(self, signum, frame):
+        self._stopping = True
+
+    def _spawn(self, ctx, listener, index):
+        process = ctx.Process(target=_worker_loop, args=(listener, index), daemon=True)
+        process.start()
+        return process
+
+    def _remove_stale_socket(self):
+        if not isinstance(self.address, str) or not os.path.exists(self.address):
+            return
+        probe = socket.socket(socket.AF_UNIX)
+        try:
+            probe.connect(self.address)
+        except ConnectionRefusedError:
+            os.unlink(self.address)  # left behind by a pool that did not shut down cleanly
+        else:
+            raise RuntimeError(f"another sentiment pool is already listening on {self.address}")
+        finally:
+            probe.close()
+
+
+def _worker_loop(listener, index):
+    # The parent handles Ctrl-C/SIGTERM and terminates the workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # SENTIMENT_CPU_AFFINITY=auto gives each pool worker its own block of cores
+    apply_cpu_affinity(
+        sentiment_service._setting("SENTIMENT_CPU_AFFINITY", ""),
+        worker_index=index,
+        threads=sentiment_service._setting("SENTIMENT_INTRA_OP_THREADS", 0),
+    )
+    sentiment_service._load_model_once()  # no-op when the parent preloaded
+
+    while True:
+        try:
+            conn = listener.accept()
+        except (AuthenticationError, EOFError, OSError) as exc:
+            logger.warning("Rejected sentiment pool connection: %s", exc)
+            continue
+        with conn:
+            try:
+                texts = conn.recv()
+            except (EOFError, OSError):
+                continue
+            try:
+                if not isinstance(texts, list) or any(not isinstance(t, str) for t in texts):
+                    raise TypeError("texts must be a list of strings")
+                reply = ("ok", sentiment_service._predict_labels(texts))
+            except Exception as exc:
+                logger.exception("Sentiment pool prediction failed")
+                reply = ("error", f"{type(exc).__name__}: {exc}")
+            try:
+                conn.send(reply)
+            except OSError:
+                pass
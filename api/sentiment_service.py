@@ -1,99 +1,411 @@
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from pathlib import Path
 from typing import Optional
-import re
+import os
+import threading
+import time
 
-import torch
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from django.conf import settings
 
+from .content_filter import CONTENT_FILTER, WORD_RE, ContentFlags
+from .sentiment_backends import SentimentBackend, create_backend
+from .sentiment_batcher import MicroBatcher
+from .sentiment_bench import current_rss_bytes
+from .sentiment_cache import SentimentCache, lowercases_input, model_fingerprint
+from .sentiment_threads import apply_cpu_affinity
 
-# Model directory (repo_root/sentiment_model_final)
-MODEL_DIR = Path(__file__).resolve().parent.parent / "sentiment_model_final"
 
-_tokenizer: Optional[AutoTokenizer] = None
-_model: Optional[AutoModelForSequenceClassification] = None
-_device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+# Model directory: SENTIMENT_MODEL_DIR, else repo_root/sentiment_model_final
+MODEL_DIR = Path(
+    (settings.configured and getattr(settings, "SENTIMENT_MODEL_DIR", ""))
+    or Path(__file__).resolve().parent.parent / "sentiment_model_final"
+)
+
+_backend: Optional[SentimentBackend] = None
+_backend_lock = threading.Lock()
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+_cache: Optional[SentimentCache] = None
+_cache_lock = threading.Lock()
+
+_pool_client = None
+
+# Progress of warm_up(), reported by readiness()
+_warmup = {"status": "cold", "load_seconds": None, "warmup_seconds": None, "error": None}
+_warmup_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+# start_warm_up() was called in this process or in the parent it was forked from
+_warmup_requested = False
+_fork_hooks_registered = False
+
+# Short, medium and long inputs so the first real requests hit already-seen batch shapes
+WARMUP_TEXTS = [
+    "Good class.",
+    "The lessons were clear and the activities helped me understand the topic.",
+    " ".join(["The instructor explained every module carefully and answered our questions."] * 6),
+]
+
+# Returned instead of a label for input rejected by the filters in _prefilter
+REJECT_UNREADABLE = "Sorry, I cannot understand this"
+REJECT_SEXUAL = "Sorry, sexual words are not permitted"
+REJECT_PROFANE = "Sorry, harsh words are not permitted"
+REJECTION_MESSAGES = frozenset({REJECT_UNREADABLE, REJECT_SEXUAL, REJECT_PROFANE})
+
+
+def _setting(name: str, default):
+    # predict_sentiment is also used from plain scripts (api/test_model.py) without Django settings
+    if not settings.configured:
+        return default
+    return getattr(settings, name, default)
 
 
 def _load_model_once():
-    global _tokenizer, _model
-    if _model is not None and _tokenizer is not None:
+    global _backend
+    if _backend is not None:
         return
 
-    # Load tokenizer and model from local folder (expects Hugging Face format)
-    _tokenizer = AutoTokenizer.from_pretrained(str(MODEL_DIR))
-    _model = AutoModelForSequenceClassification.from_pretrained(str(MODEL_DIR))
-    _model.to(_device)
-    _model.eval()
+    with _backend_lock:
+        if _backend is None:
+            backend = create_backend(_setting("SENTIMENT_BACKEND", "torch"), MODEL_DIR)
+            # Thread policy: by default every process would use one thread per core, which
+            # oversubscribes the CPU as soon as several workers score at once
+            backend.intra_op_threads = _setting("SENTIMENT_INTRA_OP_THREADS", 0)
+            backend.inter_op_threads = _setting("SENTIMENT_INTER_OP_THREADS", 0)
+            apply_cpu_affinity(_setting("SENTIMENT_CPU_AFFINITY", ""), threads=backend.intra_op_threads)
+            backend.load()
+            _backend = backend
+
+
+def warm_up(batches: int = 3) -> dict:
+    """Load the model and run `batches` dummy batches through it, recording timings for readiness().
+
+    With SENTIMENT_POOL_ADDRESS set nothing is loaded here; the dummy batches go to the pool,
+    which checks that it is reachable and warms its workers.
+    """
+    with _warmup_lock:
+        _warmup.update(status="warming", error=None)
+    try:
+        started = time.perf_counter()
+        if not _setting("SENTIMENT_POOL_ADDRESS", ""):
+            _load_model_once()
+            with _warmup_lock:
+                _warmup["load_seconds"] = round(time.perf_counter() - started, 3)
+
+        run_started = time.perf_counter()
+        for _ in range(max(1, int(batches))):
+            _infer(WARMUP_TEXTS)  # not through the cache, so every batch really runs the model
+        with _warmup_lock:
+            _warmup.update(status="ready", warmup_seconds=round(time.perf_counter() - run_started, 3))
+    except Exception as exc:
+        with _warmup_lock:
+            _warmup.update(status="failed", error=f"{type(exc).__name__}: {exc}")
+    return readiness()
+
+
+def start_warm_up() -> bool:
+    """Run warm_up() on a background thread (once per process). Returns False if already started."""
+    global _warmup_thread, _warmup_requested, _fork_hooks_registered
+    with _warmup_lock:
+        if _warmup_thread is not None:
+            return False
+        if not _setting("SENTIMENT_POOL_ADDRESS", ""):
+            # Import torch/transformers or onnxruntime here rather than on the thread, so the
+            # fork hooks below are registered after (and run before) theirs
+            try:
+                create_backend(_setting("SENTIMENT_BACKEND", "torch"), MODEL_DIR)
+            except Exception:
+                pass  # warm_up() hits the same error and reports it through readiness()
+        if not _fork_hooks_registered and hasattr(os, "register_at_fork"):
+            os.register_at_fork(before=_finish_warm_up_before_fork, after_in_child=_reset_after_fork)
+            _fork_hooks_registered = True
+        _warmup_requested = True
+        _warmup["status"] = "warming"
+        _warmup_thread = threading.Thread(
+            target=warm_up,
+            args=(_setting("SENTIMENT_WARMUP_BATCHES", 3),),
+            name="sentiment-warmup",
+            daemon=True,
+        )
+    _warmup_thread.start()
+    return True
+
+
+def start_warm_up_if_enabled() -> bool:
+    """
+    start_warm_up() when SENTIMENT_WARMUP_ENABLED is set. Called by the WSGI/ASGI entry
+    points, so only serving processes load the model, never `manage.py` commands.
+    """
+    if not _setting("SENTIMENT_WARMUP_ENABLED", False):
+        return False
+    return start_warm_up()
+
+
+def _finish_warm_up_before_fork():
+    """
+    Runs in the parent just before fork() (gunicorn --preload: the master imported the WSGI
+    module, which started warming up). A fork in the middle of warm-up would hand the child
+    half-imported modules and possibly held locks; waiting instead lets every worker inherit
+    the loaded model copy-on-write.
+    """
+    thread = _warmup_thread
+    if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+        thread.join()
+
+
+def _reset_after_fork():
+    """
+    Runs in the child right after fork(). The parent's threads do not exist here, so the
+    locks (including the label cache's and the batcher's, which a parent thread may have held
+    at the fork) are recreated and the warm-up thread forgotten. A model loaded before the
+    fork is kept when the backend is fork-safe; otherwise the child starts cold and
+    readiness() restarts warm-up in it.
+    """
+    global _backend, _backend_lock, _batcher_lock, _cache_lock, _warmup_lock, _warmup_thread
+    _backend_lock = threading.Lock()
+    _batcher_lock = threading.Lock()
+    _cache_lock = threading.Lock()
+    _warmup_lock = threading.Lock()
+    if _cache is not None:
+        _cache._lock = threading.Lock()
+    if _batcher is not None:
+        _batcher._lock = threading.Lock()
+    _warmup_thread = None
+    if _backend is not None and not _backend.fork_safe:
+        _backend = None
+    if _warmup["status"] != "ready" or (_backend is None and not _setting("SENTIMENT_POOL_ADDRESS", "")):
+        _warmup.update(status="cold", load_seconds=None, warmup_seconds=None, error=None)
+
+
+def readiness() -> dict:
+    """Warm-up status of this process: status (cold/warming/ready/failed, or disabled), timings and RSS."""
+    if _warmup_requested and _warmup["status"] == "cold":
+        # Forked from a process that had started warming up (see _reset_after_fork)
+        start_warm_up()
+    with _warmup_lock:
+        state = dict(_warmup)
+    if state["status"] == "cold" and not _setting("SENTIMENT_WARMUP_ENABLED", False):
+        # No warm-up configured: the model loads on first use, so there is nothing to wait for
+        state["status"] = "disabled"
+    state["ready"] = state["status"] in ("ready", "disabled")
+    state["backend"] = None if _setting("SENTIMENT_POOL_ADDRESS", "") else _setting("SENTIMENT_BACKEND", "torch")
+    state["model_loaded"] = _backend is not None
+    state["rss_bytes"] = current_rss_bytes()
+    return state
 
 
 def predict_sentiment(text: str) -> str:
     """Return a simple sentiment label for `text`.
 
-    Loads model/tokenizer once and reuses them on subsequent calls.
+    Loads model/tokenizer once and reuses them on subsequent calls. Texts that pass the
+    input filters are answered from the result cache when possible, otherwise scored through
+    the shared micro-batcher (SENTIMENT_BATCHING_ENABLED) so concurrent callers share one
+    forward pass.
     Returns one of: 'negative', 'neutral', 'positive' when possible, otherwise the raw label.
     """
     if not isinstance(text, str):
         raise TypeError("text must be a string")
 
-    # Basic input filtering to catch non-textual or disallowed inputs early.
-    # 1) Emojis or punctuation-only input -> not understandable
-    # 2) Sexual content -> reject
-    # 3) Harsh / profane words -> reject
+    rejection = _prefilter(text)
+    if rejection is not None:
+        return rejection
 
-    # Unicode emoji ranges (covers most emoji codepoints)
-    EMOJI_RE = re.compile("[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u26FF\u2700-\u27BF]+", flags=re.UNICODE)
+    return _predict_cached([text], _predict_queued)[0]
 
-    # Normalize whitespace
-    txt = text.strip()
 
-    # If input is empty after trimming
+def predict_sentiment_many(texts: list[str]) -> list[str]:
+    """Vectorized predict_sentiment(): one label (or filter message) per text, in input order.
+
+    The input filters run over the whole list first; only the texts that survive them
+    go to the model as one batch (padded per length bucket, see _predict_labels).
+    """
+    if not isinstance(texts, (list, tuple)):
+        raise TypeError("texts must be a list of strings")
+    if any(not isinstance(t, str) for t in texts):
+        raise TypeError("texts must be a list of strings")
+
+    flags = CONTENT_FILTER.scan_many(texts)
+    results: list[Optional[str]] = [_prefilter(t, f) for t, f in zip(texts, flags)]
+    pending = [i for i, r in enumerate(results) if r is None]
+    if pending:
+        labels = _predict_cached([texts[i] for i in pending], _infer)
+        for i, label in zip(pending, labels):
+            results[i] = label
+    return results
+
+
+def _prefilter(text: str, flags: Optional[ContentFlags] = None) -> Optional[str]:
+    """Returns the rejection message for `text`, or None when it should go to the model.
+
+    1) Sexual content -> reject
+    2) Harsh / profane words -> reject
+    3) Empty, emoji- or punctuation-only input -> not understandable
+    """
+    txt = text.strip()
     if not txt:
-        return "Sorry, I cannot understand this"
-
-    # If text contains sexual terms, reject with a specific message
-    sexual_words = [
-        'daddy', 'mommy', 'porn', 'sex', 'sexy', 'nude', 'nsfw', 'fuck', 'cum', 'orgasm', 'xxx'
-    ]
-    SEXUAL_RE = re.compile(r"\\b(" + r"|".join(re.escape(w) for w in sexual_words) + r")\\b", flags=re.IGNORECASE)
-    if SEXUAL_RE.search(txt):
-        return "Sorry, sexual words are not permitted"
-
-    # Harsh / profane words
-    profane_words = [
-        'fuck', 'shit', 'bitch', 'asshole', 'idiot', 'stupid', 'moron', 'bastard', 'dumb', 'crap'
-    ]
-    PROFANE_RE = re.compile(r"\\b(" + r"|".join(re.escape(w) for w in profane_words) + r")\\b", flags=re.IGNORECASE)
-    if PROFANE_RE.search(txt):
-        return "Sorry, harsh words are not permitted"
-
-    # Remove emojis and punctuation to see if there's any readable text left
-    without_emojis = EMOJI_RE.sub('', txt)
-    # Remove punctuation (keep word characters and whitespace)
-    cleaned = re.sub(r"[^\w\s]", '', without_emojis).strip()
-    if not cleaned:
-        # Input was only emojis/punctuation/symbols
-        return "Sorry, I cannot understand this"
-
-    _load_model_once()
-
-    # Tokenize and move tensors to device
-    inputs = _tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    inputs = {k: v.to(_device) for k, v in inputs.items()}
-
-    with torch.no_grad():
-        outputs = _model(**inputs)
-        logits = outputs.logits
-        pred_idx = int(torch.argmax(logits, dim=-1).cpu().item())
-
-    # Try to read a human-readable label from model config
+        return REJECT_UNREADABLE
+
+    if flags is None:
+        flags = CONTENT_FILTER.scan(txt)
+    if flags.sexual:
+        return REJECT_SEXUAL
+    if flags.profane:
+        return REJECT_PROFANE
+    # Emojis and punctuation are never word characters, so no \w means nothing readable is left
+    if not WORD_RE.search(txt):
+        return REJECT_UNREADABLE
+    return None
+
+
+def sentiment_cache_stats() -> Optional[dict]:
+    """Hit/miss counters of the result cache, or None when caching is disabled."""
+    cache = _get_cache()
+    return cache.stats() if cache is not None else None
+
+
+def _predict_cached(texts: list[str], predict) -> list[str]:
+    """Labels for `texts`, served from the result cache where possible.
+
+    Misses are de-duplicated by cache key and sent to `predict` in one call, then stored.
+    """
+    cache = _get_cache()
+    if cache is None:
+        return predict(texts)
+
+    keys = [cache.key(t) for t in texts]
+    found = cache.get_many(list(dict.fromkeys(keys)))
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found:
+            missing.setdefault(key, text)
+    if missing:
+        fresh = dict(zip(missing, predict(list(missing.values()))))
+        cache.set_many(fresh)
+        found.update(fresh)
+    return [found[key] for key in keys]
+
+
+def _get_cache() -> Optional[SentimentCache]:
+    global _cache
+    if not _setting("SENTIMENT_CACHE_ENABLED", True):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SentimentCache(
+                    version=model_fingerprint(MODEL_DIR, _setting("SENTIMENT_BACKEND", "torch")),
+                    lowercase=lowercases_input(MODEL_DIR),
+                    max_entries=_setting("SENTIMENT_CACHE_SIZE", 10000),
+                    shared_alias=_setting("SENTIMENT_CACHE_SHARED_ALIAS", ""),
+                    shared_timeout=_setting("SENTIMENT_CACHE_SHARED_TTL", 7 * 24 * 3600),
+                )
+    return _cache
+
+
+def _predict_queued(texts: list[str]) -> list[str]:
+    if _setting("SENTIMENT_BATCHING_ENABLED", True):
+        batcher = _get_batcher()
+        futures = [batcher.submit(t) for t in texts]
+        # Bounded wait: a stuck batch fails the request instead of holding its thread forever
+        deadline = time.monotonic() + _setting("SENTIMENT_BATCH_TIMEOUT", 30.0)
+        try:
+            return [f.result(timeout=max(0.0, deadline - time.monotonic())) for f in futures]
+        except FuturesTimeoutError:
+            for f in futures:
+                f.cancel()
+            raise TimeoutError("Sentiment model did not answer in time") from None
+    return _infer(texts)
+
+
+def _infer(texts: list[str]) -> list[str]:
+    """Labels from the inference pool when SENTIMENT_POOL_ADDRESS is set, otherwise from this process's model."""
+    if _setting("SENTIMENT_POOL_ADDRESS", ""):
+        return _get_pool_client().predict(texts)
+    return _predict_labels(texts)
+
+
+def _get_pool_client():
+    global _pool_client
+    if _pool_client is None:
+        from .sentiment_pool import PoolClient, pool_authkey
+        _pool_client = PoolClient(
+            _setting("SENTIMENT_POOL_ADDRESS", ""),
+            pool_authkey(),
+            timeout=_setting("SENTIMENT_POOL_TIMEOUT", 30.0),
+        )
+    return _pool_client
+
+
+def _get_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    _infer,
+                    max_batch_size=_setting("SENTIMENT_BATCH_SIZE", 16),
+                    max_wait_ms=_setting("SENTIMENT_BATCH_MAX_WAIT_MS", 10),
+                )
+    return _batcher
+
+
+def _predict_labels(texts: list[str], backend: Optional[SentimentBackend] = None) -> list[str]:
+    """Return a label per text, running the model over length buckets.
+
+    Texts are tokenized without padding, sorted by token length and split into buckets
+    (see _length_buckets); each bucket is padded only to its own longest item, so one
+    long comment does not make every short one in the batch pay for its length.
+    Labels are returned in the original order. Uses the configured backend unless
+    another loaded `backend` is given (benchmarks compare several side by side).
+    """
+    if backend is None:
+        _load_model_once()
+        backend = _backend
+    if not texts:
+        return []
+
+    input_ids = backend.encode(texts)
+    buckets = _length_buckets(
+        [len(ids) for ids in input_ids],
+        max_items=_setting("SENTIMENT_BUCKET_MAX_ITEMS", 32),
+        max_tokens=_setting("SENTIMENT_BUCKET_MAX_TOKENS", 4096),
+    )
+
+    labels: list[Optional[str]] = [None] * len(texts)
+    for bucket in buckets:
+        pred_idxs = backend.forward([input_ids[i] for i in bucket])
+        for i, idx in zip(bucket, pred_idxs):
+            labels[i] = _label_for_index(int(idx), backend.id2label)
+    return labels
+
+
+def _length_buckets(lengths: list[int], *, max_items: int = 32, max_tokens: int = 4096) -> list[list[int]]:
+    """Group item indices into buckets of similar length.
+
+    Indices are sorted by length; a bucket is closed once it holds `max_items` items or
+    adding the next (longer) item would push its padded size (items x longest) above
+    `max_tokens`. An item longer than `max_tokens` on its own gets its own bucket.
+    """
+    max_items = max(1, int(max_items))
+    buckets: list[list[int]] = []
+    current: list[int] = []
+    for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        if current and (len(current) >= max_items or (len(current) + 1) * lengths[i] > max_tokens):
+            buckets.append(current)
+            current = []
+        current.append(i)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def _label_for_index(pred_idx: int, id2label: Optional[dict] = None) -> str:
+    # Try to read a human-readable label from model config (keys may be ints or strings)
     label_name = None
-    try:
-        id2label = getattr(_model.config, "id2label", None)
-        if id2label is not None:
-            # id2label keys may be ints or strings
-            label_name = id2label.get(pred_idx) or id2label.get(str(pred_idx))
-    except Exception:
-        label_name = None
+    if id2label:
+        label_name = id2label.get(pred_idx) or id2label.get(str(pred_idx))
 
     # Friendly mapping used in training: 0=negative,1=neutral,2=positive
     if label_name in ("LABEL_0", "0") or pred_idx == 0:
@@ -0,0 +1,59 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cpu_list(spec: str) -> list[int]:
+    """'0-3,8,10-11' -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return sorted(set(cpus))
+
+
+def cpus_for_worker(spec: str, worker_index=None, threads: int = 0) -> list[int]:
+    """
+    CPU set for one inference process according to SENTIMENT_CPU_AFFINITY `spec`:
+
+    - "" -> [] (no pinning)
+    - "auto" -> worker `worker_index` gets its own block of `threads` cores (wrapping around
+      when there are more workers than blocks); [] when the process has no worker index
+    - "0-3,8" -> exactly those cores
+    """
+    spec = (spec or "").strip().lower()
+    if not spec:
+        return []
+    if spec != "auto":
+        return parse_cpu_list(spec)
+    if worker_index is None:
+        return []
+
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    size = max(1, min(int(threads or 1), len(available)))
+    blocks = len(available) // size
+    start = (int(worker_index) % blocks) * size
+    return available[start:start + size]
+
+
+def apply_cpu_affinity(spec: str, worker_index=None, threads: int = 0) -> list[int]:
+    """Pins the current process per cpus_for_worker(); returns the CPUs used ([] = unchanged)."""
+    cpus = cpus_for_worker(spec, worker_index, threads)
+    if not cpus:
+        return []
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("SENTIMENT_CPU_AFFINITY=%s ignored: CPU affinity is not supported on this platform", spec)
+        return []
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError as exc:
+        logger.warning("Could not pin sentiment worker to CPUs %s: %s", cpus, exc)
+        return []
+    return cpus
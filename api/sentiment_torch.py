@@ -0,0 +1,77 @@
+import logging
+
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from .sentiment_backends import SentimentBackend
+
+logger = logging.getLogger(__name__)
+
+
+class TorchBackend(SentimentBackend):
+    """Full-precision Hugging Face model running on CUDA when available, otherwise CPU."""
+
+    name = "torch"
+
+    def __init__(self, model_dir):
+        super().__init__(model_dir)
+        self.tokenizer = None
+        self.model = None
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # CUDA contexts do not survive fork(); CPU tensors are plain memory
+        self.fork_safe = self.device.type == "cpu"
+
+    def load(self):
+        self._apply_threads()
+        # Load tokenizer and model from local folder (expects Hugging Face format)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_dir))
+        self.model = self._prepare(AutoModelForSequenceClassification.from_pretrained(str(self.model_dir)))
+        self.model.eval()
+        # id2label keys may be ints or strings
+        self.id2label = dict(getattr(self.model.config, "id2label", None) or {})
+
+    def _apply_threads(self):
+        # Both settings are process-wide in torch
+        if self.intra_op_threads:
+            torch.set_num_threads(self.intra_op_threads)
+        if self.inter_op_threads:
+            try:
+                torch.set_num_interop_threads(self.inter_op_threads)
+            except RuntimeError as exc:
+                # Only allowed once, before any inter-op parallel work has started
+                logger.warning("Could not set torch inter-op threads to %s: %s", self.inter_op_threads, exc)
+
+    def _prepare(self, model):
+        return model.to(self.device)
+
+    def encode(self, texts):
+        return self.tokenizer(list(texts), truncation=True)["input_ids"]
+
+    def forward(self, batch):
+        # Pad to the longest row of this batch only and move tensors to device
+        inputs = self.tokenizer.pad({"input_ids": batch}, return_tensors="pt")
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+
+        with torch.no_grad():
+            logits = self.model(**inputs).logits
+            return torch.argmax(logits, dim=-1).cpu().tolist()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """
+    CPU-only copy of the model with every nn.Linear dynamically quantized to int8.
+
+    Weights are stored as int8 and activations are quantized on the fly, which cuts the
+    Linear layers' memory roughly 4x and speeds up CPU inference; labels should match the
+    fp32 model closely (check with `manage.py compare_sentiment_backends`).
+    """
+
+    name = "torch_int8"
+
+    def __init__(self, model_dir):
+        super().__init__(model_dir)
+        self.device = torch.device("cpu")
+        self.fork_safe = True
+
+    def _prepare(self, model):
+        return torch.ao.quantization.quantize_dynamic(model.to(self.device), {torch.nn.Linear}, dtype=torch.qint8)
@@ -0,0 +1,239 @@
+import copy
+import csv
+import hashlib
+import json
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .sentiment_bench import classification_report
+
+# Class order used by the deployed model (see _label_for_index in sentiment_service)
+LABELS = ("negative", "neutral", "positive")
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_dataset(path):
+    """Streams (text, label index) pairs from a `text,label` CSV; unknown labels and empty texts are skipped."""
+    index = {label: i for i, label in enumerate(LABELS)}
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        for row in csv.DictReader(fh):
+            text = (row.get("text") or "").strip()
+            label = index.get((row.get("label") or "").strip().lower())
+            if text and label is not None:
+                yield text, label
+
+
+def is_validation(text: str, val_fraction: float, seed: int) -> bool:
+    """Deterministic split on a hash of the text: the same row lands on the same side in every run."""
+    bucket = int.from_bytes(hashlib.sha256(f"{seed}\0{text}".encode()).digest()[:8], "big") / 2 ** 64
+    return bucket < val_fraction
+
+
+def tokenize_dataset(tokenizer, dataset, *, max_length, val_fraction, seed, cache_dir, cache_key, chunk_size=1000, log=print):
+    """
+    Preprocessing stage: {"train"/"val": {"input_ids": [...], "labels": [...]}}.
+
+    Rows are streamed and tokenized `chunk_size` at a time (truncated, not padded; batches
+    are padded later to their own longest row). The result is stored under `cache_dir`
+    keyed by `cache_key`, so reruns on the same data and tokenizer skip this stage.
+    """
+    cache_file = Path(cache_dir) / f"{cache_key}.json"
+    if cache_file.exists():
+        log(f"Using cached tokenization {cache_file}")
+        return json.loads(cache_file.read_text(encoding="utf-8"))
+
+    splits = {"train": {"input_ids": [], "labels": []}, "val": {"input_ids": [], "labels": []}}
+
+    def flush(rows):
+        ids = tokenizer([text for text, _ in rows], truncation=True, max_length=max_length)["input_ids"]
+        for (text, label), row_ids in zip(rows, ids):
+            split = splits["val" if is_validation(text, val_fraction, seed) else "train"]
+            split["input_ids"].append(row_ids)
+            split["labels"].append(label)
+
+    pending = []
+    for row in iter_dataset(dataset):
+        pending.append(row)
+        if len(pending) >= chunk_size:
+            flush(pending)
+            pending = []
+    if pending:
+        flush(pending)
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps(splits), encoding="utf-8")
+    log(f"Tokenized {len(splits['train']['labels'])} train / {len(splits['val']['labels'])} val rows -> {cache_file}")
+    return splits
+
+
+def _batches(split, batch_size, order):
+    for start in range(0, len(order), batch_size):
+        rows = order[start:start + batch_size]
+        yield [split["input_ids"][i] for i in rows], [split["labels"][i] for i in rows]
+
+
+def _weighted_f1(report: dict) -> float:
+    total = sum(c["support"] for c in report["per_class"].values())
+    return sum(c["f1"] * c["support"] for c in report["per_class"].values()) / total if total else 0.0
+
+
+def evaluate(model, tokenizer, split, batch_size, device) -> dict:
+    import torch
+
+    model.eval()
+    predicted = []
+    with torch.no_grad():
+        for ids, _ in _batches(split, batch_size, list(range(len(split["labels"])))):
+            inputs = tokenizer.pad({"input_ids": ids}, return_tensors="pt").to(device)
+            predicted.extend(model(**inputs).logits.argmax(dim=-1).tolist())
+    report = classification_report([LABELS[i] for i in split["labels"]], [LABELS[i] for i in predicted])
+    report["weighted_f1"] = _weighted_f1(report)
+    return report
+
+
+def train_sentiment_model(
+    *,
+    dataset,
+    output_root,
+    base_model="distilbert-base-uncased-finetuned-sst-2-english",
+    tokenizer_name="distilbert-base-uncased",
+    epochs=15,
+    batch_size=8,
+    grad_accum=1,
+    learning_rate=1e-5,
+    weight_decay=0.1,
+    patience=3,
+    val_fraction=0.2,
+    max_length=128,
+    seed=42,
+    cache_dir=None,
+    device="cpu",
+    log=print,
+) -> Path:
+    """
+    Fine-tunes `base_model` on `dataset` (the train_sentiment.ipynb recipe) and writes a new
+    versioned model directory under `output_root` with a manifest.json holding the data
+    hash, parameters and validation metrics. Returns the directory.
+
+    Differences from the notebook: a deterministic hash split instead of an unseeded random
+    one, dynamic padding instead of padding to `max_length`, gradient accumulation, and
+    early stopping after `patience` epochs without a better weighted F1 (the best epoch's
+    weights are kept).
+    """
+    import torch
+    import transformers
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    random.seed(seed)
+    torch.manual_seed(seed)
+    device = torch.device(device)
+
+    data_sha = file_sha256(dataset)
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    cache_key = hashlib.sha256(
+        json.dumps([data_sha, tokenizer_name, len(tokenizer), max_length, val_fraction, seed]).encode()
+    ).hexdigest()[:16]
+    splits = tokenize_dataset(
+        tokenizer, dataset,
+        max_length=max_length, val_fraction=val_fraction, seed=seed,
+        cache_dir=cache_dir or Path(output_root) / ".cache", cache_key=cache_key, log=log,
+    )
+    train, val = splits["train"], splits["val"]
+    if not train["labels"] or not val["labels"]:
+        raise ValueError("Both the training and validation split need at least one row; check the dataset / val_fraction")
+
+    model = AutoModelForSequenceClassification.from_pretrained(
+        base_model,
+        num_labels=len(LABELS),
+        id2label={i: f"LABEL_{i}" for i in range(len(LABELS))},
+        label2id={f"LABEL_{i}": i for i in range(len(LABELS))},
+        ignore_mismatched_sizes=True,
+    ).to(device)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=learning_rate, weight_decay=weight_decay)
+
+    history = []
+    best = None
+    epochs_without_improvement = 0
+    started = time.perf_counter()
+    for epoch in range(1, epochs + 1):
+        model.train()
+        order = list(range(len(train["labels"])))
+        random.shuffle(order)
+        total_loss, steps = 0.0, 0
+        optimizer.zero_grad()
+        for step, (ids, labels) in enumerate(_batches(train, batch_size, order), start=1):
+            inputs = tokenizer.pad({"input_ids": ids}, return_tensors="pt").to(device)
+            loss = model(**inputs, labels=torch.tensor(labels, device=device)).loss
+            (loss / grad_accum).backward()
+            total_loss += loss.item()
+            steps += 1
+            if step % grad_accum == 0:
+                optimizer.step()
+                optimizer.zero_grad()
+        if steps % grad_accum:
+            optimizer.step()  # leftover micro-batches of the last accumulation window
+            optimizer.zero_grad()
+
+        report = evaluate(model, tokenizer, val, batch_size, device)
+        history.append({
+            "epoch": epoch,
+            "train_loss": total_loss / max(1, steps),
+            "val_accuracy": report["accuracy"],
+            "val_weighted_f1": report["weighted_f1"],
+        })
+        log(f"epoch {epoch}: loss {history[-1]['train_loss']:.4f}, val acc {report['accuracy']:.3f}, "
+            f"val weighted F1 {report['weighted_f1']:.3f}")
+
+        if best is None or report["weighted_f1"] > best["report"]["weighted_f1"]:
+            best = {"epoch": epoch, "report": report, "state": copy.deepcopy(model.state_dict())}
+            epochs_without_improvement = 0
+        else:
+            epochs_without_improvement += 1
+            if epochs_without_improvement >= patience:
+                log(f"Early stopping: no improvement for {patience} epochs")
+                break
+
+    model.load_state_dict(best["state"])
+
+    version = f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}-{data_sha[:8]}"
+    out_dir = Path(output_root) / version
+    out_dir.mkdir(parents=True, exist_ok=False)
+    model.save_pretrained(out_dir)
+    tokenizer.save_pretrained(out_dir)
+
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "base_model": base_model,
+        "tokenizer": tokenizer_name,
+        "labels": list(LABELS),
+        "data": {
+            "path": str(dataset),
+            "sha256": data_sha,
+            "train_rows": len(train["labels"]),
+            "val_rows": len(val["labels"]),
+        },
+        "params": {
+            "epochs": epochs, "batch_size": batch_size, "grad_accum": grad_accum,
+            "learning_rate": learning_rate, "weight_decay": weight_decay, "patience": patience,
+            "val_fraction": val_fraction, "max_length": max_length, "seed": seed, "device": str(device),
+        },
+        "versions": {"torch": torch.__version__, "transformers": transformers.__version__},
+        "training_seconds": round(time.perf_counter() - started, 1),
+        "best_epoch": best["epoch"],
+        "metrics": best["report"],
+        "history": history,
+    }
+    (out_dir / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return out_dir
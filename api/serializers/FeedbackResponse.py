@@ -1,20 +1,13 @@
 from rest_framework import serializers
-from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
+from django.db import transaction
 from ..models.FeedbackResponse import FeedbackResponse
 from ..models.EvaluationQuestion import EvaluationQuestion
-from ..models.ModuleEvaluationForm import ModuleEvaluationForm
-from ..models.InstructorEvaluationForm import InstructorEvaluationForm
-from ..models.EvaluationForm import EvaluationForm
 from ..utils import sanitize_text
-import re
-
-ANGLE_RE = re.compile(r"[<>]")
-
-try:
-    EMOJI_RE = re.compile(r"[\p{Extended_Pictographic}]", re.UNICODE)
-except re.error:
-    # Fallback: broad emoji blocks
-    EMOJI_RE = re.compile(r"[\U0001F300-\U0001FAFF\u2600-\u27BF]")
+from ..content_filter import CONTENT_FILTER
+from ..form_schema import get_form_schema, lookup_questions
+from ..feedback_forms import FORM_MODELS, resolve_form
+from ..sentiment_jobs import enqueue
 
 class FeedbackResponseItemSerializer(serializers.Serializer):
     question = serializers.CharField()
@@ -23,11 +16,12 @@ class FeedbackResponseItemSerializer(serializers.Serializer):
 
     def validate_comment(self, value):
         value = sanitize_text(value)
+        flags = CONTENT_FILTER.scan(value) if value else None
 
-        if value and ANGLE_RE.search(value):
+        if flags and flags.angle:
             raise serializers.ValidationError('Comment must not contain "<" or ">".')
 
-        if value and EMOJI_RE.search(value):
+        if flags and flags.emoji:
             raise serializers.ValidationError('Emojis are not allowed.')
 
         return value
@@ -55,54 +49,43 @@ class FeedbackResponseSerializer(serializers.ModelSerializer):
     def validate_pseudonym(self, value):
         return sanitize_text(value)
     
-    def _extract_allowed_question_codes_from_form(self, form_obj, form_type):
-        ef_type = 'Module' if form_type == 'module' else 'Instructor'
-        
-        title = None
-        if form_type == 'module':
-            title = getattr(form_obj, 'subject_code', None) or str(form_obj)
-        else:
-            title = getattr(form_obj, 'instructor_name', None) or str(form_obj)
-        title = str(title).strip()
-        
-        ef = EvaluationForm.objects.filter(form_type=ef_type, title__iexact=title).first()
-        if not ef or not isinstance(ef.questions, list):
-            return set()
-
-        allowed = set()
-        for section in ef.questions:
-            if not isinstance(section, dict):
-                continue
-            qs = section.get('questions', [])
-            if not isinstance(qs, list):
-                continue
-            for q in qs:
-                if isinstance(q, dict) and q.get('id'):
-                    allowed.add(str(q['id']).strip())
-        return allowed
-
-    def _find_question(self, identifier):
-        if str(identifier).isdigit():
-            q = EvaluationQuestion.objects.filter(pk=int(identifier)).first()
-            if q:
-                return q
-        if hasattr(EvaluationQuestion, 'code'):
-            q = EvaluationQuestion.objects.filter(code=identifier).first()
-            if q:
-                return q
-        return None
-    
+    def _resolve_form(self):
+        """
+        Target form of this submission, resolved once: the view passes it in the context as
+        'resolved_form'; otherwise it is looked up from form_type/form_id on first use.
+        """
+        if not hasattr(self, '_resolved_form'):
+            form_type = str(self.initial_data.get('form_type') or '').strip().lower()
+            form_id = self.initial_data.get('form_id')
+            resolved = self.context.get('resolved_form')
+            if not (resolved and resolved.matches(form_type, form_id)):
+                resolved = resolve_form(form_type, form_id)
+            self._resolved_form = resolved
+        return self._resolved_form
+
+    def _memo(self, key, compute):
+        # Bulk submissions share one 'schema_memo' dict across their serializers,
+        # so each form's schema is looked up once per request rather than once per item
+        memo = self.context.get('schema_memo')
+        if memo is None:
+            return compute()
+        if key not in memo:
+            memo[key] = compute()
+        return memo[key]
+
     def validate_responses(self, value):
         if not isinstance(value, list) or not value:
             raise serializers.ValidationError('responses must be a non-empty list')
         
-        # If validate() already resolved the form, use its question set for validation
-        form_type = (self.initial_data.get('form_type') or '').strip().lower()
-        form_obj = getattr(self, '_resolved_form_obj', None)
-        allowed_codes = set()
-        if form_obj and form_type in ('module', 'instructor'):
-            allowed_codes = self._extract_allowed_question_codes_from_form(form_obj, form_type)
-        
+        # Validate against the target form's compiled question set
+        resolved = self._resolve_form()
+        schema = self._memo(('form', resolved.form_type, resolved.obj.pk),
+                            lambda: get_form_schema(resolved.form_type, resolved.title)) if resolved else None
+        if not schema:
+            # No question set for this form: every question must exist in the question bank
+            idents = frozenset(str(item.get('question') or '').strip() for item in value)
+            schema = self._memo(('bank', idents), lambda: lookup_questions(idents))
+
         seen = set()
         normalized = []
         for item in value:
@@ -113,26 +96,15 @@ class FeedbackResponseSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(f"duplicate question '{q_ident}'")
             seen.add(q_ident)
 
-            if allowed_codes:
-                if str(q_ident).strip() not in allowed_codes:
-                    raise serializers.ValidationError(f"unknown question '{q_ident}'")
-                # Still try to resolve to EvaluationQuestion for storage (optional)
-                q = self._find_question(q_ident)
-            else:
-                q = self._find_question(q_ident)
-
-            if not allowed_codes and not q:
+            q = schema.get(str(q_ident).strip())
+            if not q:
                 raise serializers.ValidationError(f"unknown question '{q_ident}'")
             rating = item.get('rating')
             comment = item.get('comment')
 
             comment = sanitize_text(comment) if comment is not None else comment
 
-            q_type = None
-            if q:
-                q_type = getattr(q, 'type', None) or getattr(q, 'question_type', None)
-
-            if q_type and str(q_type).lower() in ('scale','rating','number') and rating is None:
+            if q['required'] and rating is None:
                 raise serializers.ValidationError(f"question '{q_ident}' requires a rating")
             if rating is not None:
                 try:
@@ -142,8 +114,8 @@ class FeedbackResponseSerializer(serializers.ModelSerializer):
                 except Exception:
                     raise serializers.ValidationError("rating must be integer between 1 and 5")
             normalized.append({
-                'question_id': q.id if q else None,
-                'question_code': getattr(q, 'code', None) if q else str(q_ident).strip(),
+                'question_id': q['id'],
+                'question_code': q['code'],
                 'rating': rating,
                 'comment': comment,
             })
@@ -158,16 +130,13 @@ class FeedbackResponseSerializer(serializers.ModelSerializer):
         else:
             raw_responses = getattr(instance, 'responses', None) or []
 
-        for r in (raw_responses or []):
-            q_text = None
-            try:
-                qid = r.get('question_id')
-                if qid:
-                    q = EvaluationQuestion.objects.get(pk=qid)
-                    q_text = getattr(q, 'question_text', None)
-            except Exception:
-                q_text = None
+        raw_responses = [r for r in (raw_responses or []) if isinstance(r, dict)]
+        # One query for every question text of this response
+        qids = {r.get('question_id') for r in raw_responses if r.get('question_id')}
+        texts = dict(EvaluationQuestion.objects.filter(pk__in=qids).values_list('id', 'question_text')) if qids else {}
 
+        for r in raw_responses:
+            q_text = texts.get(r.get('question_id'))
             if not q_text:
                 q_text = r.get('question_code') or r.get('question_id')
 
@@ -192,51 +161,38 @@ class FeedbackResponseSerializer(serializers.ModelSerializer):
         if not form_type or form_id in (None, ''):
             raise serializers.ValidationError("form_type and form_id are required")
 
-        model = ModuleEvaluationForm if form_type == 'module' else InstructorEvaluationForm if form_type == 'instructor' else None
-        if not model:
+        if form_type not in FORM_MODELS:
             raise serializers.ValidationError({'form_type': 'invalid value'})
 
-        obj = None
-        # try numeric PK first
-        try:
-            fid = int(str(form_id))
-            obj = model.objects.filter(pk=fid).first()
-        except (ValueError, TypeError):
-            pass
-
-        # fallback to code/name identifier
-        if not obj:
-            ident = str(form_id).strip()
-            if model is ModuleEvaluationForm:
-                obj = ModuleEvaluationForm.objects.filter(subject_code__iexact=ident).first()
-            else:
-                obj = InstructorEvaluationForm.objects.filter(instructor_name__iexact=ident).first()
-
-        if not obj:
+        resolved = self._resolve_form()
+        if not resolved:
             raise serializers.ValidationError({'form_id': 'form not found'})
 
-        # store resolved form object for validate_responses()
-        self._resolved_form_obj = obj
-
         # block submissions when form is not Active (fixes "can still evaluate draft/closed")
-        status = getattr(obj, 'status', None)
+        status = resolved.status
         if str(status).lower() != 'active':
             raise serializers.ValidationError({'form_id': f'form not available (status: {status})'})
 
-        attrs['form_content_type'] = ContentType.objects.get_for_model(model)
-        attrs['form_object_id'] = obj.id
+        attrs['form_content_type'] = resolved.content_type
+        attrs['form_object_id'] = resolved.obj.id
         return attrs
 
-    def create(self, validated_data):
-        # Sentiment analysis is handled externally
+    def build_instance(self, **extra):
+        """Unsaved FeedbackResponse for the validated data (used directly by the bulk endpoint)."""
+        validated_data = {**self.validated_data, **extra}
         validated_data.pop('form_type', None)
         validated_data.pop('form_id', None)
-
-        student = validated_data.pop('student', None)
-        ip = validated_data.pop('ip_address', None)
-        responses = validated_data.pop('responses', [])
-        validated_data['responses'] = responses
+        validated_data.setdefault('responses', [])
         validated_data['sentiment'] = None
-        return FeedbackResponse.objects.create(student=student, ip_address=ip, **validated_data)
+        return FeedbackResponse(**validated_data)
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            instance = self.build_instance(**validated_data)
+            instance.save(force_insert=True)
+            # Scored later by `manage.py run_sentiment_worker`, never on the request path
+            if getattr(settings, 'SENTIMENT_JOBS_ENABLED', True):
+                enqueue([instance.id])
+        return instance
 
     # ...keep validate_responses, sentiment logic, create and to_representation...
\ No newline at end of file
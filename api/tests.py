@@ -1,3 +1,1125 @@
-from django.test import TestCase
+import importlib.util
+import json
+import multiprocessing
+import random
+import re
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from multiprocessing.connection import AuthenticationError, Listener
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import bleach
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import feedback_ingest, sentiment_jobs, sentiment_service
+from .content_filter import CONTENT_FILTER, ContentFlags
+from .form_schema import get_form_schema
+from .middleware import SQLInjectionProtectionMiddleware
+from .models.BufferedFeedback import BufferedFeedback
+from .models.EvaluationForm import EvaluationForm
+from .models.EvaluationQuestion import EvaluationQuestion
+from .models.FeedbackResponse import FeedbackResponse
+from .models.ModuleEvaluationForm import ModuleEvaluationForm
+from .models.SentimentJob import SentimentJob
+from .models.Student import Student
+from .sentiment_backends import create_backend
+from .sentiment_batcher import MicroBatcher
+from .sentiment_bench import load_dataset
+from .sentiment_cache import CONTENT_HASH_MAX_BYTES, SentimentCache, model_fingerprint
+from .sentiment_pool import PoolClient, _worker_loop
+from .sentiment_threads import cpus_for_worker, parse_cpu_list
+from .sentiment_training import LABELS, MANIFEST_FILENAME, file_sha256, train_sentiment_model
+from .utils import sanitize_text, validate_plain_text
+
+
+def _onnx_parity_available():
+    model_dir = sentiment_service.MODEL_DIR
+    return (
+        _backend_libraries_available()
+        and (model_dir / "model.onnx").exists()
+        and any(model_dir.glob("*.safetensors"))
+    )
+
+
+def _backend_libraries_available():
+    return all(importlib.util.find_spec(name) is not None for name in ("onnxruntime", "torch", "transformers"))
+
+
+def build_fixture_model(model_dir, texts):
+    """
+    Writes a tiny randomly initialised DistilBERT classifier (WordPiece vocabulary trained
+    on `texts`) plus its ONNX export to `model_dir`, in the layout of sentiment_model_final/.
+    """
+    import torch
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors, trainers
+    from transformers import DistilBertConfig, DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+    tokenizer = Tokenizer(models.WordPiece(unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.train_from_iterator(texts, trainers.WordPieceTrainer(
+        vocab_size=300, special_tokens=["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"],
+    ))
+    tokenizer.post_processor = processors.BertProcessing(
+        ("[SEP]", tokenizer.token_to_id("[SEP]")), ("[CLS]", tokenizer.token_to_id("[CLS]")),
+    )
+    # A short model_max_length so that truncation is exercised too
+    DistilBertTokenizerFast(tokenizer_object=tokenizer, model_max_length=24).save_pretrained(model_dir)
+
+    torch.manual_seed(0)
+    config = DistilBertConfig(
+        vocab_size=tokenizer.get_vocab_size(), dim=32, hidden_dim=64, n_layers=2, n_heads=2,
+        max_position_embeddings=64, num_labels=3, pad_token_id=0,
+        # wide initialisation so the random model predicts all three labels
+        initializer_range=0.5,
+    )
+    DistilBertForSequenceClassification(config).save_pretrained(model_dir)
+    call_command("export_sentiment_onnx", model_dir=str(model_dir), stdout=StringIO())
+
+
+class BackendParityMixin:
+    """ONNX tokenization and labels match torch on the bundled dataset for `model_dir`."""
+
+    model_dir = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.texts = [text for text, _ in load_dataset()]
+        cls.torch_backend = create_backend("torch", cls.model_dir)
+        cls.torch_backend.load()
+        cls.onnx_backend = create_backend("onnx", cls.model_dir)
+        cls.onnx_backend.load()
+
+    def test_tokenization_matches(self):
+        self.assertEqual(self.onnx_backend.encode(self.texts), self.torch_backend.encode(self.texts))
+
+    def test_labels_match_on_dataset(self):
+        torch_labels = sentiment_service._predict_labels(self.texts, self.torch_backend)
+        onnx_labels = sentiment_service._predict_labels(self.texts, self.onnx_backend)
+        self.assertEqual(onnx_labels, torch_labels)
+
+
+@skipUnless(_onnx_parity_available(), "needs torch, onnxruntime, model weights and an exported model.onnx")
+class SentimentBackendParityTests(BackendParityMixin, SimpleTestCase):
+    model_dir = sentiment_service.MODEL_DIR
+
+
+@skipUnless(_backend_libraries_available(), "needs torch, transformers and onnxruntime")
+class FixtureModelBackendParityTests(BackendParityMixin, SimpleTestCase):
+    """Same checks against a tiny random model, so they run without the real weights."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.model_dir = Path(cls._tmp.name)
+        build_fixture_model(cls.model_dir, [text for text, _ in load_dataset()])
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._tmp.cleanup()
+
+    def test_fixture_covers_every_label(self):
+        labels = sentiment_service._predict_labels(self.texts, self.torch_backend)
+        self.assertEqual(set(labels), {"negative", "neutral", "positive"})
+        # Some texts are longer than model_max_length and must be truncated identically
+        self.assertTrue(any(len(ids) == 24 for ids in self.torch_backend.encode(self.texts)))
+
+    def test_int8_backend_quantizes_and_mostly_agrees(self):
+        import torch
+
+        int8 = create_backend("torch_int8", self.model_dir)
+        int8.load()
+        self.assertEqual((int8.name, int8.device.type, int8.fork_safe), ("torch_int8", "cpu", True))
+        self.assertFalse(any(type(m) is torch.nn.Linear for m in int8.model.modules()))
+        torch_labels = sentiment_service._predict_labels(self.texts, self.torch_backend)
+        int8_labels = sentiment_service._predict_labels(self.texts, int8)
+        agreement = sum(a == b for a, b in zip(torch_labels, int8_labels)) / len(self.texts)
+        # The random fixture has many near-ties between logits; a trained model agrees far more closely
+        self.assertGreaterEqual(agreement, 0.8)
+
+    @override_settings(SENTIMENT_BUCKET_MAX_ITEMS=4, SENTIMENT_BUCKET_MAX_TOKENS=64)
+    def test_length_buckets_do_not_change_labels(self):
+        texts = self.texts[:40]
+        one_by_one = [sentiment_service._predict_labels([text], self.torch_backend)[0] for text in texts]
+        self.assertEqual(sentiment_service._predict_labels(texts, self.torch_backend), one_by_one)
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_short_result_fails_every_caller(self):
+        batcher = MicroBatcher(lambda texts: ["positive"] * (len(texts) - 1), max_batch_size=4, max_wait_ms=50)
+        futures = [batcher.submit(text) for text in ("a", "b", "c")]
+        for future in futures:
+            with self.assertRaisesRegex(RuntimeError, "2 labels for 3 texts"):
+                future.result(timeout=5)
+
+    @override_settings(SENTIMENT_BATCHING_ENABLED=True, SENTIMENT_BATCH_TIMEOUT=0.05)
+    def test_queued_prediction_times_out(self):
+        release = threading.Event()
+        batcher = MicroBatcher(lambda texts: release.wait(5) and ["positive"] * len(texts), max_wait_ms=0)
+        self.addCleanup(release.set)
+        with mock.patch.object(sentiment_service, "_get_batcher", return_value=batcher):
+            with self.assertRaises(TimeoutError):
+                sentiment_service._predict_queued(["slow", "slower"])
+
+
+@override_settings(SENTIMENT_CACHE_ENABLED=False)
+class SentimentBatchTests(SimpleTestCase):
+    """predict_sentiment_many() and POST sentiment/batch/: one model call for every text that passes the filters."""
+
+    def setUp(self):
+        cache.clear()   # throttle history
+        patcher = mock.patch.object(sentiment_service, "_infer", side_effect=lambda texts: [f"label-{t}" for t in texts])
+        self.infer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_model_call_in_input_order(self):
+        labels = sentiment_service.predict_sentiment_many(["great class", "\U0001F600\U0001F600 !!", "too fast"])
+        self.assertEqual(labels, ["label-great class", sentiment_service.REJECT_UNREADABLE, "label-too fast"])
+        self.infer.assert_called_once_with(["great class", "too fast"])
+
+    def test_rejects_non_string_input(self):
+        for bad in ("one text", ["ok", 3]):
+            with self.subTest(bad=bad), self.assertRaises(TypeError):
+                sentiment_service.predict_sentiment_many(bad)
+
+    @override_settings(SENTIMENT_MAX_BATCH_ITEMS=3)
+    def test_endpoint(self):
+        url = reverse("sentiment-batch")
+        response = self.client.post(url, {"texts": ["good", "bad"]}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"labels": ["label-good", "label-bad"]})
+
+        for body in ({}, {"texts": []}, {"texts": ["ok", None]}, {"texts": ["a", "b", "c", "d"]}):
+            with self.subTest(body=body):
+                self.assertEqual(self.client.post(url, body, content_type="application/json").status_code, 400)
+        self.assertEqual(self.infer.call_count, 1)
+
+
+class SentimentBackendSelectionTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(sentiment_service, "_backend", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_setting_selects_the_backend(self):
+        for name in ("torch", "torch_int8", "onnx"):
+            with self.subTest(name=name), override_settings(SENTIMENT_BACKEND=name), \
+                    mock.patch.object(sentiment_service, "create_backend") as create:
+                sentiment_service._backend = None
+                sentiment_service._load_model_once()
+                create.assert_called_once_with(name, sentiment_service.MODEL_DIR)
+                create.return_value.load.assert_called_once()
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "onnx, torch, torch_int8"):
+            create_backend("tensorrt", sentiment_service.MODEL_DIR)
+
+
+class LengthBucketTests(SimpleTestCase):
+    def test_buckets_are_sorted_and_bounded(self):
+        lengths = [30, 5, 12, 5, 60, 7, 200]
+        buckets = sentiment_service._length_buckets(lengths, max_items=3, max_tokens=100)
+        self.assertEqual(buckets, [[1, 3, 5], [2, 0], [4], [6]])
+        for bucket in buckets:
+            self.assertLessEqual(len(bucket), 3)
+            self.assertTrue(len(bucket) == 1 or len(bucket) * max(lengths[i] for i in bucket) <= 100)
+        self.assertEqual(sorted(i for bucket in buckets for i in bucket), list(range(len(lengths))))
+
+    def test_labels_come_back_in_input_order(self):
+        backend = mock.Mock(id2label={0: "negative", 1: "neutral", 2: "positive"})
+        backend.encode.side_effect = lambda texts: [[1] * len(text) for text in texts]
+        # Label by length, so a mix-up between buckets and input positions shows
+        backend.forward.side_effect = lambda batch: [min(len(ids) // 3, 2) for ids in batch]
+        with override_settings(SENTIMENT_BUCKET_MAX_ITEMS=2):
+            labels = sentiment_service._predict_labels(["xxxxxxx", "x", "xxxx", "xx"], backend)
+        self.assertEqual(labels, ["positive", "negative", "neutral", "negative"])
+        self.assertEqual([len(call.args[0]) for call in backend.forward.call_args_list], [2, 2])
+        self.assertEqual([len(ids) for ids in backend.forward.call_args_list[0].args[0]], [1, 2])
+
+
+class SentimentCacheTests(SimpleTestCase):
+    """Two-tier label cache: LRU per process, optional shared tier, keys versioned by the model files."""
+
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.model_dir = Path(tmp.name)
+        (self.model_dir / "config.json").write_text('{"dim": 32}')
+        (self.model_dir / "model.safetensors").write_bytes(b"\0" * (CONTENT_HASH_MAX_BYTES + 1))
+
+    def test_lru_hit_miss_and_eviction(self):
+        lru = SentimentCache(version="v1", lowercase=False, max_entries=2)
+        keys = [lru.key(text) for text in ("one", "two", "three")]
+        self.assertEqual(lru.get_many(keys[:1]), {})
+        lru.set_many({keys[0]: "positive", keys[1]: "negative"})
+        self.assertEqual(lru.get_many(keys[:2]), {keys[0]: "positive", keys[1]: "negative"})
+        lru.set_many({keys[2]: "neutral"})     # evicts the least recently used, "one"
+        self.assertEqual(set(lru.get_many(keys)), {keys[1], keys[2]})
+        stats = lru.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (4, 2, 2))
+
+    def test_shared_tier_serves_other_processes(self):
+        writer = SentimentCache(version="v1", lowercase=False, shared_alias="default")
+        reader = SentimentCache(version="v1", lowercase=False, shared_alias="default")
+        key = writer.key("Clear lessons")
+        writer.set_many({key: "positive"})
+
+        self.assertEqual(reader.get_many([key]), {key: "positive"})
+        self.assertEqual(reader.get_many([key]), {key: "positive"})
+        self.assertEqual((reader.stats()["shared_hits"], reader.stats()["hits"]), (1, 1))
+
+    def test_keys_ignore_only_what_the_tokenizer_ignores(self):
+        cased = SentimentCache(version="v1", lowercase=False)
+        uncased = SentimentCache(version="v1", lowercase=True)
+        self.assertEqual(cased.key("Good  lessons\n"), cased.key("Good lessons"))
+        self.assertNotEqual(cased.key("Good"), cased.key("good"))
+        self.assertEqual(uncased.key("Good"), uncased.key("good"))
+        self.assertNotEqual(cased.key("Good"), SentimentCache(version="v2", lowercase=False).key("Good"))
+
+    def test_fingerprint_changes_with_the_model_files_and_backend(self):
+        before = model_fingerprint(self.model_dir, "torch")
+        self.assertEqual(model_fingerprint(self.model_dir, "torch"), before)
+        self.assertNotEqual(model_fingerprint(self.model_dir, "onnx"), before)
+
+        (self.model_dir / "config.json").write_text('{"dim": 64}')
+        changed_config = model_fingerprint(self.model_dir, "torch")
+        self.assertNotEqual(changed_config, before)
+
+        # Weights are fingerprinted by size and mtime, never read
+        (self.model_dir / "model.safetensors").write_bytes(b"\1" * (CONTENT_HASH_MAX_BYTES + 2))
+        self.assertNotEqual(model_fingerprint(self.model_dir, "torch"), changed_config)
+
+        (self.model_dir / "manifest.json").write_text('{"version": "20260101-abc"}')
+        versioned = model_fingerprint(self.model_dir, "torch")
+        (self.model_dir / "config.json").write_text('{"dim": 128}')
+        self.assertEqual(model_fingerprint(self.model_dir, "torch"), versioned)
+
+    def test_predict_cached_deduplicates_and_misses_after_a_model_change(self):
+        predict = mock.Mock(side_effect=lambda texts: ["positive"] * len(texts))
+        with mock.patch.object(sentiment_service, "_cache", SentimentCache(version="v1", lowercase=False)):
+            self.assertEqual(sentiment_service._predict_cached(["a", "b", "a "], predict), ["positive"] * 3)
+            predict.assert_called_once_with(["a", "b"])
+            sentiment_service._predict_cached(["b", "a"], predict)
+            self.assertEqual(predict.call_count, 1)
+
+        with mock.patch.object(sentiment_service, "_cache", SentimentCache(version="v2", lowercase=False)):
+            sentiment_service._predict_cached(["a"], predict)
+        self.assertEqual(predict.call_count, 2)
+
+
+class SentimentPoolTests(SimpleTestCase):
+    """PoolClient <-> pool worker over a Unix socket, with the model stubbed out."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.address = str(Path(tmp.name) / "pool.sock")
+        self.authkey = b"pool-secret"
+
+        listener = Listener(self.address, authkey=self.authkey)
+        self.addCleanup(listener.close)
+        # Inherited by the forked worker: a loaded backend and a fake model
+        with mock.patch.object(sentiment_service, "_backend", mock.Mock()), \
+                mock.patch.object(sentiment_service, "_predict_labels", side_effect=lambda texts: [t.upper() for t in texts]):
+            worker = multiprocessing.get_context("fork").Process(target=_worker_loop, args=(listener, 0), daemon=True)
+            worker.start()
+        self.addCleanup(worker.join, 5)
+        self.addCleanup(worker.terminate)
+
+    def test_round_trip(self):
+        client = PoolClient(self.address, self.authkey, timeout=5)
+        self.assertEqual(client.predict(["good", "bad"]), ["GOOD", "BAD"])
+        with self.assertRaisesRegex(RuntimeError, "TypeError"):
+            client.predict(["ok", 3])
+        self.assertEqual(client.predict(["again"]), ["AGAIN"])
+
+    def test_wrong_authkey_is_rejected_and_the_worker_keeps_serving(self):
+        with self.assertRaises(AuthenticationError):
+            PoolClient(self.address, b"wrong", timeout=5).predict(["good"])
+        self.assertEqual(PoolClient(self.address, self.authkey, timeout=5).predict(["good"]), ["GOOD"])
+
+
+class StartupImportTests(SimpleTestCase):
+    def test_wsgi_startup_does_not_import_ai_packages(self):
+        out = StringIO()
+        call_command("bench_startup", "--top", "3", stdout=out)
+        self.assertIn("None of torch, transformers", out.getvalue())
+
+    def test_eager_import_fails_the_check(self):
+        with self.assertRaisesRegex(CommandError, "django imported at startup"):
+            call_command("bench_startup", "--forbid", "django", stdout=StringIO())
+
+
+class CpuThreadPolicyTests(SimpleTestCase):
+    def test_cpu_lists(self):
+        self.assertEqual(parse_cpu_list("0-3, 8,10-11,2"), [0, 1, 2, 3, 8, 10, 11])
+        self.assertEqual(cpus_for_worker("", worker_index=0, threads=2), [])
+        self.assertEqual(cpus_for_worker("4-5", worker_index=3, threads=2), [4, 5])
+
+    def test_auto_gives_each_worker_its_own_block(self):
+        with mock.patch("os.sched_getaffinity", return_value=set(range(8)), create=True):
+            blocks = [cpus_for_worker("auto", worker_index=i, threads=3) for i in range(3)]
+            self.assertEqual(cpus_for_worker("auto", worker_index=None, threads=3), [])
+        # 8 cores hold two blocks of 3; the third worker wraps around
+        self.assertEqual(blocks, [[0, 1, 2], [3, 4, 5], [0, 1, 2]])
+
+    @override_settings(SENTIMENT_INTRA_OP_THREADS=2, SENTIMENT_INTER_OP_THREADS=1, SENTIMENT_CPU_AFFINITY="0")
+    def test_settings_reach_the_backend_before_it_loads(self):
+        backend = mock.Mock(intra_op_threads=0, inter_op_threads=0)
+        backend.load.side_effect = lambda: self.assertEqual((backend.intra_op_threads, backend.inter_op_threads), (2, 1))
+        with mock.patch.object(sentiment_service, "_backend", None), \
+                mock.patch.object(sentiment_service, "create_backend", return_value=backend), \
+                mock.patch.object(sentiment_service, "apply_cpu_affinity") as pin:
+            sentiment_service._load_model_once()
+        backend.load.assert_called_once()
+        pin.assert_called_once_with("0", threads=2)
+
+
+@skipUnless(_backend_libraries_available(), "needs torch, transformers and onnxruntime")
+class FixtureModelCommandTests(SimpleTestCase):
+    """Benchmark and training commands end to end against the tiny fixture model."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._tmp = tempfile.TemporaryDirectory()
+        root = Path(cls._tmp.name)
+        cls.model_dir = root / "model"
+        cls.model_dir.mkdir()
+        rows = load_dataset()
+        build_fixture_model(cls.model_dir, [text for text, _ in rows])
+        # Every 4th row of the bundled dataset keeps the commands quick
+        cls.dataset = root / "dataset.csv"
+        lines = ["text,label"] + [f'"{text}",{label}' for text, label in rows[::4]]
+        cls.dataset.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+        super().tearDownClass()
+
+    def test_bench_sentiment_report(self):
+        output = Path(self._tmp.name) / "report.json"
+        with mock.patch.object(sentiment_service, "MODEL_DIR", self.model_dir):
+            call_command(
+                "bench_sentiment", "--in-process", "--backends", "onnx", "torch", "--batch-sizes", "1,8",
+                "--dataset", str(self.dataset), "--output", str(output), stdout=StringIO(), stderr=StringIO(),
+            )
+        report = json.loads(output.read_text())
+        rows = len(load_dataset(self.dataset))
+        self.assertEqual(report["dataset"]["rows"], rows)
+        self.assertEqual([b["backend"] for b in report["backends"]], ["onnx", "torch"])
+        for backend in report["backends"]:
+            with self.subTest(backend=backend["backend"]):
+                self.assertTrue(backend["available"])
+                self.assertEqual(sum(map(sum, backend["metrics"]["confusion_matrix"]["matrix"])), rows)
+                self.assertTrue(0 <= backend["metrics"]["accuracy"] <= 1)
+                self.assertEqual([p["batch_size"] for p in backend["batch_curve"]], [1, 8])
+        # The parity tests above show both backends give the same labels
+        self.assertEqual(report["backends"][0]["metrics"], report["backends"][1]["metrics"])
+        self.assertNotEqual(report["backends"][0]["model_version"], report["backends"][1]["model_version"])
+
+    def test_bench_sentiment_without_a_loadable_backend_fails(self):
+        with tempfile.TemporaryDirectory() as empty, mock.patch.object(sentiment_service, "MODEL_DIR", Path(empty)):
+            with self.assertRaisesRegex(CommandError, "No sentiment backend could be loaded"):
+                call_command("bench_sentiment", "--in-process", "--backends", "onnx", "--dataset", str(self.dataset),
+                             stdout=StringIO(), stderr=StringIO())
+
+    def train(self, output_root, cache_dir, log):
+        return train_sentiment_model(
+            dataset=self.dataset, output_root=output_root, base_model=str(self.model_dir),
+            tokenizer_name=str(self.model_dir), epochs=2, batch_size=8, patience=1, max_length=24,
+            cache_dir=cache_dir, log=log,
+        )
+
+    def test_train_sentiment_writes_a_servable_versioned_model(self):
+        root = Path(self._tmp.name) / "train"
+        first_log, second_log = [], []
+        out_dir = self.train(root / "first", root / "cache", first_log.append)
+
+        manifest = json.loads((out_dir / MANIFEST_FILENAME).read_text())
+        self.assertEqual(manifest["version"], out_dir.name)
+        self.assertEqual(manifest["labels"], list(LABELS))
+        self.assertEqual(manifest["data"]["sha256"], file_sha256(self.dataset))
+        self.assertEqual(manifest["data"]["train_rows"] + manifest["data"]["val_rows"], len(load_dataset(self.dataset)))
+        self.assertIn(manifest["best_epoch"], (1, 2))
+        self.assertIn("weighted_f1", manifest["metrics"])
+        self.assertFalse(any("Using cached tokenization" in line for line in first_log))
+
+        backend = create_backend("torch", out_dir)
+        backend.load()
+        labels = sentiment_service._predict_labels(["Great lectures", "Too much homework"], backend)
+        self.assertTrue(set(labels) <= set(LABELS))
+
+        # Same seed and data: the second run reuses the tokenization and trains to the same weights
+        rerun = self.train(root / "second", root / "cache", second_log.append)
+        self.assertTrue(any("Using cached tokenization" in line for line in second_log))
+        rerun_manifest = json.loads((rerun / MANIFEST_FILENAME).read_text())
+        self.assertEqual(rerun_manifest["metrics"], manifest["metrics"])
+        self.assertEqual(rerun_manifest["history"][0]["train_loss"], manifest["history"][0]["train_loss"])
+
+    def test_train_sentiment_rejects_bad_arguments(self):
+        for args in (["--val-fraction", "1.5"], ["--epochs", "0"], ["--dataset", "/nonexistent.csv"]):
+            with self.subTest(args=args), self.assertRaises(CommandError):
+                call_command("train_sentiment", *args, stdout=StringIO())
+
+
+class SentimentWarmUpForkTests(SimpleTestCase):
+    """A worker forked mid warm-up (gunicorn --preload) starts cold and warms up again."""
+
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            sentiment_service, _backend=None, _warmup_thread=None, _warmup_requested=False,
+            _warmup={"status": "cold", "load_seconds": None, "warmup_seconds": None, "error": None},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, sentiment_service, "_backend_lock", sentiment_service._backend_lock)
+        self.addCleanup(setattr, sentiment_service, "_warmup_lock", sentiment_service._warmup_lock)
+
+    def test_child_resets_state_and_readiness_restarts_warm_up(self):
+        # State a child inherits from a parent that was still warming up
+        sentiment_service._warmup_requested = True
+        sentiment_service._warmup["status"] = "warming"
+        sentiment_service._warmup_thread = mock.Mock()
+        held_lock = sentiment_service._backend_lock
+        held_lock.acquire()
+        self.addCleanup(held_lock.release)
+
+        sentiment_service._reset_after_fork()
+        self.assertIsNone(sentiment_service._warmup_thread)
+        self.assertEqual(sentiment_service._warmup["status"], "cold")
+        self.assertIsNot(sentiment_service._backend_lock, held_lock)
+        self.assertTrue(sentiment_service._backend_lock.acquire(blocking=False))
+        sentiment_service._backend_lock.release()
+
+        with mock.patch.object(sentiment_service, "warm_up") as warm_up, \
+                mock.patch.object(sentiment_service, "create_backend"):
+            state = sentiment_service.readiness()
+            sentiment_service._warmup_thread.join()
+        warm_up.assert_called_once()
+        self.assertEqual(state["status"], "warming")
+        self.assertFalse(state["ready"])
+
+    def test_child_keeps_a_fork_safe_model_loaded_before_the_fork(self):
+        sentiment_service._warmup_requested = True
+        sentiment_service._warmup["status"] = "ready"
+        sentiment_service._backend = mock.Mock(fork_safe=True)
+        sentiment_service._reset_after_fork()
+        with mock.patch.object(sentiment_service, "start_warm_up") as start_warm_up:
+            state = sentiment_service.readiness()
+        start_warm_up.assert_not_called()
+        self.assertTrue(state["ready"])
+
+    def test_model_that_is_not_fork_safe_is_reloaded(self):
+        sentiment_service._warmup_requested = True
+        sentiment_service._warmup["status"] = "ready"
+        sentiment_service._backend = mock.Mock(fork_safe=False)
+        sentiment_service._reset_after_fork()
+        self.assertIsNone(sentiment_service._backend)
+        self.assertEqual(sentiment_service._warmup["status"], "cold")
+
+    def test_child_recreates_the_cache_and_batcher_locks(self):
+        # A parent thread was inside the label cache and the batcher when the worker was forked
+        cache_ = SentimentCache(version="v1", lowercase=False)
+        batcher = MicroBatcher(lambda texts: ["positive"] * len(texts))
+        for obj in (cache_, batcher):
+            obj._lock.acquire()
+        with mock.patch.multiple(sentiment_service, _cache=cache_, _batcher=batcher):
+            sentiment_service._reset_after_fork()
+        for obj in (cache_, batcher):
+            self.assertTrue(obj._lock.acquire(blocking=False))
+            obj._lock.release()
+        key = cache_.key("fine")
+        cache_.set_many({key: "neutral"})
+        self.assertEqual(cache_.get_many([key]), {key: "neutral"})
+
+
+class ContentFilterTests(SimpleTestCase):
+    """Word lists match whole words only, in any case; emoji and angle brackets are flagged."""
+
+    def test_words_containing_listed_words_pass(self):
+        for text in ("Essex", "stupidity", "Dumbbell", "The class in Essex was great"):
+            with self.subTest(text=text):
+                self.assertEqual(CONTENT_FILTER.scan(text), ContentFlags())
+                self.assertIsNone(sentiment_service._prefilter(text))
+
+    def test_listed_words_are_rejected_in_any_case(self):
+        self.assertEqual(CONTENT_FILTER.scan("IDIOT"), ContentFlags(profane=True))
+        self.assertEqual(sentiment_service._prefilter("IDIOT"), sentiment_service.REJECT_PROFANE)
+        self.assertEqual(CONTENT_FILTER.scan("Sexy"), ContentFlags(sexual=True))
+        self.assertEqual(sentiment_service._prefilter("Sexy"), sentiment_service.REJECT_SEXUAL)
+        # A word on both lists counts as sexual
+        self.assertEqual(CONTENT_FILTER.scan("what the fuck"), ContentFlags(sexual=True))
+
+    def test_emoji_and_angle_brackets_are_flagged(self):
+        self.assertEqual(CONTENT_FILTER.scan("Great class \U0001F600"), ContentFlags(emoji=True))
+        self.assertEqual(CONTENT_FILTER.scan("\u2764"), ContentFlags(emoji=True))
+        self.assertEqual(CONTENT_FILTER.scan("a <b> tag"), ContentFlags(angle=True))
+        self.assertEqual(CONTENT_FILTER.scan("2 > 1, stupid \U0001F1F5\U0001F1ED"),
+                         ContentFlags(profane=True, emoji=True, angle=True))
+        self.assertEqual(sentiment_service._prefilter("\U0001F600\U0001F600 !!"), sentiment_service.REJECT_UNREADABLE)
+        with self.assertRaises(DRFValidationError):
+            validate_plain_text("Nice \U0001F600", field_name="comment")
+
+
+class SanitizeTextTests(SimpleTestCase):
+    """sanitize_text only skips bleach for text bleach would return unchanged."""
+
+    samples = [
+        "Clear lessons, helpful activities.",
+        "Tabs\tand\nnewlines\r\nstay",
+        "Accents: café, niño, Ünïcödé; CJK: 授業はわかりやすい",
+        "<b>bold</b> and <script>alert(1)</script>",
+        "a < b > c",
+        "Tom & Jerry &amp; &lt;tag&gt; &#60;",
+        "control\x00\x01\x0b\x0c\x1f\x7f\x85\x9f chars",
+        "noncharacters \ufdd0\ufdef\ufffe\uffff",
+        "lone surrogate \ud800 here",
+        "emoji \U0001F600 and flag \U0001F1F5\U0001F1ED",
+        "",
+    ]
+
+    @staticmethod
+    def bleach_clean(value):
+        return bleach.clean(value, tags=[], attributes={}, strip=True)
+
+    def test_matches_bleach_on_samples(self):
+        for value in self.samples:
+            with self.subTest(value=value):
+                self.assertEqual(sanitize_text(value), self.bleach_clean(value))
+
+    def test_matches_bleach_on_random_text(self):
+        rng = random.Random(0)
+        alphabet = "abc XYZ019.,;'\"\t\n<>&#/=" + "\x00\x08\x0b\x1f\x7f\x80\x9f\xa0é\u2028\ufdd0\ufffd\ufffe\U0001F600"
+        for _ in range(500):
+            value = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(sanitize_text(value), self.bleach_clean(value), repr(value))
+
+    def test_plain_text_skips_bleach(self):
+        with mock.patch("api.utils.bleach.clean") as clean:
+            self.assertEqual(sanitize_text("Clear lessons"), "Clear lessons")
+            clean.assert_not_called()
+            sanitize_text("a < b")
+            clean.assert_called_once()
+
+
+class SQLInjectionMiddlewareTests(SimpleTestCase):
+    """The combined pattern flags exactly what searching each pattern separately does."""
+
+    samples = [
+        "Great module; SELECT * FROM users",
+        "1; drop table students ",
+        "' UNION  SELECT password FROM auth_user",
+        "admin' --",
+        "comment /* hidden */ here",
+        "ends with a semicolon;",
+        "EXEC xp_cmdshell 'dir'",
+        "exec (something)",
+        "CAST(1 AS int)",
+        "convert (varchar, 1)",
+        "select * from INFORMATION_SCHEMA.tables",
+        "sysobjects and systables",
+        "I selected the union course; it was great",
+        "Converting notes -- helpful",
+        "The cast of characters was fun",
+        "Multi\nline -- \ncomment",
+        "plain feedback with no SQL at all",
+        "",
+    ]
+
+    def setUp(self):
+        self.middleware = SQLInjectionProtectionMiddleware(lambda request: HttpResponse("ok"))
+
+    def test_matches_separate_pattern_search(self):
+        for value in self.samples:
+            with self.subTest(value=value):
+                expected = any(re.search(p, value.lower(), re.IGNORECASE) for p in self.middleware.sql_patterns)
+                self.assertEqual(self.middleware._contains_sql_injection(value), expected)
+
+    def test_blocks_json_body_and_passes_clean_one(self):
+        factory = RequestFactory()
+        attack = factory.post("/api/feedback/submit/", {"responses": [{"comment": "x' UNION SELECT 1"}]},
+                              content_type="application/json")
+        self.assertEqual(self.middleware(attack).status_code, 403)
+        clean = factory.post("/api/feedback/submit/", {"responses": [{"comment": "Clear lessons"}]},
+                             content_type="application/json")
+        self.assertEqual(self.middleware(clean).status_code, 200)
+
+
+class FeedbackAPITestCase(APITestCase):
+    """An active IT101 module form with 20 questions, 10 of them in the question bank."""
+
+    # Unmanaged models the submit paths touch; the test runner does not create their tables
+    unmanaged_models = (Student, EvaluationForm, EvaluationQuestion, FeedbackResponse)
+
+    @classmethod
+    def setUpClass(cls):
+        existing = set(connection.introspection.table_names())
+        cls.created_models = [m for m in cls.unmanaged_models if m._meta.db_table not in existing]
+        with connection.schema_editor() as editor:
+            for model in cls.created_models:
+                editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            for model in reversed(cls.created_models):
+                editor.delete_model(model)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = ModuleEvaluationForm.objects.create(subject_code="IT101", status="Active")
+        questions = [{"id": f"q_{i}", "question": f"Question {i}", "type": "scale"} for i in range(20)]
+        EvaluationForm.objects.create(
+            title="IT101", form_type="Module", status="Active",
+            questions=[{"title": "Module", "questions": questions}],
+        )
+        for i in range(10):
+            EvaluationQuestion.objects.create(code=f"q_{i}", question_text=f"Question {i}", question_type="scale", position=i)
+
+    def setUp(self):
+        cache.clear()
+        # Start every test with cold ContentType and form schema caches
+        ContentType.objects.clear_cache()
+
+    def payload(self, pseudonym=None, count=3, rating=4):
+        payload = {
+            "form_type": "module",
+            "form_id": self.form.id,
+            "responses": [{"question": f"q_{i}", "rating": rating, "comment": "Clear lessons"} for i in range(count)],
+        }
+        if pseudonym is not None:
+            payload["pseudonym"] = pseudonym
+        return payload
+
+
+class FeedbackSubmitQueryCountTests(FeedbackAPITestCase):
+    """The submit path costs the same small number of queries however many questions are answered."""
+
+    def setUp(self):
+        super().setUp()
+        # Warm the process-wide ContentType cache and the compiled form schema
+        self.submit(1, "warm-up")
+
+    def submit(self, count, pseudonym):
+        response = self.client.post(reverse("student-submit-feedback"), self.payload(pseudonym, count), format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response
+
+    def test_query_count_does_not_grow_with_answers(self):
+        # form, schema freshness, savepoint, insert, job enqueue, release, question texts
+        with self.assertNumQueries(7):
+            self.submit(3, "few")
+        with self.assertNumQueries(7):
+            self.submit(20, "many")
+        self.assertEqual(FeedbackResponse.objects.count(), 3)
+
+    def test_question_changes_made_elsewhere_invalidate_the_schema(self):
+        # queryset.update()/delete() send no signals, like a change made by another process
+        self.assertEqual(get_form_schema("module", "IT101")["q_0"]["type"], "scale")
+        EvaluationQuestion.objects.filter(code="q_0").update(
+            question_type="text", updated_at=timezone.now() + timedelta(seconds=1),
+        )
+        self.assertEqual(get_form_schema("module", "IT101")["q_0"]["type"], "text")
+
+        EvaluationQuestion.objects.filter(code="q_1").delete()
+        self.assertIsNone(get_form_schema("module", "IT101")["q_1"]["id"])
+        with self.assertNumQueries(1):
+            get_form_schema("module", "IT101")
+
+
+class FeedbackBulkSubmitTests(FeedbackAPITestCase):
+    """feedback/submit/bulk/ reports every item and saves the valid, non-duplicate ones together."""
+
+    url = reverse_lazy("student-submit-feedback-bulk")
+
+    def setUp(self):
+        super().setUp()
+        FeedbackResponse.objects.create(
+            form_content_type=ContentType.objects.get_for_model(ModuleEvaluationForm),
+            form_object_id=self.form.id, pseudonym="existing", responses=[],
+        )
+
+    def test_reports_created_duplicate_and_invalid_items(self):
+        submissions = [
+            self.payload("alice"),
+            self.payload("existing"),               # already stored
+            self.payload("bob", rating=9),          # rating out of range
+            self.payload("alice"),                  # repeats item 0 of this batch
+            {**self.payload("carol"), "form_id": "NOPE999"},
+            "not an object",
+            self.payload("bob"),
+        ]
+        response = self.client.post(self.url, {"submissions": submissions}, format="json")
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            [r["status"] for r in response.data["results"]],
+            ["created", "duplicate", "invalid", "duplicate", "invalid", "invalid", "created"],
+        )
+        self.assertEqual([r["index"] for r in response.data["results"]], list(range(len(submissions))))
+        self.assertEqual(
+            (response.data["created_count"], response.data["duplicate_count"], response.data["invalid_count"]),
+            (2, 2, 3),
+        )
+        self.assertIn("responses", response.data["results"][2]["errors"])
+        self.assertEqual(response.data["results"][4]["detail"], "Form not found")
+        saved = FeedbackResponse.objects.filter(pseudonym__in=["alice", "bob"])
+        self.assertEqual(sorted(saved.values_list("pseudonym", flat=True)), ["alice", "bob"])
+        self.assertEqual({r.get("id") for r in response.data["results"] if r["status"] == "created"},
+                         set(saved.values_list("id", flat=True)))
+
+    def test_nothing_created_is_200(self):
+        response = self.client.post(self.url, [self.payload("existing"), self.payload("x", rating=0)], format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["created_count"], 0)
+
+    def test_conflict_at_insert_saves_nothing(self):
+        # A concurrent request stored "existing" after the duplicate check: the whole batch is rolled back
+        with mock.patch("api.views.find_duplicates", return_value=set()):
+            response = self.client.post(self.url, [self.payload("dave"), self.payload("existing")], format="json")
+        self.assertEqual(response.status_code, 409, response.data)
+        self.assertFalse(FeedbackResponse.objects.filter(pseudonym="dave").exists())
+        self.assertEqual(FeedbackResponse.objects.count(), 1)
+
+    def test_retry_after_conflict_runs_again_with_the_same_idempotency_key(self):
+        headers = {"HTTP_IDEMPOTENCY_KEY": "batch-42"}
+        body = [self.payload("erin")]
+        with mock.patch("api.views.insert_responses", side_effect=IntegrityError("unique_form_pseudonym")):
+            first = self.client.post(self.url, body, format="json", **headers)
+        self.assertEqual(first.status_code, 409)
+
+        # The 409 was not stored, so the retry runs the view and saves the submission
+        retry = self.client.post(self.url, body, format="json", **headers)
+        self.assertEqual(retry.status_code, 201, retry.data)
+        self.assertNotIn("Idempotent-Replayed", retry.headers)
+        self.assertTrue(FeedbackResponse.objects.filter(pseudonym="erin").exists())
+
+        replay = self.client.post(self.url, body, format="json", **headers)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(replay.data, retry.data)
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=2048, FEEDBACK_BULK_MAX_BODY_SIZE=8192)
+    def test_larger_body_limit_applies_to_bulk_only(self):
+        body = [self.payload(f"student{i}") for i in range(12)]
+        size = len(json.dumps(body))
+        self.assertTrue(2048 < size < 8192, size)
+
+        response = self.client.post(self.url, body, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data["created_count"], 12)
+
+        single = self.client.post(reverse("student-submit-feedback"), body, format="json")
+        self.assertEqual(single.status_code, 400)
+
+        too_big = self.client.post(self.url, body * 3, format="json")
+        self.assertEqual(too_big.status_code, 413)
+        self.assertEqual(FeedbackResponse.objects.count(), 13)
+
+
+@override_settings(FEEDBACK_WRITE_BEHIND_ENABLED=True)
+class FeedbackWriteBehindTests(FeedbackAPITestCase):
+    """With write-behind enabled, submissions are buffered and merged by flush_batch()."""
+
+    url = reverse_lazy("student-submit-feedback")
+
+    def setUp(self):
+        super().setUp()
+        # pending_depth() caches the buffer depth per process
+        feedback_ingest._depth = (0, float("-inf"))
+        self.content_type = ContentType.objects.get_for_model(ModuleEvaluationForm)
+
+    def student_headers(self, email="student@example.com"):
+        student = Student.objects.create(email=email, password="x", firstname="Stu", lastname="Dent")
+        token = AccessToken()
+        token["role"] = "student"
+        token["legacy_user_id"] = student.id
+        return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def entry_status(self, queue_id):
+        response = self.client.get(reverse("feedback-ingest-entry-status", args=[queue_id]))
+        self.assertEqual(response.status_code, 200)
+        return response.data["status"]
+
+    def store(self, pseudonym):
+        return FeedbackResponse.objects.create(
+            form_content_type=self.content_type, form_object_id=self.form.id, pseudonym=pseudonym, responses=[],
+        )
+
+    def test_submission_is_buffered_and_merged(self):
+        response = self.client.post(self.url, self.payload("hana"), format="json")
+        self.assertEqual(response.status_code, 202, response.data)
+        entry = BufferedFeedback.objects.get(id=response.data["queue_id"])
+        self.assertEqual((entry.pseudonym, entry.status), ("hana", BufferedFeedback.Status.PENDING))
+        self.assertEqual([item["question_code"] for item in entry.responses], ["q_0", "q_1", "q_2"])
+        self.assertFalse(FeedbackResponse.objects.exists())
+
+        result = feedback_ingest.flush_batch(100)
+        self.assertEqual((result["claimed"], result["merged"], result["duplicates"]), (1, 1, 0))
+        merged = FeedbackResponse.objects.get(pseudonym="hana")
+        self.assertEqual(merged.responses, entry.responses)
+        self.assertTrue(SentimentJob.objects.filter(response=merged).exists())
+        self.assertFalse(BufferedFeedback.objects.exists())
+
+    def test_merge_drops_submissions_stored_after_buffering(self):
+        for pseudonym in ("ivan", "judy"):
+            self.assertEqual(self.client.post(self.url, self.payload(pseudonym), format="json").status_code, 202)
+        # e.g. the same pseudonym saved through feedback/submit/bulk/ meanwhile
+        stored = self.store("ivan")
+
+        result = feedback_ingest.flush_batch(100)
+        self.assertEqual((result["merged"], result["duplicates"], result["failed"]), (1, 1, 0))
+        self.assertEqual(FeedbackResponse.objects.get(pseudonym="ivan"), stored)
+        self.assertTrue(FeedbackResponse.objects.filter(pseudonym="judy").exists())
+        # The dropped submission stays in the buffer as duplicate so its outcome can be looked up
+        self.assertEqual(
+            list(BufferedFeedback.objects.values_list("pseudonym", "status")),
+            [("ivan", BufferedFeedback.Status.DUPLICATE)],
+        )
+
+    def test_merge_keeps_the_acceptance_time(self):
+        accepted_at = timezone.now() - timedelta(minutes=5)
+        entry = BufferedFeedback.objects.create(
+            form_content_type=self.content_type, form_object_id=self.form.id, pseudonym="kim",
+            responses=[], submitted_at=accepted_at,
+        )
+        feedback_ingest.flush_batch(100)
+        self.assertEqual(FeedbackResponse.objects.get(pseudonym=entry.pseudonym).submitted_at, accepted_at)
+
+    def test_conflict_during_merge_is_retried(self):
+        for pseudonym in ("lee", "mia"):
+            self.client.post(self.url, self.payload(pseudonym), format="json")
+        self.store("lee")
+        # The first attempt misses the stored row (as if it was inserted concurrently) and hits the constraint
+        real_find_duplicates = feedback_ingest.find_duplicates
+
+        def miss_once(objs):
+            return set() if find.call_count == 1 else real_find_duplicates(objs)
+
+        with mock.patch.object(feedback_ingest, "find_duplicates", side_effect=miss_once) as find:
+            result = feedback_ingest.flush_batch(100)
+        self.assertEqual(find.call_count, 2)
+        self.assertEqual((result["merged"], result["duplicates"], result["failed"]), (1, 1, 0))
+        self.assertTrue(FeedbackResponse.objects.filter(pseudonym="mia").exists())
+        self.assertEqual(list(BufferedFeedback.objects.values_list("pseudonym", flat=True)), ["lee"])
+
+    def test_rows_that_keep_conflicting_are_marked_failed(self):
+        for pseudonym in ("noor", "omar"):
+            self.client.post(self.url, self.payload(pseudonym), format="json")
+        self.store("noor")
+        # Every duplicate check misses it: both batch attempts fail, then the row-by-row fallback runs
+        with mock.patch.object(feedback_ingest, "find_duplicates", return_value=set()):
+            result = feedback_ingest.flush_batch(100)
+        self.assertEqual((result["merged"], result["duplicates"], result["failed"]), (1, 0, 1))
+        failed = BufferedFeedback.objects.get()
+        self.assertEqual((failed.pseudonym, failed.status), ("noor", BufferedFeedback.Status.FAILED))
+        self.assertIn("IntegrityError", failed.last_error)
+        self.assertEqual(FeedbackResponse.objects.filter(pseudonym="noor").count(), 1)
+        self.assertTrue(FeedbackResponse.objects.filter(pseudonym="omar").exists())
+        # Failed rows are not claimed again
+        self.assertEqual(feedback_ingest.flush_batch(100)["claimed"], 0)
+
+    @override_settings(FEEDBACK_BUFFER_MAX_DEPTH=2, FEEDBACK_BUFFER_RETRY_AFTER_SECONDS=7,
+                       FEEDBACK_BUFFER_DEPTH_REFRESH_SECONDS=0)
+    def test_full_buffer_answers_503_until_flushed(self):
+        for pseudonym in ("pat", "quinn"):
+            self.assertEqual(self.client.post(self.url, self.payload(pseudonym), format="json").status_code, 202)
+
+        response = self.client.post(self.url, self.payload("ruth"), format="json")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "7")
+        self.assertFalse(BufferedFeedback.objects.filter(pseudonym="ruth").exists())
+        self.assertEqual(feedback_ingest.buffer_stats()["totals"]["rejected"], 1)
+
+        feedback_ingest.flush_batch(100)
+        self.assertEqual(self.client.post(self.url, self.payload("ruth"), format="json").status_code, 202)
+
+    def test_submit_does_not_query_feedback_responses(self):
+        self.client.post(self.url, self.payload("warm"), format="json")   # warm the form schema cache
+        feedback_ingest._depth = (0, float("-inf"))
+        # Pending depth count, form lookup, form schema freshness check and the buffer INSERT (in a savepoint)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.payload("sam"), format="json")
+        self.assertEqual(response.status_code, 202, response.data)
+        self.assertEqual(len(queries), 6, [q["sql"] for q in queries])
+        self.assertFalse([q["sql"] for q in queries if "feedback_responses" in q["sql"]])
+        # Within FEEDBACK_BUFFER_DEPTH_REFRESH_SECONDS the depth is not counted again
+        with self.assertNumQueries(5):
+            self.client.post(self.url, self.payload("tara"), format="json")
+
+    def test_student_resubmission_is_refused_while_buffered_and_dropped_after_merge(self):
+        headers = self.student_headers()
+        first = self.client.post(self.url, self.payload(), format="json", **headers)
+        self.assertEqual(first.status_code, 202, first.data)
+
+        again = self.client.post(self.url, self.payload(), format="json", **headers)
+        self.assertEqual(again.status_code, 400, again.data)
+        feedback_ingest.flush_batch(100)
+
+        # Once merged the buffer no longer holds it: the resubmission is accepted and dropped by the flush
+        again = self.client.post(self.url, self.payload(), format="json", **headers)
+        self.assertEqual(again.status_code, 202, again.data)
+        self.assertEqual(feedback_ingest.flush_batch(100)["duplicates"], 1)
+        self.assertEqual(FeedbackResponse.objects.count(), 1)
+        self.assertEqual(self.entry_status(first.data["queue_id"]), "merged")
+        self.assertEqual(self.entry_status(again.data["queue_id"]), "duplicate")
+
+    def test_pseudonym_resubmission_is_refused_while_buffered(self):
+        self.assertEqual(self.client.post(self.url, self.payload("frank"), format="json").status_code, 202)
+        self.assertEqual(self.client.post(self.url, self.payload("frank"), format="json").status_code, 400)
+        self.assertEqual(list(BufferedFeedback.objects.values_list("pseudonym", flat=True)), ["frank"])
+
+    def test_entry_status(self):
+        self.store("grace")
+        pending = self.client.post(self.url, self.payload("heidi"), format="json").data["queue_id"]
+        stored = self.client.post(self.url, self.payload("grace"), format="json").data["queue_id"]
+        self.assertEqual(self.entry_status(pending), "pending")
+
+        feedback_ingest.flush_batch(100)
+        self.assertEqual(self.entry_status(pending), "merged")
+        self.assertEqual(self.entry_status(stored), "duplicate")
+        self.assertEqual(feedback_ingest.buffer_stats()["duplicate"], 1)
+
+    def test_anonymous_submissions_are_never_duplicates(self):
+        body = {**self.payload(), "is_anonymous": True}
+        for _ in range(2):
+            self.assertEqual(self.client.post(self.url, body, format="json").status_code, 202)
+        self.assertEqual(feedback_ingest.flush_batch(100)["merged"], 2)
+
+
+
+class SentimentJobTests(FeedbackAPITestCase):
+    """process_batch() scores queued responses; a response that keeps failing only holds back itself."""
+
+    def setUp(self):
+        super().setUp()
+        content_type = ContentType.objects.get_for_model(ModuleEvaluationForm)
+        self.responses = [
+            FeedbackResponse.objects.create(
+                form_content_type=content_type, form_object_id=self.form.id, pseudonym=comment,
+                responses=[{"question_id": 1, "question_code": "q_0", "rating": 4, "comment": comment}],
+            )
+            for comment in ("great", "POISON", "fine")
+        ]
+        sentiment_jobs.enqueue([r.id for r in self.responses])
+
+    @staticmethod
+    def predict(texts):
+        if "POISON" in texts:
+            raise RuntimeError("cannot score")
+        return ["positive"] * len(texts)
+
+    def test_poisoned_row_fails_alone(self):
+        with mock.patch("api.sentiment_jobs.predict_sentiment_many", side_effect=self.predict) as predict:
+            self.assertEqual(sentiment_jobs.process_batch(10), 3)
+        # One call for the batch, then one per response
+        self.assertEqual(predict.call_count, 4)
+
+        great, poison, fine = (FeedbackResponse.objects.get(id=r.id) for r in self.responses)
+        self.assertEqual(great.sentiment["overall"], {"label": "positive", "score": 1.0})
+        self.assertEqual(fine.sentiment["overall"], {"label": "positive", "score": 1.0})
+        self.assertIsNone(poison.sentiment)
+
+        job = SentimentJob.objects.get()
+        self.assertEqual((job.response_id, job.status, job.attempts), (poison.id, SentimentJob.Status.PENDING, 1))
+        self.assertIn("cannot score", job.last_error)
+
+    @override_settings(SENTIMENT_JOB_MAX_ATTEMPTS=1)
+    def test_poisoned_row_is_marked_failed_after_max_attempts(self):
+        with mock.patch("api.sentiment_jobs.predict_sentiment_many", side_effect=self.predict):
+            sentiment_jobs.process_batch(10)
+        job = SentimentJob.objects.get()
+        self.assertEqual((job.response_id, job.status), (self.responses[1].id, SentimentJob.Status.FAILED))
+        self.assertEqual(sentiment_jobs.claim_batch(10), [])
+
+    def test_error_is_raised_when_nothing_could_be_scored(self):
+        with mock.patch("api.sentiment_jobs.predict_sentiment_many", side_effect=RuntimeError("model down")):
+            with self.assertRaises(RuntimeError):
+                sentiment_jobs.process_batch(10)
+        self.assertEqual(
+            list(SentimentJob.objects.values_list("status", "attempts").distinct()),
+            [(SentimentJob.Status.PENDING, 1)],
+        )
+
+
+class BackfillSentimentTests(FeedbackAPITestCase):
+    """backfill_sentiment pages through unscored rows and resumes an interrupted run from its checkpoint."""
+
+    def setUp(self):
+        super().setUp()
+        content_type = ContentType.objects.get_for_model(ModuleEvaluationForm)
+        self.rows = [
+            FeedbackResponse.objects.create(
+                form_content_type=content_type, form_object_id=self.form.id, pseudonym=f"p{i}",
+                responses=[{"question_id": 1, "question_code": "q_0", "rating": 4, "comment": f"comment {i}"}],
+            )
+            for i in range(5)
+        ]
+        FeedbackResponse.objects.filter(id=self.rows[0].id).update(submitted_at=timezone.now() - timedelta(days=30))
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.checkpoint = Path(tmp.name) / "checkpoint.json"
+        patches = [
+            mock.patch("api.sentiment_service._load_model_once"),
+            mock.patch("api.sentiment_jobs.predict_sentiment_many", side_effect=lambda texts: ["positive"] * len(texts)),
+        ]
+        for patcher in patches:
+            self.addCleanup(patcher.stop)
+        _, self.predict = [patcher.start() for patcher in patches]
+
+    def backfill(self, *args):
+        out = StringIO()
+        call_command("backfill_sentiment", "--batch-size", "2", "--checkpoint", str(self.checkpoint), *args, stdout=out)
+        return out.getvalue()
+
+    def scored_ids(self):
+        return set(FeedbackResponse.objects.filter(sentiment__isnull=False).values_list("id", flat=True))
+
+    def test_pages_and_since(self):
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        out = self.backfill("--since", since)
+        self.assertEqual(self.scored_ids(), {r.id for r in self.rows[1:]})
+        self.assertEqual(self.predict.call_count, 2)     # pages of 2 + 2
+        self.assertIn("Backfilled sentiment for 4 responses", out)
+        self.assertFalse(self.checkpoint.exists())
+
+    def test_interrupted_run_resumes_and_completed_run_clears_the_checkpoint(self):
+        self.predict.side_effect = [["positive"] * 2, RuntimeError("model crashed")]
+        with self.assertRaises(RuntimeError):
+            self.backfill()
+        self.assertEqual(self.scored_ids(), {self.rows[0].id, self.rows[1].id})
+        self.assertEqual(json.loads(self.checkpoint.read_text()), {"last_id": self.rows[1].id})
+
+        self.predict.side_effect = lambda texts: ["negative"] * len(texts)
+        out = self.backfill()
+        self.assertIn(f"Resuming after id {self.rows[1].id}", out)
+        self.assertEqual(self.scored_ids(), {r.id for r in self.rows})
+        self.assertFalse(self.checkpoint.exists())
+
+        # A later run starts from the first row again and picks up rows that were added since
+        FeedbackResponse.objects.filter(id=self.rows[0].id).update(sentiment=None)
+        self.assertNotIn("Resuming", self.backfill())
+        self.assertEqual(self.scored_ids(), {r.id for r in self.rows})
@@ -29,8 +29,14 @@ urlpatterns = [
     path("faculty/bulk-import/", views.FacultyBulkImportView.as_view(), name="faculty-bulk-import"),
 
     path("feedback/submit/", views.FeedbackResponseCreateView.as_view(), name="student-submit-feedback"),
+    path("feedback/submit/bulk/", views.FeedbackResponseBulkCreateView.as_view(), name="student-submit-feedback-bulk"),
+    path("feedback/ingest/status/", views.FeedbackIngestStatusView.as_view(), name="feedback-ingest-status"),
+    path("feedback/ingest/<int:queue_id>/", views.FeedbackIngestEntryStatusView.as_view(), name="feedback-ingest-entry-status"),
     path("feedback/submissions/", views.FeedbackResponseListView.as_view(), name="student-feedback-detail"),
 
+    path("sentiment/batch/", views.SentimentBatchView.as_view(), name="sentiment-batch"),
+    path("sentiment/ready/", views.SentimentReadinessView.as_view(), name="sentiment-ready"),
+
     path("audit-logs/", views.AuditLogListView.as_view(), name="audit-log-list"),
 
     path("otp/send/", views.SendOTPView.as_view(), name="otp-send"),
@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.exceptions import ValidationError as DRFValidationError
-from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils.decorators import method_decorator
@@ -12,10 +12,15 @@ from django.conf import settings
 
 from .throttles import AIRequestRateThrottle, LoginRateThrottle
 from .models import Student
-from .sentiment_service import predict_sentiment
+from .sentiment_service import predict_sentiment, predict_sentiment_many, readiness as sentiment_readiness
 import csv
 import io
 from .recaptcha import verify_recaptcha_v2
+from .feedback_forms import FORM_MODELS, resolve_form, resolve_legacy_form
+from .feedback_ingest import (
+    DuplicateSubmission, buffer_entry_status, buffer_full, buffer_stats, buffer_submission, find_duplicates, insert_responses,
+)
+from .idempotency import idempotent
 from types import SimpleNamespace
 
 from .models.AuditLog import AuditLog
@@ -1368,26 +1373,62 @@ class AuditLogListView(generics.ListCreateAPIView):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+def _submitting_student(request):
+    """
+    (student, None) for a student bearer token, (None, None) without one, or
+    (None, error Response) when the token is invalid or the student does not exist.
+    """
+    token = _get_bearer_token(request)
+    if not token:
+        return None, None
+    try:
+        decoded = AccessToken(token)
+        if decoded.get('role') == 'student':
+            sid = decoded.get('legacy_user_id') or decoded.get('user_id') or decoded.get('sub')
+            if sid:
+                student = Student.objects.filter(pk=sid).first()
+                if not student:
+                    return None, Response({"detail": "Student not found"}, status=status.HTTP_401_UNAUTHORIZED)
+                return student, None
+    except Exception:
+        return None, Response({"detail": "Invalid token"}, status=status.HTTP_401_UNAUTHORIZED)
+    return None, None
+
+
+def _flatten_errors(e, prefix=""):
+    # turns nested DRF error structures into a readable string
+    if isinstance(e, dict):
+        parts = []
+        for k, v in e.items():
+            key = f"{prefix}.{k}" if prefix else str(k)
+            parts.append(_flatten_errors(v, key))
+        return "; ".join([p for p in parts if p])
+    if isinstance(e, (list, tuple)):
+        return "; ".join([_flatten_errors(i, prefix) for i in e if i])
+    return f"{prefix}: {e}" if prefix else str(e)
+
+
 class FeedbackResponseCreateView(generics.CreateAPIView):
     authentication_classes = []
     permission_classes = []
     serializer_class = FeedbackResponseSerializer
     queryset = FeedbackResponse.objects.all()
 
+    @idempotent
     def create(self, request, *args, **kwargs):
-        token = _get_bearer_token(request)
-        student = None
-        if token:
-            try:
-                decoded = AccessToken(token)
-                if decoded.get('role') == 'student':
-                    sid = decoded.get('legacy_user_id') or decoded.get('user_id') or decoded.get('sub')
-                    if sid:
-                        student = Student.objects.filter(pk=sid).first()
-                        if not student:
-                            return Response({"detail": "Student not found"}, status=status.HTTP_401_UNAUTHORIZED)
-            except Exception:
-                return Response({"detail": "Invalid token"}, status=status.HTTP_401_UNAUTHORIZED)
+        student, error = _submitting_student(request)
+        if error:
+            return error
+
+        # Write-behind mode: validated submissions go to the ingest buffer and are merged into
+        # feedback_responses by `manage.py flush_feedback_buffer`
+        write_behind = getattr(settings, 'FEEDBACK_WRITE_BEHIND_ENABLED', False)
+        if write_behind and buffer_full():
+            return Response(
+                {"detail": "Too many submissions are waiting to be saved, please retry shortly"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(getattr(settings, 'FEEDBACK_BUFFER_RETRY_AFTER_SECONDS', 5))},
+            )
 
         data = request.data.copy()
 
@@ -1397,77 +1438,47 @@ class FeedbackResponseCreateView(generics.CreateAPIView):
             if legacy_form_id is None:
                 return Response({"detail": "form_type+form_id or legacy 'form' field required"}, status=status.HTTP_400_BAD_REQUEST)
 
-            module_obj = None
-            instructor_obj = None
-            try:
-                legacy_pk = int(str(legacy_form_id))
-                module_obj = ModuleEvaluationForm.objects.filter(pk=legacy_pk).first()
-                instructor_obj = InstructorEvaluationForm.objects.filter(pk=legacy_pk).first()
-            except (ValueError, TypeError):
-                legacy_str = str(legacy_form_id).strip()
-                if legacy_str:
-                    module_obj = ModuleEvaluationForm.objects.filter(subject_code__iexact=legacy_str).first()
-                    instructor_obj = InstructorEvaluationForm.objects.filter(instructor_name__iexact=legacy_str).first()
-
-            if module_obj:
-                data['form_type'] = 'module'
-                data['form_id'] = module_obj.id
-            elif instructor_obj:
-                data['form_type'] = 'instructor'
-                data['form_id'] = instructor_obj.id
-            else:
+            resolved = resolve_legacy_form(legacy_form_id)
+            if not resolved:
+                return Response({"detail": "Form not found"}, status=status.HTTP_404_NOT_FOUND)
+            data['form_type'] = resolved.form_type
+            data['form_id'] = resolved.obj.id
+        else:
+            # Validate target form exists; the serializer reuses this instead of looking it up again
+            if data['form_type'] not in FORM_MODELS:
+                return Response({"detail": "invalid form_type"}, status=status.HTTP_400_BAD_REQUEST)
+            resolved = resolve_form(data['form_type'], data.get('form_id'))
+            if not resolved:
                 return Response({"detail": "Form not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Validate target form exists and prevent duplicate submissions
-        model = ModuleEvaluationForm if data['form_type'] == 'module' else InstructorEvaluationForm if data['form_type'] == 'instructor' else None
-        if not model:
-            return Response({"detail": "invalid form_type"}, status=status.HTTP_400_BAD_REQUEST)
-        form_identifier = data.get('form_id')
-        form_obj = None
-        try:
-            fid = int(str(form_identifier))
-            form_obj = model.objects.filter(pk=fid).first()
-        except (ValueError, TypeError):
-            ident = str(form_identifier).strip()
-            if model is ModuleEvaluationForm:
-                form_obj = ModuleEvaluationForm.objects.filter(subject_code__iexact=ident).first()
-            else:
-                form_obj = InstructorEvaluationForm.objects.filter(instructor_name__iexact=ident).first()
-
-        if not form_obj:
-            return Response({"detail": "Form not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        ct = ContentType.objects.get_for_model(model)
-        if student and FeedbackResponse.objects.filter(form_content_type=ct, form_object_id=form_obj.id, student=student).exists():
+        # Prevent duplicate submissions. In write-behind mode the buffer's unique constraints
+        # refuse resubmissions and the flush drops ones already stored (see buffer_entry_status)
+        if not write_behind and student and FeedbackResponse.objects.filter(
+            form_content_type=resolved.content_type, form_object_id=resolved.obj.id, student=student
+        ).exists():
             return Response({"detail": "You have already submitted feedback for this form"}, status=status.HTTP_400_BAD_REQUEST)
 
         if not student and not data.get('pseudonym') and not data.get('is_anonymous', False):
             return Response({"detail": "Provide pseudonym or submit as anonymous or authenticate as student"}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = self.get_serializer(data=data)
+        serializer = self.get_serializer(data=data, context={**self.get_serializer_context(), 'resolved_form': resolved})
         try:
             serializer.is_valid(raise_exception=True)
         except DRFValidationError as exc:
             errors = exc.detail
-
-            def _flatten(e, prefix=""):
-                # turns nested DRF error structures into a readable string
-                if isinstance(e, dict):
-                    parts = []
-                    for k, v in e.items():
-                        key = f"{prefix}.{k}" if prefix else str(k)
-                        parts.append(_flatten(v, key))
-                    return "; ".join([p for p in parts if p])
-                if isinstance(e, (list, tuple)):
-                    return "; ".join([_flatten(i, prefix) for i in e if i])
-                return f"{prefix}: {e}" if prefix else str(e)
-
-            message = _flatten(errors) or "Validation error"
+            message = _flatten_errors(errors) or "Validation error"
             return Response(
                 {"detail": message, "errors": errors},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        if write_behind:
+            try:
+                entry = buffer_submission(serializer, student=student, ip_address=request.META.get('REMOTE_ADDR', 'Unknown'))
+            except DuplicateSubmission:
+                return Response({"detail": "You have already submitted feedback for this form"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"detail": "Feedback accepted", "queue_id": entry.id}, status=status.HTTP_202_ACCEPTED)
+
         obj = serializer.save(
             student=student,
             ip_address=request.META.get('REMOTE_ADDR', 'Unknown'),
@@ -1477,6 +1488,110 @@ class FeedbackResponseCreateView(generics.CreateAPIView):
         headers = self.get_success_headers(out)
         return Response(out, status=status.HTTP_201_CREATED, headers=headers)
 
+class FeedbackResponseBulkCreateView(APIView):
+    """
+    Submit many feedback forms at once (offline / kiosk collection).
+
+    Body: {"submissions": [<feedback/submit/ payload>, ...]} or the bare list. Every item is
+    validated on its own; the valid, non-duplicate ones are inserted together in one
+    transaction. The response reports each item's outcome by index.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    @idempotent
+    def post(self, request):
+        student, error = _submitting_student(request)
+        if error:
+            return error
+
+        items = request.data.get('submissions') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "submissions must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        max_items = getattr(settings, 'FEEDBACK_BULK_MAX_ITEMS', 5000)
+        if len(items) > max_items:
+            return Response({"detail": f"at most {max_items} submissions per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        ip = request.META.get('REMOTE_ADDR', 'Unknown')
+        forms = {}          # (form_type, form_id) or ('legacy', form) -> ResolvedForm | None
+        schema_memo = {}    # shared by every item's serializer, see FeedbackResponseSerializer._memo
+        results = [None] * len(items)
+        pending = []        # (index, unsaved FeedbackResponse)
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {"index": index, "status": "invalid", "detail": "submission must be an object"}
+                continue
+            data = dict(item)
+
+            if data.get('form_type') and data.get('form_id'):
+                key = (data['form_type'], str(data['form_id']).strip())
+                if key not in forms:
+                    forms[key] = resolve_form(*key) if data['form_type'] in FORM_MODELS else None
+            elif data.get('form') is not None:
+                key = ('legacy', str(data['form']).strip())
+                if key not in forms:
+                    forms[key] = resolve_legacy_form(key[1])
+            else:
+                results[index] = {"index": index, "status": "invalid", "detail": "form_type+form_id or legacy 'form' field required"}
+                continue
+            resolved = forms[key]
+            if not resolved:
+                results[index] = {"index": index, "status": "invalid", "detail": "Form not found"}
+                continue
+            data['form_type'] = resolved.form_type
+            data['form_id'] = resolved.obj.id
+
+            if not student and not data.get('pseudonym') and not data.get('is_anonymous', False):
+                results[index] = {"index": index, "status": "invalid",
+                                  "detail": "Provide pseudonym or submit as anonymous or authenticate as student"}
+                continue
+
+            serializer = FeedbackResponseSerializer(
+                data=data, context={'request': request, 'resolved_form': resolved, 'schema_memo': schema_memo}
+            )
+            if not serializer.is_valid():
+                results[index] = {"index": index, "status": "invalid",
+                                  "detail": _flatten_errors(serializer.errors) or "Validation error", "errors": serializer.errors}
+                continue
+            pending.append((index, serializer.build_instance(student=student, ip_address=ip)))
+
+        # Duplicates against unique_form_student / unique_form_pseudonym: one query for the whole batch
+        duplicates = find_duplicates([obj for _, obj in pending])
+        to_create = []
+        for position, (index, obj) in enumerate(pending):
+            if position in duplicates:
+                results[index] = {"index": index, "status": "duplicate", "detail": "Feedback for this form was already submitted"}
+            else:
+                to_create.append((index, obj))
+
+        if to_create:
+            try:
+                with transaction.atomic():
+                    created = insert_responses([obj for _, obj in to_create])
+            except IntegrityError:
+                # Another request inserted one of these between the duplicate check and the insert
+                return Response(
+                    {"detail": "A conflicting submission was saved concurrently; nothing was saved, please retry"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            for (index, _), obj in zip(to_create, created):
+                results[index] = {"index": index, "status": "created", "id": obj.id}
+
+        created_count = sum(1 for r in results if r["status"] == "created")
+        duplicate_count = sum(1 for r in results if r["status"] == "duplicate")
+        return Response(
+            {
+                "message": f"Saved {created_count} of {len(items)} submissions",
+                "created_count": created_count,
+                "duplicate_count": duplicate_count,
+                "invalid_count": len(items) - created_count - duplicate_count,
+                "results": results,
+            },
+            status=status.HTTP_201_CREATED if created_count else status.HTTP_200_OK,
+        )
+
+
 class FeedbackResponseListView(generics.ListAPIView):
     authentication_classes = []
     permission_classes = []
@@ -1526,7 +1641,60 @@ class SentimentTestView(APIView):
             return Response({"detail": "Model error", "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         return Response({"label": label}, status=status.HTTP_200_OK)
-    
+
+class SentimentBatchView(APIView):
+    # The whole list is one AI request as far as the rate limit is concerned
+    throttle_classes = [AIRequestRateThrottle]
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request):
+        texts = request.data.get("texts")
+        if not isinstance(texts, list) or not texts:
+            return Response({"detail": 'Missing "texts" list'}, status=status.HTTP_400_BAD_REQUEST)
+        if any(not isinstance(t, str) for t in texts):
+            return Response({"detail": '"texts" must be a list of strings'}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_items = getattr(settings, "SENTIMENT_MAX_BATCH_ITEMS", 256)
+        if len(texts) > max_items:
+            return Response({"detail": f"Too many texts. Max is {max_items} per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            labels = predict_sentiment_many(texts)
+        except Exception as e:
+            return Response({"detail": "Model error", "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({"labels": labels}, status=status.HTTP_200_OK)
+
+
+class SentimentReadinessView(APIView):
+    # Load balancer probe: 503 until this worker has finished warming up the sentiment model
+    throttle_classes = []
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        state = sentiment_readiness()
+        code = status.HTTP_200_OK if state["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response(state, status=code)
+
+class FeedbackIngestStatusView(APIView):
+    # Write-behind backlog and counters, for dashboards and autoscaling of the flusher
+    throttle_classes = []
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return Response(buffer_stats())
+
+class FeedbackIngestEntryStatusView(APIView):
+    # Outcome of one write-behind submission, by the queue_id feedback/submit/ answered with
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, queue_id):
+        return Response({"queue_id": queue_id, "status": buffer_entry_status(queue_id)})
+
 class SendOTPView(APIView):
     throttle_classes = [LoginRateThrottle]
     authentication_classes = []
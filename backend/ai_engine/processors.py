@@ -1,30 +1,115 @@
 # logic for sentiment analysis (Hugging Face)
 
-import os
+import threading
+
+from django.conf import settings
 from transformers import pipeline, AutoModelForSequenceClassification, AutoTokenizer
 
-# Path provided in your previous message
-MODEL_PATH = r"C:\Users\Gabriel Esperanza\Documents\Projects\UPang-Student-Feedback-and-Module-Evaluation-System\sentiment_model_final"
+from .themes import EmbeddingThemeClassifier, SentenceEncoder
+
+_processor = None
+_processor_lock = threading.Lock()
+
+
+def get_feedback_processor():
+    """Process-wide FeedbackProcessor: the models are loaded on first use and then reused by every request."""
+    global _processor
+    if _processor is None:
+        with _processor_lock:
+            if _processor is None:
+                _processor = FeedbackProcessor()
+    return _processor
+
 
 class FeedbackProcessor:
-    def __init__(self):
+    def __init__(self, model_path=None, theme_engine=None):
+        model_path = str(model_path or settings.AI_SENTIMENT_MODEL_PATH)
+
         # Load your fine-tuned DistilBERT
-        self.model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH)
-        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
         self.sentiment_pipe = pipeline("sentiment-analysis", model=self.model, tokenizer=self.tokenizer)
-        
-        # Load Zero-Shot for Themes (as seen in your notebook)
-        self.theme_pipe = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-        self.candidate_themes = ["teaching clarity", "course workload", "module materials", "instructor engagement"]
-        
+
+        self.batch_size = settings.AI_BATCH_SIZE
+
+        # Themes: embedding similarity by default, zero-shot NLI (as seen in your notebook) on request
+        self.theme_engine = theme_engine or settings.AI_THEME_ENGINE
+        self.candidate_themes = list(settings.AI_THEMES)
+        self.theme_pipe = None
+        self.theme_classifier = None
+        # Sentence encoder, loaded on first use (see the encoder property)
+        self._encoder = None
+        self._encoder_lock = threading.Lock()
+        if self.theme_engine == "zero_shot":
+            self.theme_pipe = pipeline("zero-shot-classification", model=settings.AI_THEME_MODEL)
+        elif self.theme_engine == "embedding":
+            self.theme_classifier = EmbeddingThemeClassifier(
+                settings.AI_THEME_ENCODER, settings.AI_THEMES, encoder=self.encoder
+            )
+        else:
+            raise ValueError(f"Unknown AI_THEME_ENGINE {self.theme_engine!r}; use 'embedding' or 'zero_shot'")
+
         # Mapping labels from your notebook (LABEL_0, LABEL_1, etc.)
         self.label_map = {"LABEL_0": "negative", "LABEL_1": "neutral", "LABEL_2": "positive"}
 
-    def analyze_single(self, text):
-        sentiment_res = self.sentiment_pipe(text)[0]
-        theme_res = self.theme_pipe(text, self.candidate_themes)
-        
-        return {
-            "sentiment": self.label_map.get(sentiment_res['label'], "neutral"),
-            "theme": theme_res['labels'][0]
-        }
\ No newline at end of file
+    @property
+    def encoder(self):
+        """
+        Sentence encoder shared by the embedding theme classifier and comment clustering
+        (feedback.sampling). Loaded on first use, so the zero_shot engine only pays for it
+        when embeddings are actually requested.
+        """
+        if self._encoder is None:
+            with self._encoder_lock:
+                if self._encoder is None:
+                    self._encoder = SentenceEncoder(settings.AI_THEME_ENCODER, batch_size=self.batch_size)
+        return self._encoder
+
+    def analyze_single(self, text, with_embedding=True):
+        return self.analyze_batch([text], with_embeddings=with_embedding)[0]
+
+    def analyze_batch(self, texts, with_embeddings=True):
+        """
+        Sentiment, top theme and sentence embedding for every text, in input order.
+
+        All models get the whole list at once and run it in batches of AI_BATCH_SIZE; each
+        comment is embedded once and the vector is reused for theme scoring. With
+        with_embeddings=False the zero_shot engine skips the sentence encoder and every
+        embedding is None.
+        Blank texts are not sent to the models; they come back neutral with no theme or embedding.
+        """
+        results = [{"sentiment": "neutral", "theme": None, "embedding": None} for _ in texts]
+        indices = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not indices:
+            return results
+
+        batch = [texts[i] for i in indices]
+        sentiment_res = self.sentiment_pipe(batch, batch_size=self.batch_size, truncation=True)
+        if with_embeddings or self.theme_classifier is not None:
+            vectors = self.encoder.embed(batch)
+        else:
+            vectors = [None] * len(batch)
+        themes = self.classify_themes(batch, vectors if self.theme_classifier is not None else None)
+
+        for i, sentiment, theme, vector in zip(indices, sentiment_res, themes, vectors):
+            results[i] = {
+                "sentiment": self.label_map.get(sentiment['label'], "neutral"),
+                "theme": theme,
+                "embedding": vector
+            }
+        return results
+
+    def embed(self, texts):
+        return self.encoder.embed(texts)
+
+    def classify_themes(self, texts, vectors=None):
+        """Theme per text with the configured engine (None: no theme scored above its threshold)."""
+        if self.theme_classifier is not None:
+            if vectors is not None:
+                return self.theme_classifier.classify_vectors(vectors)
+            return self.theme_classifier.classify(texts)
+
+        theme_res = self.theme_pipe(list(texts), self.candidate_themes, batch_size=self.batch_size)
+        if isinstance(theme_res, dict):
+            theme_res = [theme_res]
+        return [res['labels'][0] for res in theme_res]
@@ -1,11 +1,36 @@
-from google import genai
+import threading
+import time
+
 from django.conf import settings
 
+_report_service = None
+_report_service_lock = threading.Lock()
+
+
+def get_report_service():
+    """Process-wide report generator selected by AI_REPORT_BACKEND ("gemini" or "stub")."""
+    global _report_service
+    if _report_service is None:
+        with _report_service_lock:
+            if _report_service is None:
+                backend = settings.AI_REPORT_BACKEND
+                if backend == "gemini":
+                    _report_service = GeminiService()
+                elif backend == "stub":
+                    _report_service = StubReportService()
+                else:
+                    raise ValueError(f"Unknown AI_REPORT_BACKEND {backend!r}; use 'gemini' or 'stub'")
+    return _report_service
+
+
 class GeminiService:
     def __init__(self):
+        from google import genai
+
         # The new SDK passes the API key directly to the Client
         self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
         self.model_id = "gemini-1.5-flash"
+        self.name = f"gemini:{self.model_id}"
 
     def generate_combined_analysis(self, stats, sample_comments):
         """
@@ -13,7 +38,7 @@ class GeminiService:
         """
         prompt = f"""
         Context: You are a University Academic Quality Analyst.
-        
+
         Data to Analyze:
         - Sentiment Distribution: {stats['pos']} Positive, {stats['neg']} Negative, {stats['neu']} Neutral.
         - Common Themes: {stats['themes']}
@@ -22,14 +47,46 @@ class GeminiService:
         Request:
         1. Write a 1-paragraph summary combining all student feedback.
         2. Provide 3 specific 'Suggestions for Improvement' for the professor.
-        
+
         Tone: Professional, supportive, and constructive.
         """
-        
+
         # New syntax: client.models.generate_content
         response = self.client.models.generate_content(
             model=self.model_id,
             contents=prompt
         )
-        
-        return response.text
\ No newline at end of file
+
+        return response.text
+
+
+class StubReportService:
+    """
+    Offline stand-in for GeminiService: builds the report from the stats alone, so the same
+    input always gives the same text. Sleeps AI_STUB_LATENCY_MS to imitate the API round trip
+    in load tests.
+    """
+
+    name = "stub"
+
+    def generate_combined_analysis(self, stats, sample_comments):
+        latency_ms = settings.AI_STUB_LATENCY_MS
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+
+        total = stats['total'] or 0
+        themes = sorted(
+            (t for t in stats['themes'] if t.get('theme') and t.get('count')),
+            key=lambda t: (-t['count'], t['theme']),
+        )
+        top = ", ".join(f"{t['theme']} ({t['count']})" for t in themes[:3]) or "no recurring themes"
+        share = (lambda n: f"{n / total:.0%}" if total else "0%")
+
+        summary = (
+            f"Across {total} comments, {share(stats['pos'])} were positive, {share(stats['neg'])} negative "
+            f"and {share(stats['neu'])} neutral. Most feedback concerned {top}. "
+            f"{len(sample_comments)} sample comments were reviewed."
+        )
+        focus = [t['theme'] for t in themes] + ["teaching clarity", "course workload", "module materials"]
+        suggestions = "\n".join(f"{i}. Review {theme} with the class." for i, theme in enumerate(focus[:3], start=1))
+        return f"{summary}\n\nSuggestions for Improvement:\n{suggestions}"
@@ -0,0 +1,74 @@
+# Theme assignment by embedding similarity (replaces zero-shot NLI)
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+
+class SentenceEncoder:
+    """Small local sentence encoder: mean-pooled, L2-normalised embeddings computed in batches."""
+
+    def __init__(self, model_name, batch_size=32):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()
+        self.batch_size = batch_size
+
+    def embed(self, texts):
+        """(len(texts), dim) array of unit-length sentence embeddings."""
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            inputs = self.tokenizer(
+                list(texts[start:start + self.batch_size]), padding=True, truncation=True, return_tensors="pt"
+            )
+            with torch.no_grad():
+                hidden = self.model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            vectors.append(pooled.numpy())
+
+        if not vectors:
+            return np.zeros((0, self.model.config.hidden_size), dtype=np.float32)
+        matrix = np.concatenate(vectors).astype(np.float32)
+        return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+class EmbeddingThemeClassifier:
+    """
+    Assigns each comment the candidate theme whose embedding is most similar to it.
+
+    Theme descriptions are embedded once at startup; comments are embedded in batches with
+    a small sentence encoder, so scoring a batch is a single matrix product. A comment
+    whose best cosine similarity is below that theme's threshold gets no theme (None)
+    instead of a forced guess.
+    """
+
+    def __init__(self, model_name, themes, batch_size=32, template="This feedback is about {}.", encoder=None):
+        self.encoder = encoder or SentenceEncoder(model_name, batch_size=batch_size)
+
+        # themes: {"teaching clarity": 0.3, ...} -> name and minimum similarity
+        self.themes = list(themes)
+        self.thresholds = np.array([float(themes[name]) for name in self.themes], dtype=np.float32)
+        self.theme_vectors = self.embed([template.format(name) for name in self.themes])
+
+    def embed(self, texts):
+        return self.encoder.embed(texts)
+
+    def scores(self, texts):
+        """(len(texts), len(themes)) cosine similarities."""
+        return self.embed(texts) @ self.theme_vectors.T
+
+    def classify(self, texts):
+        """Best theme per text, or None when it is below that theme's threshold."""
+        if not texts:
+            return []
+        return self.classify_vectors(self.embed(texts))
+
+    def classify_vectors(self, vectors):
+        """classify() for comments that are already embedded with this encoder."""
+        if len(vectors) == 0:
+            return []
+        sims = vectors @ self.theme_vectors.T
+        best = sims.argmax(axis=1)
+        confident = sims[np.arange(len(vectors)), best] >= self.thresholds[best]
+        return [self.themes[b] if ok else None for b, ok in zip(best, confident)]
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import json
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -35,7 +37,6 @@ INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
-    'corsheaders',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
@@ -121,3 +122,42 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# AI engine
+# Fine-tuned DistilBERT sentiment model (Hugging Face format) and zero-shot theme model.
+# Models are loaded once per process on first use; texts are analysed AI_BATCH_SIZE at a time.
+
+AI_SENTIMENT_MODEL_PATH = os.getenv('AI_SENTIMENT_MODEL_PATH', str(BASE_DIR / 'ai_engine' / 'models' / 'sentiment_model_final'))
+
+# AI_THEME_ENGINE: "embedding" (cosine similarity against AI_THEME_ENCODER embeddings of the
+# theme names) or "zero_shot" (AI_THEME_MODEL NLI pipeline, one pass per comment x theme).
+# Compare the two with `python manage.py bench_themes`.
+AI_THEME_ENGINE = os.getenv('AI_THEME_ENGINE', 'embedding')
+
+AI_THEME_ENCODER = os.getenv('AI_THEME_ENCODER', 'sentence-transformers/all-MiniLM-L6-v2')
+
+AI_THEME_MODEL = os.getenv('AI_THEME_MODEL', 'facebook/bart-large-mnli')
+
+# Candidate themes with the minimum similarity a comment needs to be tagged with each one
+# (embedding engine only). Override with a JSON object in the AI_THEMES environment variable.
+AI_THEMES = json.loads(os.getenv('AI_THEMES', '{}')) or {
+    'teaching clarity': 0.25,
+    'course workload': 0.25,
+    'module materials': 0.25,
+    'instructor engagement': 0.25,
+}
+
+AI_BATCH_SIZE = int(os.getenv('AI_BATCH_SIZE', '16'))
+
+# ModuleAnalysisView analyses new feedback rows this many at a time (one bulk_update per chunk)
+AI_ANALYSIS_CHUNK_SIZE = int(os.getenv('AI_ANALYSIS_CHUNK_SIZE', '500'))
+
+# Module reports: "gemini" (Google Gemini API) or "stub" (deterministic local text, for offline
+# development and load tests; AI_STUB_LATENCY_MS imitates the API latency). A stored report is
+# reused until the module's feedback changes.
+AI_REPORT_BACKEND = os.getenv('AI_REPORT_BACKEND', 'gemini')
+
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
+
+AI_STUB_LATENCY_MS = int(os.getenv('AI_STUB_LATENCY_MS', '0'))
@@ -0,0 +1,79 @@
+import csv
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from transformers import pipeline
+
+from ai_engine.themes import EmbeddingThemeClassifier
+
+# Labelled comments shipped with the main project (text,label columns)
+DEFAULT_DATASET = Path(settings.BASE_DIR).parent / 'data' / 'feedback_dataset.csv'
+
+
+class Command(BaseCommand):
+    help = 'Compare the embedding theme classifier against the zero-shot pipeline: agreement and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', default=str(DEFAULT_DATASET), help='CSV with a text column')
+        parser.add_argument('--limit', type=int, default=200, help='Comments to classify (the zero-shot pipeline is slow)')
+
+    def handle(self, *args, **options):
+        texts = self._load_texts(options['dataset'])[:max(1, options['limit'])]
+        themes = list(settings.AI_THEMES)
+        batch_size = settings.AI_BATCH_SIZE
+        self.stdout.write(f'{len(texts)} comments, themes: {", ".join(themes)}\n')
+
+        self.stdout.write(f'Loading zero-shot pipeline {settings.AI_THEME_MODEL} ...')
+        start = time.perf_counter()
+        zero_shot = pipeline('zero-shot-classification', model=settings.AI_THEME_MODEL)
+        zs_load = time.perf_counter() - start
+
+        self.stdout.write(f'Loading embedding classifier {settings.AI_THEME_ENCODER} ...')
+        start = time.perf_counter()
+        embedding = EmbeddingThemeClassifier(settings.AI_THEME_ENCODER, settings.AI_THEMES, batch_size=batch_size)
+        emb_load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        zs_labels = [res['labels'][0] for res in zero_shot(texts, themes, batch_size=batch_size)]
+        zs_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        emb_labels = embedding.classify(texts)
+        emb_time = time.perf_counter() - start
+
+        self.stdout.write('')
+        self.stdout.write(f'{"engine":<11} {"load s":>8} {"ms/comment":>11} {"comments/s":>11}')
+        for name, load_s, run_s in (('zero_shot', zs_load, zs_time), ('embedding', emb_load, emb_time)):
+            self.stdout.write(
+                f'{name:<11} {load_s:>8.2f} {run_s / len(texts) * 1000:>11.2f} {len(texts) / run_s if run_s else 0:>11.1f}'
+            )
+
+        tagged = [(z, e) for z, e in zip(zs_labels, emb_labels) if e is not None]
+        agree = sum(1 for z, e in tagged if z == e)
+        self.stdout.write('')
+        self.stdout.write(f'Untagged by embedding (below threshold): {len(texts) - len(tagged)}/{len(texts)}')
+        self.stdout.write(
+            f'Agreement with zero-shot: {agree}/{len(texts)} overall ({agree / len(texts):.1%}), '
+            f'{agree}/{len(tagged)} of tagged ({agree / len(tagged) if tagged else 0:.1%})'
+        )
+        self.stdout.write(f'Speedup: {zs_time / emb_time if emb_time else 0:.1f}x')
+
+        self.stdout.write('\nPer theme (zero-shot count / embedding count / both):')
+        zs_counts, emb_counts = Counter(zs_labels), Counter(emb_labels)
+        both = Counter(z for z, e in zip(zs_labels, emb_labels) if z == e)
+        for theme in themes:
+            self.stdout.write(f'  {theme:<24} {zs_counts[theme]:>5} {emb_counts[theme]:>5} {both[theme]:>5}')
+
+    def _load_texts(self, path):
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as fh:
+                texts = [(row.get('text') or '').strip() for row in csv.DictReader(fh)]
+        except OSError as exc:
+            raise CommandError(f'Cannot read dataset: {exc}')
+        texts = [t for t in texts if t]
+        if not texts:
+            raise CommandError('Dataset has no comments')
+        return texts
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai_engine.processors import get_feedback_processor
+from feedback.models import FeedbackCluster, StudentFeedback
+from feedback.sampling import rebuild_clusters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the sentiment/theme clusters used to pick representative comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', action='append', dest='modules', help='Module code (repeatable; default: all modules)')
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or list(
+            StudentFeedback.objects.order_by('module_code').values_list('module_code', flat=True).distinct()
+        )
+        processor = get_feedback_processor()
+        for module_code in modules:
+            rebuild_clusters(module_code, processor, chunk_size=settings.AI_ANALYSIS_CHUNK_SIZE)
+            count = FeedbackCluster.objects.filter(module_code=module_code).count()
+            self.stdout.write(f'{module_code}: {count} clusters')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt clusters for {len(modules)} modules'))
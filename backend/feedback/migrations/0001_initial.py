@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModuleReport',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('professor_name', models.CharField(max_length=100)),
+                ('module_code', models.CharField(max_length=20, unique=True)),
+                ('summary', models.TextField()),
+                ('suggestions', models.TextField()),
+                ('stats_json', models.JSONField(default=dict)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentFeedback',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('professor_name', models.CharField(max_length=100)),
+                ('module_code', models.CharField(max_length=20)),
+                ('sentiment', models.CharField(blank=True, max_length=20, null=True)),
+                ('theme', models.CharField(blank=True, max_length=50, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
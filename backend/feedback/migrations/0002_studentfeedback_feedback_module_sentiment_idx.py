@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentfeedback',
+            index=models.Index(fields=['module_code', 'sentiment'], name='feedback_module_sentiment_idx'),
+        ),
+    ]
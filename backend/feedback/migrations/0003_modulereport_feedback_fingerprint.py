@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0002_studentfeedback_feedback_module_sentiment_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modulereport',
+            name='feedback_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
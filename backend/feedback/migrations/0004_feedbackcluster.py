@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0003_modulereport_feedback_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackCluster',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('module_code', models.CharField(max_length=20)),
+                ('sentiment', models.CharField(max_length=20)),
+                ('theme', models.CharField(blank=True, default='', max_length=50)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('centroid', models.JSONField(default=list)),
+                ('representative_embedding', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('representative', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='feedback.studentfeedback')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('module_code', 'sentiment', 'theme'), name='unique_feedback_cluster')],
+            },
+        ),
+    ]
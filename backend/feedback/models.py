@@ -14,6 +14,12 @@ class StudentFeedback(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Per-module stats and the "not analysed yet" scan
+            models.Index(fields=['module_code', 'sentiment'], name='feedback_module_sentiment_idx'),
+        ]
+
     def __str__(self):
         return f"{self.module_code} - {self.sentiment}"
 
@@ -27,8 +33,36 @@ class ModuleReport(models.Model):
     
     # Aggregated Stats (stored as JSON for the React frontend)
     stats_json = models.JSONField(default=dict)
+
+    # Hash of the feedback the report was generated from; the report is regenerated when it changes
+    feedback_fingerprint = models.CharField(max_length=64, blank=True, default='')
     
     last_updated = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Report for {self.module_code}"
\ No newline at end of file
+        return f"Report for {self.module_code}"
+
+
+class FeedbackCluster(models.Model):
+    # One group of a module's comments with the same sentiment and theme
+    module_code = models.CharField(max_length=20)
+    sentiment = models.CharField(max_length=20)
+    theme = models.CharField(max_length=50, blank=True, default='')  # '' = no theme
+
+    # Running mean of the comments' sentence embeddings, updated as new feedback is analysed
+    size = models.PositiveIntegerField(default=0)
+    centroid = models.JSONField(default=list)
+
+    # Comment closest to the centroid, used as the cluster's sample for report generation
+    representative = models.ForeignKey(StudentFeedback, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    representative_embedding = models.JSONField(default=list)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['module_code', 'sentiment', 'theme'], name='unique_feedback_cluster'),
+        ]
+
+    def __str__(self):
+        return f"{self.module_code} - {self.sentiment}/{self.theme or 'no theme'} ({self.size})"
@@ -0,0 +1,105 @@
+# Representative comment sampling: one comment per (sentiment, theme) cluster, nearest its centroid
+
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+
+from .models import FeedbackCluster, StudentFeedback
+
+
+def update_clusters(module_code, feedbacks, embeddings):
+    """
+    Folds newly analysed feedback into the module's clusters.
+
+    Each cluster keeps the mean embedding of its comments and the comment closest to it.
+    Only the new comments and the current representative are compared against the updated
+    centroid, so the cost follows the size of the new batch, not of the module.
+    Feedback without an embedding (blank text) is skipped.
+    """
+    groups = defaultdict(list)
+    for feedback, vector in zip(feedbacks, embeddings):
+        if vector is not None:
+            groups[(feedback.sentiment or 'neutral', feedback.theme or '')].append((feedback, np.asarray(vector, dtype=np.float32)))
+    if not groups:
+        return
+
+    with transaction.atomic():
+        # Create missing clusters before locking: select_for_update() only locks rows that exist,
+        # and two runs both inserting a new cluster would collide on unique_feedback_cluster
+        FeedbackCluster.objects.bulk_create(
+            [FeedbackCluster(module_code=module_code, sentiment=sentiment, theme=theme) for sentiment, theme in groups],
+            ignore_conflicts=True,
+        )
+        existing = {
+            (c.sentiment, c.theme): c
+            for c in FeedbackCluster.objects.select_for_update().filter(module_code=module_code)
+        }
+        for (sentiment, theme), members in groups.items():
+            cluster = existing[(sentiment, theme)]
+            vectors = np.stack([vector for _, vector in members])
+
+            total = vectors.sum(axis=0)
+            if cluster.size and cluster.centroid:
+                total += np.asarray(cluster.centroid, dtype=np.float32) * cluster.size
+            cluster.size += len(members)
+            centroid = total / cluster.size
+
+            candidates = list(members)
+            if cluster.representative_id and cluster.representative_embedding:
+                candidates.append((None, np.asarray(cluster.representative_embedding, dtype=np.float32)))
+            similarities = np.stack([vector for _, vector in candidates]) @ centroid
+            best_feedback, best_vector = candidates[int(similarities.argmax())]
+            if best_feedback is not None:
+                cluster.representative = best_feedback
+                cluster.representative_embedding = best_vector.tolist()
+
+            cluster.centroid = centroid.tolist()
+            cluster.save()
+
+
+def representative_samples(module_code, k=5):
+    """
+    Up to `k` representative comments, one per cluster: the largest cluster of each sentiment
+    first, then the next largest of each, so every sentiment is heard before any repeats.
+    """
+    clusters = (
+        FeedbackCluster.objects.filter(module_code=module_code, representative__isnull=False)
+        .select_related('representative')
+        .only('sentiment', 'size', 'representative__text')
+        .order_by('-size', 'id')
+    )
+    by_sentiment = defaultdict(list)
+    for cluster in clusters:
+        by_sentiment[cluster.sentiment].append(cluster.representative.text)
+
+    samples = []
+    queues = list(by_sentiment.values())  # insertion order = order of each sentiment's largest cluster
+    while len(samples) < k and any(queues):
+        for queue in queues:
+            if queue and len(samples) < k:
+                samples.append(queue.pop(0))
+    return samples
+
+
+def rebuild_clusters(module_code, processor, chunk_size=500):
+    """Recomputes a module's clusters from all of its analysed feedback (after deletions or for old data)."""
+    FeedbackCluster.objects.filter(module_code=module_code).delete()
+    last_id = 0
+    while True:
+        chunk = list(
+            StudentFeedback.objects
+            .filter(module_code=module_code, sentiment__isnull=False, id__gt=last_id)
+            .order_by('id')
+            .only('id', 'text', 'sentiment', 'theme')[:chunk_size]
+        )
+        if not chunk:
+            return
+        texts = [f.text for f in chunk]
+        keep = [i for i, t in enumerate(texts) if t and t.strip()]
+        vectors = processor.embed([texts[i] for i in keep])
+        embeddings = [None] * len(chunk)
+        for i, vector in zip(keep, vectors):
+            embeddings[i] = vector
+        update_clusters(module_code, chunk, embeddings)
+        last_id = chunk[-1].id
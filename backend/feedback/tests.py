@@ -0,0 +1,160 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from ai_engine.services import StubReportService
+
+from .models import FeedbackCluster, ModuleReport, StudentFeedback
+from .sampling import representative_samples
+from .views import ModuleAnalysisView, analyze_new_feedback, module_stats
+
+MODULE = 'CS101'
+
+
+class FakeProcessor:
+    """Stand-in for FeedbackProcessor: keyword sentiment, one theme and a 2-d embedding per comment."""
+
+    def __init__(self):
+        self.batches = []
+
+    def analyze_batch(self, texts):
+        self.batches.append(list(texts))
+        results = []
+        for text in texts:
+            if 'good' in text:
+                sentiment, vector = 'positive', [1.0, 0.0]
+            elif 'bad' in text:
+                sentiment, vector = 'negative', [0.0, 1.0]
+            else:
+                sentiment, vector = 'neutral', [0.7, 0.7]
+            results.append({"sentiment": sentiment, "theme": 'clarity', "embedding": vector})
+        return results
+
+    def embed(self, texts):
+        return [result['embedding'] for result in self.analyze_batch(texts)]
+
+
+def add_feedback(*texts, module_code=MODULE, **fields):
+    return [
+        StudentFeedback.objects.create(text=text, professor_name='Dr. Smith', module_code=module_code, **fields)
+        for text in texts
+    ]
+
+
+class ModuleStatsTests(TestCase):
+    def test_single_query(self):
+        add_feedback('good pace', 'good slides', sentiment='positive', theme='clarity')
+        add_feedback('bad labs', sentiment='negative', theme='workload')
+        add_feedback('ok', sentiment='neutral')
+        add_feedback('other module', module_code='CS999', sentiment='positive', theme='clarity')
+
+        with self.assertNumQueries(1):
+            stats = module_stats(MODULE)
+
+        self.assertEqual((stats['total'], stats['pos'], stats['neg'], stats['neu']), (4, 2, 1, 1))
+        self.assertEqual(
+            sorted(stats['themes'], key=lambda t: t['theme'] or ''),
+            [{'theme': None, 'count': 0}, {'theme': 'clarity', 'count': 2}, {'theme': 'workload', 'count': 1}],
+        )
+
+
+@override_settings(AI_ANALYSIS_CHUNK_SIZE=2)
+class AnalyzeNewFeedbackTests(TestCase):
+    def test_processes_every_chunk(self):
+        add_feedback('good pace', 'bad labs', 'good slides', 'fine', 'bad room')
+        processor = FakeProcessor()
+
+        analyze_new_feedback(MODULE, processor)
+
+        self.assertEqual([len(batch) for batch in processor.batches], [2, 2, 1])
+        self.assertFalse(StudentFeedback.objects.filter(sentiment__isnull=True).exists())
+        self.assertEqual(StudentFeedback.objects.get(text='bad room').sentiment, 'negative')
+        sizes = dict(FeedbackCluster.objects.filter(module_code=MODULE).values_list('sentiment', 'size'))
+        self.assertEqual(sizes, {'positive': 2, 'negative': 2, 'neutral': 1})
+
+    def test_skips_analysed_rows(self):
+        add_feedback('good pace', sentiment='positive', theme='clarity')
+        processor = FakeProcessor()
+
+        analyze_new_feedback(MODULE, processor)
+        self.assertEqual(processor.batches, [])
+
+        add_feedback('bad labs')
+        analyze_new_feedback(MODULE, processor)
+        self.assertEqual(processor.batches, [['bad labs']])
+
+
+class RepresentativeSamplesTests(TestCase):
+    def cluster(self, sentiment, theme, size, text):
+        feedback, = add_feedback(text, sentiment=sentiment, theme=theme)
+        return FeedbackCluster.objects.create(
+            module_code=MODULE, sentiment=sentiment, theme=theme, size=size, representative=feedback,
+        )
+
+    def test_round_robin_over_sentiments(self):
+        self.cluster('positive', 'clarity', 10, 'pos-clarity')
+        self.cluster('negative', 'workload', 8, 'neg-workload')
+        self.cluster('positive', 'pace', 5, 'pos-pace')
+        self.cluster('neutral', '', 3, 'neu')
+        self.cluster('negative', 'clarity', 1, 'neg-clarity')
+
+        self.assertEqual(representative_samples(MODULE, k=3), ['pos-clarity', 'neg-workload', 'neu'])
+        self.assertEqual(
+            representative_samples(MODULE, k=10),
+            ['pos-clarity', 'neg-workload', 'neu', 'pos-pace', 'neg-clarity'],
+        )
+
+    def test_clusters_without_representative_are_ignored(self):
+        FeedbackCluster.objects.create(module_code=MODULE, sentiment='positive', theme='clarity', size=4)
+        self.assertEqual(representative_samples(MODULE), [])
+
+
+@override_settings(AI_REPORT_BACKEND='stub', AI_STUB_LATENCY_MS=0)
+class ModuleAnalysisViewTests(TestCase):
+    def setUp(self):
+        self.processor = FakeProcessor()
+        self.report_service = mock.Mock(wraps=StubReportService())
+        self.report_service.name = StubReportService.name
+        patches = [
+            mock.patch('feedback.views.get_feedback_processor', return_value=self.processor),
+            mock.patch('feedback.views.get_report_service', return_value=self.report_service),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def get(self):
+        request = APIRequestFactory().get(f'/api/modules/{MODULE}/analysis/')
+        return ModuleAnalysisView.as_view()(request, module_code=MODULE).data
+
+    def test_report_is_reused_until_feedback_changes(self):
+        add_feedback('good pace', 'bad labs')
+
+        first = self.get()
+        self.assertFalse(first['cached'])
+        self.assertEqual(self.report_service.generate_combined_analysis.call_count, 1)
+
+        second = self.get()
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['ai_analysis'], first['ai_analysis'])
+        self.assertEqual(self.report_service.generate_combined_analysis.call_count, 1)
+
+        add_feedback('good slides')
+        third = self.get()
+        self.assertFalse(third['cached'])
+        self.assertEqual(third['stats']['total'], 3)
+        self.assertEqual(self.report_service.generate_combined_analysis.call_count, 2)
+        self.assertEqual(ModuleReport.objects.get(module_code=MODULE).stats_json['total'], 3)
+
+    def test_samples_come_from_clusters(self):
+        add_feedback('good pace', 'bad labs')
+        self.get()
+        _, samples = self.report_service.generate_combined_analysis.call_args.args
+        self.assertEqual(sorted(samples), ['bad labs', 'good pace'])
+
+    def test_samples_fall_back_to_newest_comments_without_clusters(self):
+        add_feedback(*[f'old comment {i}' for i in range(7)], sentiment='neutral', theme='clarity')
+        self.get()
+        _, samples = self.report_service.generate_combined_analysis.call_args.args
+        self.assertEqual(samples, [f'old comment {i}' for i in (6, 5, 4, 3, 2)])
@@ -3,52 +3,124 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from .models import StudentFeedback, ModuleReport
-from ai_engine.processors import FeedbackProcessor
-from ai_engine.services import GeminiService
-from django.db.models import Count
+from .sampling import representative_samples, update_clusters
+from ai_engine.processors import get_feedback_processor
+from ai_engine.services import get_report_service
+from django.conf import settings
+from django.db.models import Count, Max, Q
+import hashlib
+import json
+
+
+def analyze_new_feedback(module_code, processor=None):
+    """
+    Analyse the module's rows that have no sentiment yet, AI_ANALYSIS_CHUNK_SIZE at a time:
+    one analyze_batch() and one bulk_update() per chunk. Rows analysed earlier are never
+    loaded again, so the cost follows the amount of new feedback, not the module size.
+    The models are only loaded when there is something to analyse.
+    """
+    last_id = 0
+    chunk_size = settings.AI_ANALYSIS_CHUNK_SIZE
+    while True:
+        chunk = list(
+            StudentFeedback.objects
+            .filter(module_code=module_code, sentiment__isnull=True, id__gt=last_id)
+            .order_by('id')
+            .only('id', 'text')[:chunk_size]
+        )
+        if not chunk:
+            return
+        processor = processor or get_feedback_processor()
+        analysis = processor.analyze_batch([f.text for f in chunk])
+        for feedback, results in zip(chunk, analysis):
+            feedback.sentiment = results['sentiment']
+            feedback.theme = results['theme']
+        StudentFeedback.objects.bulk_update(chunk, ['sentiment', 'theme'])
+        update_clusters(module_code, chunk, [results['embedding'] for results in analysis])
+        last_id = chunk[-1].id
+
+
+def module_stats(module_code):
+    """Totals, sentiment counts and theme counts for a module from a single GROUP BY theme query."""
+    groups = list(
+        StudentFeedback.objects.filter(module_code=module_code)
+        .values('theme')
+        .annotate(
+            total=Count('id'),
+            count=Count('theme'),
+            pos=Count('id', filter=Q(sentiment='positive')),
+            neg=Count('id', filter=Q(sentiment='negative')),
+            neu=Count('id', filter=Q(sentiment='neutral')),
+        )
+        .order_by('theme')
+    )
+    return {
+        "total": sum(g['total'] for g in groups),
+        "pos": sum(g['pos'] for g in groups),
+        "neg": sum(g['neg'] for g in groups),
+        "neu": sum(g['neu'] for g in groups),
+        "themes": [{'theme': g['theme'], 'count': g['count']} for g in groups]
+    }
+
+
+def feedback_fingerprint(module_code, stats, report_service):
+    """
+    Identifies the feedback a report is based on: the aggregated stats, the newest row id
+    (so added or removed rows change it even when the counts balance out) and the report backend.
+    """
+    last_id = StudentFeedback.objects.filter(module_code=module_code).aggregate(last_id=Max('id'))['last_id']
+    payload = json.dumps({"stats": stats, "last_id": last_id, "backend": report_service.name}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
 
 class ModuleAnalysisView(APIView):
     def get(self, request, module_code):
         # 1. Initialize Engines
-        processor = FeedbackProcessor()
-        gemini = GeminiService()
+        report_service = get_report_service()
         
-        # 2. Process any unanalyzed feedback with local BERT
-        unanalyzed = StudentFeedback.objects.filter(module_code=module_code, sentiment__isnull=True)
-        for feedback in unanalyzed:
-            results = processor.analyze_single(feedback.text)
-            feedback.sentiment = results['sentiment']
-            feedback.theme = results['theme']
-            feedback.save()
+        # 2. Process only new (unanalyzed) feedback with local BERT
+        analyze_new_feedback(module_code)
 
         # 3. Aggregate Data for Gemini
         feedbacks = StudentFeedback.objects.filter(module_code=module_code)
-        stats = {
-            "total": feedbacks.count(),
-            "pos": feedbacks.filter(sentiment='positive').count(),
-            "neg": feedbacks.filter(sentiment='negative').count(),
-            "neu": feedbacks.filter(sentiment='neutral').count(),
-            "themes": list(feedbacks.values('theme').annotate(count=Count('theme')))
-        }
+        stats = module_stats(module_code)
+        fingerprint = feedback_fingerprint(module_code, stats, report_service)
+
+        # Serve the stored report while the feedback it was built from is unchanged
+        report = ModuleReport.objects.filter(module_code=module_code).first()
+        if report is not None and report.feedback_fingerprint == fingerprint:
+            return Response({
+                "module": module_code,
+                "stats": report.stats_json,
+                "ai_analysis": report.summary,
+                "cached": True
+            })
         
-        # Get 5 representative comments for context
-        samples = [f.text for f in feedbacks.order_by('?')[:5]]
+        # Get 5 representative comments for context (nearest each sentiment/theme cluster centroid);
+        # modules analysed before clusters existed fall back to the newest comments until
+        # `manage.py rebuild_feedback_clusters` has run
+        samples = representative_samples(module_code, k=5)
+        if not samples:
+            samples = list(feedbacks.order_by('-id').values_list('text', flat=True)[:5])
 
         # 4. Generate/Update Report with Gemini
-        ai_output = gemini.generate_combined_analysis(stats, samples)
+        ai_output = report_service.generate_combined_analysis(stats, samples)
         
         # Simple splitting logic for Gemini's output (or store full text)
+        first = feedbacks.only('professor_name').first()
         report, _ = ModuleReport.objects.update_or_create(
             module_code=module_code,
             defaults={
                 'summary': ai_output, 
                 'stats_json': stats,
-                'professor_name': feedbacks.first().professor_name if feedbacks.exists() else "Unknown"
+                'feedback_fingerprint': fingerprint,
+                'professor_name': first.professor_name if first else "Unknown"
             }
         )
 
         return Response({
             "module": module_code,
             "stats": stats,
-            "ai_analysis": ai_output
+            "ai_analysis": ai_output,
+            "cached": False
         })
\ No newline at end of file
@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sfme.settings')
 
 application = get_asgi_application()
+
+# Opt-in (SENTIMENT_WARMUP_ENABLED): load the sentiment model in the background so the first
+# submission doesn't pay for it. Done here rather than in AppConfig.ready() so that only serving
+# processes load it, not manage.py commands.
+from api.sentiment_service import start_warm_up_if_enabled  # noqa: E402
+
+start_warm_up_if_enabled()
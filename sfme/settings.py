@@ -15,6 +15,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,6 +38,8 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:5173",
 ]
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["idempotent-replayed"]
 
 MAX_BULK_CSV_SIZE_BYTES = 2 * 1024 * 1024
 
@@ -135,6 +138,93 @@ DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", EMAIL_HOST_USER)
 RECAPTCHA_SECRET_KEY = os.getenv("RECAPTCHA_SECRET_KEY", "")
 RECAPTCHA_MIN_SCORE = float(os.getenv("RECAPTCHA_MIN_SCORE", "0.5"))
 
+# Sentiment inference
+# SENTIMENT_BACKEND: "torch" (fp32, CUDA when available), "torch_int8" (dynamically quantized
+# Linear layers, CPU only) or "onnx" (ONNX Runtime CPU session, no torch/transformers import;
+# run `manage.py export_sentiment_onnx` first). Compare with `manage.py compare_sentiment_backends`.
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")
+# SENTIMENT_MODEL_DIR: model directory to serve (default: sentiment_model_final/). Point it at a
+# directory written by `manage.py train_sentiment`; its manifest version keys the label cache.
+SENTIMENT_MODEL_DIR = os.getenv("SENTIMENT_MODEL_DIR", "")
+# Concurrent predict_sentiment() calls are grouped into one forward pass of up to
+# SENTIMENT_BATCH_SIZE texts, waiting at most SENTIMENT_BATCH_MAX_WAIT_MS for a batch to fill.
+SENTIMENT_BATCHING_ENABLED = os.getenv("SENTIMENT_BATCHING_ENABLED", "true").lower() == "true"
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "16"))
+SENTIMENT_BATCH_MAX_WAIT_MS = float(os.getenv("SENTIMENT_BATCH_MAX_WAIT_MS", "10"))
+# A queued predict_sentiment() call gives up (and the request fails) after SENTIMENT_BATCH_TIMEOUT seconds.
+SENTIMENT_BATCH_TIMEOUT = float(os.getenv("SENTIMENT_BATCH_TIMEOUT", "30"))
+# Upper bound on the number of texts accepted by POST /api/sentiment/batch/
+SENTIMENT_MAX_BATCH_ITEMS = int(os.getenv("SENTIMENT_MAX_BATCH_ITEMS", "256"))
+# Batches are sorted by token length and split into buckets of at most SENTIMENT_BUCKET_MAX_ITEMS
+# texts / SENTIMENT_BUCKET_MAX_TOKENS padded tokens, each padded only to its own longest text.
+SENTIMENT_BUCKET_MAX_ITEMS = int(os.getenv("SENTIMENT_BUCKET_MAX_ITEMS", "32"))
+SENTIMENT_BUCKET_MAX_TOKENS = int(os.getenv("SENTIMENT_BUCKET_MAX_TOKENS", "4096"))
+# Labels are cached by hash(model files + normalized text): an in-process LRU of SENTIMENT_CACHE_SIZE
+# entries, plus an optional shared tier on the CACHES alias named by SENTIMENT_CACHE_SHARED_ALIAS.
+SENTIMENT_CACHE_ENABLED = os.getenv("SENTIMENT_CACHE_ENABLED", "true").lower() == "true"
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "10000"))
+SENTIMENT_CACHE_SHARED_ALIAS = os.getenv("SENTIMENT_CACHE_SHARED_ALIAS", "")
+SENTIMENT_CACHE_SHARED_TTL = int(os.getenv("SENTIMENT_CACHE_SHARED_TTL", str(7 * 24 * 3600)))
+# Submitted feedback is queued in the sentiment_jobs table and scored by `manage.py run_sentiment_worker`,
+# which claims up to SENTIMENT_WORKER_BATCH_SIZE jobs at a time. Jobs running longer than
+# SENTIMENT_JOB_LEASE_SECONDS are retried; after SENTIMENT_JOB_MAX_ATTEMPTS they are marked failed.
+SENTIMENT_JOBS_ENABLED = os.getenv("SENTIMENT_JOBS_ENABLED", "true").lower() == "true"
+SENTIMENT_WORKER_BATCH_SIZE = int(os.getenv("SENTIMENT_WORKER_BATCH_SIZE", "64"))
+SENTIMENT_WORKER_POLL_SECONDS = float(os.getenv("SENTIMENT_WORKER_POLL_SECONDS", "2"))
+SENTIMENT_JOB_LEASE_SECONDS = int(os.getenv("SENTIMENT_JOB_LEASE_SECONDS", "300"))
+SENTIMENT_JOB_MAX_ATTEMPTS = int(os.getenv("SENTIMENT_JOB_MAX_ATTEMPTS", "3"))
+# When SENTIMENT_POOL_ADDRESS (Unix socket path or host:port) is set, web workers send texts to the
+# `manage.py run_sentiment_pool` processes instead of loading the model themselves, so web and
+# inference concurrency are sized separately. The handshake uses SENTIMENT_POOL_AUTHKEY (default: SECRET_KEY).
+SENTIMENT_POOL_ADDRESS = os.getenv("SENTIMENT_POOL_ADDRESS", "")
+SENTIMENT_POOL_WORKERS = int(os.getenv("SENTIMENT_POOL_WORKERS", "2"))
+SENTIMENT_POOL_TIMEOUT = float(os.getenv("SENTIMENT_POOL_TIMEOUT", "30"))
+SENTIMENT_POOL_AUTHKEY = os.getenv("SENTIMENT_POOL_AUTHKEY", "")
+# With SENTIMENT_WARMUP_ENABLED each serving process (sfme/wsgi.py, sfme/asgi.py) loads the model in a
+# background thread at startup and runs SENTIMENT_WARMUP_BATCHES dummy batches; GET /api/sentiment/ready/
+# answers 503 until that has finished. Workers forked after startup (gunicorn --preload) warm up again
+# unless the model had already loaded.
+SENTIMENT_WARMUP_ENABLED = os.getenv("SENTIMENT_WARMUP_ENABLED", "false").lower() == "true"
+SENTIMENT_WARMUP_BATCHES = int(os.getenv("SENTIMENT_WARMUP_BATCHES", "3"))
+# CPU thread policy applied when the model is loaded. 0 keeps the library default (one thread per core
+# in every process). SENTIMENT_CPU_AFFINITY pins inference to cores: "0-3,8" for this process, or
+# "auto" to give each `run_sentiment_pool` worker its own block of SENTIMENT_INTRA_OP_THREADS cores.
+# Pick values with `manage.py bench_threads`.
+SENTIMENT_INTRA_OP_THREADS = int(os.getenv("SENTIMENT_INTRA_OP_THREADS", "0"))
+SENTIMENT_INTER_OP_THREADS = int(os.getenv("SENTIMENT_INTER_OP_THREADS", "0"))
+SENTIMENT_CPU_AFFINITY = os.getenv("SENTIMENT_CPU_AFFINITY", "")
+
+# Feedback validation
+# Compiled form schemas (question code -> id/type/required) are kept on this CACHES alias for
+# FORM_SCHEMA_CACHE_TTL seconds; they are rechecked against the form's and the question bank's updated_at on every lookup.
+FORM_SCHEMA_CACHE_ALIAS = os.getenv("FORM_SCHEMA_CACHE_ALIAS", "default")
+FORM_SCHEMA_CACHE_TTL = int(os.getenv("FORM_SCHEMA_CACHE_TTL", "300"))
+# feedback/submit/bulk/ accepts up to FEEDBACK_BULK_MAX_ITEMS submissions per request and
+# inserts them FEEDBACK_BULK_BATCH_SIZE rows per INSERT.
+FEEDBACK_BULK_MAX_ITEMS = int(os.getenv("FEEDBACK_BULK_MAX_ITEMS", "5000"))
+FEEDBACK_BULK_BATCH_SIZE = int(os.getenv("FEEDBACK_BULK_BATCH_SIZE", "500"))
+# Largest request body feedback/submit/bulk/ accepts (api.middleware.BulkFeedbackBodySizeMiddleware);
+# every other endpoint keeps Django's DATA_UPLOAD_MAX_MEMORY_SIZE default of 2.5 MB.
+FEEDBACK_BULK_MAX_BODY_SIZE = int(os.getenv("FEEDBACK_BULK_MAX_BODY_SIZE", str(10 * 1024 * 1024)))
+# feedback/submit/ (and /bulk/) honour an Idempotency-Key header: the first response is kept for
+# IDEMPOTENCY_TTL_SECONDS and replayed to retries with the same key. Requests still running hold
+# the key for at most IDEMPOTENCY_LOCK_SECONDS. Use a shared cache alias when running several processes.
+IDEMPOTENCY_CACHE_ALIAS = os.getenv("IDEMPOTENCY_CACHE_ALIAS", "default")
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+# Write-behind ingestion for peak evaluation windows: feedback/submit/ validates, appends the submission
+# to the feedback_ingest_buffer table (refusing ones already buffered) and answers 202 with a queue_id;
+# `manage.py flush_feedback_buffer` merges it into feedback_responses FEEDBACK_FLUSH_BATCH_SIZE rows at a
+# time and marks submissions that were already stored as duplicate. feedback/ingest/<queue_id>/ reports
+# each submission's outcome. With FEEDBACK_BUFFER_MAX_DEPTH submissions pending, new ones get
+# 503 + Retry-After. Backlog and counters are at feedback/ingest/status/ (counters live in the default cache).
+FEEDBACK_WRITE_BEHIND_ENABLED = os.getenv("FEEDBACK_WRITE_BEHIND_ENABLED", "false").lower() == "true"
+FEEDBACK_FLUSH_BATCH_SIZE = int(os.getenv("FEEDBACK_FLUSH_BATCH_SIZE", "1000"))
+FEEDBACK_FLUSH_POLL_SECONDS = float(os.getenv("FEEDBACK_FLUSH_POLL_SECONDS", "1"))
+FEEDBACK_BUFFER_MAX_DEPTH = int(os.getenv("FEEDBACK_BUFFER_MAX_DEPTH", "50000"))
+FEEDBACK_BUFFER_DEPTH_REFRESH_SECONDS = float(os.getenv("FEEDBACK_BUFFER_DEPTH_REFRESH_SECONDS", "1"))
+FEEDBACK_BUFFER_RETRY_AFTER_SECONDS = int(os.getenv("FEEDBACK_BUFFER_RETRY_AFTER_SECONDS", "5"))
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -145,6 +235,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.BulkFeedbackBodySizeMiddleware',
     'api.middleware.SQLInjectionProtectionMiddleware',
 ]
 